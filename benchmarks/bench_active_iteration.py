@@ -0,0 +1,162 @@
+"""Aktif ürünleri okuma benchmark'ı: tam liste vs. keyset sayfalı akış
+
+SQLite'a N ürün + N takip yazar, ardından iki okuma yolunu ölçer:
+  list    aktif ürünler + ürüne göre gruplu takipler tek sorguda
+          (tüm katalog tek seferde belleğe; keyset öncesi eski okuma yolu)
+  stream  iter_active_work (id > son_id ile parça parça, her parça ayrı session)
+
+Her yol için ilk ürüne kadar geçen süre, toplam süre ve tracemalloc ile
+ölçülen en yüksek Python bellek kullanımı raporlanır.
+
+Kullanım (repo kökünden):
+    python -m benchmarks.bench_active_iteration --rows 100000,1000000
+    python -m benchmarks.bench_active_iteration --rows 100000 --url-bytes 2048
+    python -m benchmarks.bench_active_iteration --rows 1000000 --modes stream
+
+1M satırda list modu (tracemalloc açıkken) birkaç GB bellek ister; küçük
+makinelerde --modes stream ile sadece akış ölçülebilir.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from sqlalchemy import exists, select
+
+from src.price_tracker_bot.db.base import Base
+from src.price_tracker_bot.db.engine import build_engine, build_sessionmaker
+from src.price_tracker_bot.db.models import Product, TrackingItem
+from src.price_tracker_bot.services.price_checker import iter_active_work
+
+
+async def create_schema(path: str) -> None:
+    engine = build_engine(f"sqlite+aiosqlite:///{path}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    await engine.dispose()
+
+
+def seed(path: str, rows: int, url_bytes: int) -> None:
+    """Ürün ve takip satırlarını stdlib sqlite3 ile hızlıca yaz"""
+    pad = "x" * max(0, url_bytes - 40)
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=OFF")
+    batch = 20000
+    for start in range(1, rows + 1, batch):
+        ids = range(start, min(start + batch, rows + 1))
+        conn.executemany(
+            "INSERT INTO products (id, product_key, url, title, image_url, last_price) VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                (i, f"trendyol:{i}", f"https://www.trendyol.com/m/u-p-{i}?{pad}", f"Ürün {i}",
+                 f"https://cdn.dsmcdn.com/{pad}/{i}.jpg", 100.0)
+                for i in ids
+            ),
+        )
+        conn.executemany(
+            "INSERT INTO tracking_items (id, chat_id, product_id, url, title, image_url, baseline_price, "
+            "last_price, threshold_pct, is_active) VALUES (?, ?, ?, ?, ?, ?, ?, ?, 0, 1)",
+            (
+                (i, i % 5000, i, f"https://www.trendyol.com/m/u-p-{i}?{pad}", f"Ürün {i}",
+                 f"https://cdn.dsmcdn.com/{pad}/{i}.jpg", 100.0, 100.0)
+                for i in ids
+            ),
+        )
+        conn.commit()
+    conn.close()
+
+
+async def list_active(session) -> tuple[list[Product], dict[int, list[TrackingItem]]]:
+    """Karşılaştırma için eski yol: tüm aktif ürünler ve takipleri tek seferde"""
+    has_active = exists().where(TrackingItem.product_id == Product.id, TrackingItem.is_active == True)
+    res = await session.execute(select(Product).where(has_active).order_by(Product.id))
+    products = list(res.scalars().all())
+    res = await session.execute(
+        select(TrackingItem)
+        .where(TrackingItem.is_active == True, TrackingItem.product_id.is_not(None))
+        .order_by(TrackingItem.product_id, TrackingItem.id)
+    )
+    subscribers: dict[int, list[TrackingItem]] = {}
+    for item in res.scalars():
+        subscribers.setdefault(item.product_id, []).append(item)
+    return products, subscribers
+
+
+async def read_list(sessionmaker) -> tuple[int, float]:
+    t0 = time.perf_counter()
+    async with sessionmaker() as session:
+        products, subscribers = await list_active(session)
+    first = time.perf_counter() - t0
+    count = 0
+    for product in products:
+        count += len(subscribers.get(product.id, []))
+    return count, first
+
+
+async def read_stream(sessionmaker, chunk_size: int) -> tuple[int, float]:
+    t0 = time.perf_counter()
+    first = None
+    count = 0
+    async for chunk in iter_active_work(sessionmaker, chunk_size):
+        if first is None:
+            first = time.perf_counter() - t0
+        for _, items in chunk:
+            count += len(items)
+    return count, first or 0.0
+
+
+async def measure(path: str, mode: str, chunk_size: int, trace: bool) -> dict:
+    engine = build_engine(f"sqlite+aiosqlite:///{path}")
+    sessionmaker = build_sessionmaker(engine)
+    if trace:
+        tracemalloc.start()
+    t0 = time.perf_counter()
+    if mode == "list":
+        count, first = await read_list(sessionmaker)
+    else:
+        count, first = await read_stream(sessionmaker, chunk_size)
+    total = time.perf_counter() - t0
+    peak = 0
+    if trace:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    await engine.dispose()
+    return {"count": count, "first": first, "total": total, "peak_mb": peak / 1024 / 1024}
+
+
+async def run(rows: int, url_bytes: int, chunk_size: int, modes: list[str]) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        t0 = time.perf_counter()
+        await create_schema(path)
+        seed(path, rows, url_bytes)
+        print(f"\n== {rows:,} rows (url ~{url_bytes} B), seeded in {time.perf_counter() - t0:.1f}s")
+        print(f"{'mode':8} {'first item s':>13} {'total s':>9} {'peak MB':>9}")
+        for mode in modes:
+            timing = await measure(path, mode, chunk_size, trace=False)
+            memory = await measure(path, mode, chunk_size, trace=True)
+            assert timing["count"] == rows, timing
+            print(f"{mode:8} {timing['first']:13.3f} {timing['total']:9.2f} {memory['peak_mb']:9.1f}")
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--rows", default="100000,1000000", help="virgülle ayrılmış satır sayıları")
+    ap.add_argument("--url-bytes", type=int, default=256, help="url / image_url uzunluğu")
+    ap.add_argument("--chunk-size", type=int, default=500, help="stream modunda parça boyutu")
+    ap.add_argument("--modes", default="list,stream", help="ölçülecek okuma yolları")
+    args = ap.parse_args(argv)
+
+    for rows in (int(r) for r in args.rows.split(",")):
+        asyncio.run(run(rows, args.url_bytes, args.chunk_size, args.modes.split(",")))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,258 @@
+"""Uçtan uca kontrol turu: sahte Trendyol ve sahte Bot API sunucularıyla
+
+check_all_prices'ın tüm yolu ölçülür: DB okuma, sayfa çekme, parse,
+karşılaştırma, toplu yazma ve outbox'tan bildirim gönderimi. SQLite'a
+`--items` takip (ürün başına `--subscribers` sohbet) yazılır. Ürün
+URL'leri yerel StubTrendyol'a gider, bildirimler gerçek aiogram Bot ile
+yerel StubBotApi'ye gönderilir (bkz. benchmarks/stub_servers.py). Turlar
+arasında sayfa fiyatları `--drift` olasılıkla oynar, eşiği geçen düşüşler
+bildirim üretir.
+
+Raporlanır:
+- tur başına ürün/sn ve takip/sn
+- ürün başına kontrol süresi (p50 / p99)
+- sürecin en yüksek RSS'i
+- bildirim hızı (mesaj/sn) ve alınan 429 sayısı
+
+İlk tur soğuk başlangıçtır: process havuzunun açılışı ve sayfaların ilk
+parse'ı da buna dahildir. Sonraki turlarda değişmeyen sayfalar hash (ya da
+`--etag` ile 304) üzerinden atlanır.
+
+Tüm bildirimler teslim edilmezse ya da bir mesaj iki kez giderse çıkış
+kodu 1'dir.
+
+Kullanım (repo kökünden):
+    python -m benchmarks.bench_cycle --items 2000 --cycles 3
+    python -m benchmarks.bench_cycle --items 10000 --subscribers 2 --concurrency 32 --pool process
+    python -m benchmarks.bench_cycle --items 1000 --error-rate 0.05 --flood-rate 0.1 --etag
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import io
+import logging
+import os
+import resource
+import sqlite3
+import sys
+import tempfile
+import time
+
+from aiogram import Bot
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+
+from benchmarks.bench_active_iteration import create_schema
+from benchmarks.stub_servers import StubBotApi, StubTrendyol
+from src.price_tracker_bot.db.engine import build_engine, build_sessionmaker
+from src.price_tracker_bot.services import http_client, parse_pool
+from src.price_tracker_bot.services.notification_sender import NotificationSender
+from src.price_tracker_bot.services.price_checker import PriceCheckerService
+
+
+class LogCapture(logging.Handler):
+    """Servis loglarını (WARNING ve üstü) yazdırmadan topla
+
+    `ignore` içindeki mesajlar (ör. kasıtlı hata oranıyla gelen fetch
+    hataları) hata sayılmaz.
+    """
+
+    def __init__(self, ignore: tuple[str, ...] = ()):
+        super().__init__(logging.WARNING)
+        self.ignore = ignore
+        self.records: list[logging.LogRecord] = []
+        self._logger = logging.getLogger("src.price_tracker_bot")
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if record.getMessage() not in self.ignore:
+            self.records.append(record)
+
+    def lines(self) -> list[str]:
+        fields = ("product_id", "chat_id", "error", "detail")
+        return [
+            " ".join([r.getMessage()] + [f"{k}={getattr(r, k)}" for k in fields if hasattr(r, k)])
+            for r in self.records
+        ]
+
+    def __enter__(self) -> "LogCapture":
+        self._logger.addHandler(self)
+        self._logger.propagate = False
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._logger.removeHandler(self)
+        self._logger.propagate = True
+
+
+def seed(path: str, base_url: str, trendyol: StubTrendyol, items: int, subscribers: int,
+         chats: int, threshold: float) -> int:
+    """Ürün ve takip satırlarını stdlib sqlite3 ile yaz, ürün sayısını döndür"""
+    products = max(1, items // subscribers)
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executemany(
+        "INSERT INTO products (id, product_key, url, title, last_price) VALUES (?, ?, ?, ?, ?)",
+        (
+            (i, f"trendyol:{i}", f"{base_url}/marka/urun-p-{i}", f"Ürün {i}", trendyol.price_for(i))
+            for i in range(1, products + 1)
+        ),
+    )
+    conn.executemany(
+        "INSERT INTO tracking_items (chat_id, product_id, url, title, baseline_price, last_price, "
+        "threshold_pct, is_active) VALUES (?, ?, ?, ?, ?, ?, ?, 1)",
+        (
+            (n % chats, i, f"{base_url}/marka/urun-p-{i}", f"Ürün {i}", price, price, threshold)
+            for n, (i, price) in enumerate(
+                (i, trendyol.price_for(i) or 100.0)
+                for i in range(1, products + 1)
+                for _ in range(subscribers)
+            )
+        ),
+    )
+    conn.commit()
+    conn.close()
+    return products
+
+
+def outbox_counts(path: str) -> dict[str, int]:
+    conn = sqlite3.connect(path)
+    rows = dict(conn.execute("SELECT status, COUNT(*) FROM outbox_messages GROUP BY status").fetchall())
+    conn.close()
+    return rows
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def peak_rss_mb() -> float:
+    # Linux'ta KB, macOS'ta bayt
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 1024 / 1024 if sys.platform == "darwin" else rss / 1024
+
+
+async def run(args) -> int:
+    trendyol = StubTrendyol(args.latency_ms, args.error_rate, args.drift, args.etag)
+    bot_api = StubBotApi(args.tg_global, flood_rate=args.flood_rate)
+    base_url = await trendyol.start()
+    await bot_api.start()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        await create_schema(path)
+        products = seed(path, base_url, trendyol, args.items, args.subscribers, args.chats, args.threshold)
+        print(
+            f"{products} products / {products * args.subscribers} items over {args.chats} chats | "
+            f"page latency {args.latency_ms:.0f} ms, errors {args.error_rate:.0%}, drift {args.drift:.0%}, "
+            f"pool {args.pool}, concurrency {args.concurrency}\n"
+        )
+
+        engine = build_engine(f"sqlite+aiosqlite:///{path}")
+        sessionmaker = build_sessionmaker(engine)
+        http_client._client = http_client.build_http_client(
+            max_connections=args.concurrency, max_keepalive_connections=args.concurrency
+        )
+        parse_pool._pool = parse_pool.ParsePool(mode=args.pool, workers=args.workers)
+        bot = Bot(
+            token="123456:bench",
+            session=AiohttpSession(api=TelegramAPIServer.from_base(bot_api.base_url)),
+        )
+        sender = NotificationSender(bot, sessionmaker, rate_per_sec=args.notify_rate, poll_interval=0.2)
+        service = PriceCheckerService(sessionmaker, concurrency=args.concurrency, per_host_rps=0)
+
+        # Ürün başına kontrol süresi (hız limiti, çekme, parse ve karşılaştırma)
+        latencies: list[float] = []
+        check_product = service._check_product
+
+        async def timed_check(*a, **kw):
+            t0 = time.perf_counter()
+            try:
+                return await check_product(*a, **kw)
+            finally:
+                latencies.append(time.perf_counter() - t0)
+
+        service._check_product = timed_check
+
+        capture = LogCapture(ignore=("Trendyol fetch failed",))
+        print(f"{'cycle':>5} {'products/s':>11} {'items/s':>9} {'p50 ms':>8} {'p99 ms':>8} "
+              f"{'parsed':>8} {'alerts':>7} {'errors':>7} {'RSS MB':>8}")
+        queued = 0
+        with contextlib.redirect_stdout(io.StringIO()), capture:
+            sender.start()
+            for cycle in range(1, args.cycles + 1):
+                latencies.clear()
+                stats = await service.check_all_prices()
+                queued += stats.notified
+                elapsed = stats.elapsed
+                with contextlib.redirect_stdout(sys.__stdout__):
+                    print(
+                        f"{cycle:5} {stats.total / elapsed:11.1f} {stats.subscriptions / elapsed:9.1f} "
+                        f"{percentile(latencies, 50) * 1000:8.1f} {percentile(latencies, 99) * 1000:8.1f} "
+                        f"{stats.checked - stats.not_modified - stats.hash_hits - stats.fetch_errors:8} "
+                        f"{stats.notified:7} {stats.fetch_errors:7} {peak_rss_mb():8.0f}"
+                    )
+
+            # Kalan bildirimlerin gönderilmesini bekle
+            drain_deadline = time.monotonic() + args.drain_timeout
+            while outbox_counts(path).get("pending", 0) and time.monotonic() < drain_deadline:
+                await asyncio.sleep(0.2)
+            await sender.stop()
+
+        counts = outbox_counts(path)
+        await bot.session.close()
+        await http_client.close_http_client()
+        parse_pool.close_parse_pool()
+        await engine.dispose()
+    await trendyol.stop()
+    await bot_api.stop()
+
+    sent = bot_api.sent
+    span = sent[-1][2] - sent[0][2] if len(sent) > 1 else 0.0
+    duplicated = len(sent) - counts.get("sent", 0)
+    print(
+        f"\nnotifications: {queued} queued, {len(sent)} delivered"
+        f"{f' in {span:.1f}s ({len(sent) / span:.1f} msg/s)' if span else ''}, "
+        f"429s: {bot_api.too_many_requests}, outbox: {counts}"
+    )
+    print(
+        f"stub Trendyol: {trendyol.requests} requests, {trendyol.errors} errors, "
+        f"{trendyol.not_modified} not modified | peak RSS {peak_rss_mb():.0f} MB"
+    )
+    errors = capture.lines()
+    for line in errors[:5]:
+        print(f"  {line}")
+
+    ok = counts.get("pending", 0) == 0 and duplicated == 0 and len(sent) == queued and not errors
+    print("OK" if ok else "FAILED")
+    return 0 if ok else 1
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--items", type=int, default=2000, help="takip (TrackingItem) sayısı")
+    ap.add_argument("--subscribers", type=int, default=1, help="ürün başına takip eden sohbet")
+    ap.add_argument("--chats", type=int, default=500)
+    ap.add_argument("--threshold", type=float, default=5.0, help="takiplerin bildirim eşiği (%%)")
+    ap.add_argument("--cycles", type=int, default=3)
+    ap.add_argument("--concurrency", type=int, default=16)
+    ap.add_argument("--pool", default="thread", choices=parse_pool.POOL_MODES)
+    ap.add_argument("--workers", type=int, default=2, help="parse havuzu işçi sayısı")
+    ap.add_argument("--latency-ms", type=float, default=50.0, help="sahte sayfa gecikmesi")
+    ap.add_argument("--error-rate", type=float, default=0.0, help="503 dönen sayfa oranı")
+    ap.add_argument("--drift", type=float, default=0.1, help="istek başına fiyat oynama olasılığı")
+    ap.add_argument("--etag", action="store_true", help="sahte sunucu ETag / 304 desteklesin")
+    ap.add_argument("--notify-rate", type=float, default=25.0, help="göndericinin global hızı")
+    ap.add_argument("--tg-global", type=float, default=30.0, help="sahte Telegram'ın global limiti")
+    ap.add_argument("--flood-rate", type=float, default=0.0, help="sahte Telegram'ın rastgele 429 oranı")
+    ap.add_argument("--drain-timeout", type=float, default=120.0, help="turlardan sonra outbox bekleme süresi")
+    args = ap.parse_args(argv)
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,161 @@
+"""Çok işçili kontrol testi: aynı SQLite dosyasında N işçi süreci
+
+N ürün yazılır ve hepsinin vadesi geçmiş yapılır. Ardından W ayrı süreç
+check_due_prices'ı iş bitene kadar çağırır. Ağ sahtedir:
+ürün sayfaları MockTransport ile gecikmeli döner.
+
+Raporlanır:
+- işçi başına çekilen ürün sayısı
+- birden fazla kez çekilen ürünler (kiralar doğruysa 0)
+- outbox'a yazılan bildirimler
+- yeniden planlanmamış ya da kirası bırakılmamış ürünler
+
+--crash ile ilk işçi bir parti kiralayıp kontrol etmeden ölür. O ürünler
+kira süresi (--lease) dolunca diğer işçilere düşmelidir.
+
+Kullanım (repo kökünden):
+    python -m benchmarks.bench_lease_workers --products 2000 --workers 4
+    python -m benchmarks.bench_lease_workers --products 500 --workers 3 --crash --lease 3
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import io
+import multiprocessing as mp
+import os
+import re
+import sqlite3
+import sys
+import tempfile
+import time
+from collections import Counter
+
+from benchmarks.bench_active_iteration import create_schema, seed
+
+_PRODUCT_ID = re.compile(r"-p-(\d+)")
+
+
+async def _worker_main(path: str, index: int, args, results) -> None:
+    import httpx
+
+    from benchmarks.bench_cycle import LogCapture
+    from benchmarks.bench_parsers import synthetic_page
+    from src.price_tracker_bot.db.engine import build_engine, build_sessionmaker
+    from src.price_tracker_bot.services import http_client
+    from src.price_tracker_bot.services.price_checker import PriceCheckerService, claim_due_work
+
+    fetched: Counter[int] = Counter()
+    page = synthetic_page("campaign", True, filler_cards=5)
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        fetched[int(_PRODUCT_ID.search(str(request.url)).group(1))] += 1
+        await asyncio.sleep(args.latency_ms / 1000)
+        return httpx.Response(200, text=page)
+
+    engine = build_engine(f"sqlite+aiosqlite:///{path}")
+    sessionmaker = build_sessionmaker(engine)
+    http_client._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    worker_id = f"w{index}"
+
+    if args.crash and index == 0:
+        # Kiralayıp kontrol etmeden öl: kiralar süre dolunca başkasına geçmeli
+        work = await claim_due_work(sessionmaker, worker_id, args.batch, args.lease)
+        results.put({"worker": worker_id, "fetched": {}, "sent": 0, "crashed": len(work), "errors": []})
+        results.close()
+        results.join_thread()
+        os._exit(1)
+
+    service = PriceCheckerService(
+        sessionmaker, concurrency=args.concurrency, per_host_rps=0,
+        worker_id=worker_id, lease_seconds=args.lease,
+    )
+    # İş kalmadığında, çöken işçinin kiraları dolana kadar beklemeye devam et
+    idle_deadline = None
+    capture = LogCapture()
+    queued = 0
+    while True:
+        with contextlib.redirect_stdout(io.StringIO()), capture:
+            stats = await service.check_due_prices(limit=args.batch)
+        queued += stats.notified
+        if stats.total:
+            idle_deadline = None
+            continue
+        idle_deadline = idle_deadline or time.monotonic() + args.lease + 2
+        if time.monotonic() > idle_deadline:
+            break
+        await asyncio.sleep(0.2)
+
+    await http_client.close_http_client()
+    await engine.dispose()
+    results.put({"worker": worker_id, "fetched": dict(fetched), "sent": queued, "crashed": 0, "errors": capture.lines()})
+
+
+def _worker(path: str, index: int, args, results) -> None:
+    asyncio.run(_worker_main(path, index, args, results))
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--products", type=int, default=2000)
+    ap.add_argument("--workers", type=int, default=4)
+    ap.add_argument("--batch", type=int, default=50, help="işçinin tur başına kiraladığı ürün sayısı")
+    ap.add_argument("--concurrency", type=int, default=8)
+    ap.add_argument("--latency-ms", type=float, default=20.0, help="sahte sayfa gecikmesi")
+    ap.add_argument("--lease", type=float, default=30.0, help="kira süresi (sn)")
+    ap.add_argument("--crash", action="store_true", help="ilk işçi kiraladıktan sonra ölsün")
+    args = ap.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        asyncio.run(create_schema(path))
+        seed(path, args.products, url_bytes=80)
+        conn = sqlite3.connect(path)
+        conn.execute("UPDATE products SET next_check_at = '2000-01-01 00:00:00', last_price = 1000")
+        # Sahte sayfa 749,50 TL döner: her takip tam bir bildirim üretmeli
+        conn.execute("UPDATE tracking_items SET last_price = 1000, baseline_price = 1000")
+        conn.commit()
+        conn.close()
+
+        ctx = mp.get_context("spawn")
+        results = ctx.Queue()
+        t0 = time.perf_counter()
+        procs = [ctx.Process(target=_worker, args=(path, i, args, results)) for i in range(args.workers)]
+        for proc in procs:
+            proc.start()
+        reports = [results.get() for _ in procs]
+        for proc in procs:
+            proc.join()
+        elapsed = time.perf_counter() - t0
+
+        conn = sqlite3.connect(path)
+        unscheduled, = conn.execute(
+            "SELECT COUNT(*) FROM products WHERE next_check_at <= '2001-01-01' OR lease_owner IS NOT NULL"
+        ).fetchone()
+        outbox, = conn.execute("SELECT COUNT(*) FROM outbox_messages").fetchone()
+        conn.close()
+
+    total = Counter()
+    for report in sorted(reports, key=lambda r: r["worker"]):
+        total.update(report["fetched"])
+        note = f" (crashed holding {report['crashed']} leases)" if report["crashed"] else ""
+        print(f"{report['worker']:>4}: {sum(report['fetched'].values()):6} fetched, {report['sent']:6} alerts queued{note}")
+        for line in report["errors"][:3]:
+            print(f"      {line}")
+
+    duplicates = sum(1 for count in total.values() if count > 1)
+    notified = sum(r["sent"] for r in reports)
+    print(
+        f"\n{args.products} products, {args.workers} workers in {elapsed:.1f}s | "
+        f"fetched {len(total)} distinct / {sum(total.values())} total, "
+        f"duplicates: {duplicates}, alerts queued: {notified} (outbox rows: {outbox}), "
+        f"unscheduled: {unscheduled}"
+    )
+    ok = duplicates == 0 and len(total) == args.products and unscheduled == 0 and notified == outbox == args.products
+    print("OK" if ok else "FAILED")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
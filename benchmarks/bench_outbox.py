@@ -0,0 +1,156 @@
+"""Bildirim outbox'ı: Telegram limitlerine uyan gönderici testi
+
+Bir flash sale'i taklit eder: outbox'a C sohbete dağılmış N mesaj yazılır.
+Mesajlar sahte bir bota gönderilir. Sahte bot Telegram limitlerini uygular:
+global `--tg-global` mesaj/sn ve sohbet başına 1 mesaj/sn. Limit
+aşılırsa TelegramRetryAfter fırlatır, ayrıca `--flaky` oranında ağ hatası
+verir.
+
+Raporlanır:
+- gönderim süresi ve mesaj/sn
+- alınan retry_after sayısı
+- teslim edilmeyen ya da iki kez teslim edilen mesajlar
+
+--restart ile gönderici yarıda durdurulur ve yenisi başlatılır;
+hiçbir mesaj kaybolmamalıdır.
+
+Kullanım (repo kökünden):
+    python -m benchmarks.bench_outbox --messages 600 --chats 200
+    python -m benchmarks.bench_outbox --messages 600 --chats 20 --rate 40 --restart
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from collections import Counter, deque
+
+from aiogram.exceptions import TelegramNetworkError, TelegramRetryAfter
+from aiogram.methods import SendMessage
+
+from benchmarks.bench_active_iteration import create_schema
+from src.price_tracker_bot.db.engine import build_engine, build_sessionmaker
+from src.price_tracker_bot.services.notification_sender import NotificationSender
+
+
+class LimitedBot:
+    """Telegram'ın global ve sohbet başı limitlerini uygulayan sahte bot"""
+
+    def __init__(self, global_rate: float, flaky: float, latency: float):
+        self.global_rate = global_rate
+        self.flaky = flaky
+        self.latency = latency
+        self.delivered: Counter[str] = Counter()
+        self.retry_afters = 0
+        self._recent: deque[float] = deque()
+        self._last_by_chat: dict[int, float] = {}
+
+    async def send_message(self, chat_id: int, text: str, **kwargs):
+        await asyncio.sleep(self.latency)
+        now = time.monotonic()
+        while self._recent and now - self._recent[0] > 1.0:
+            self._recent.popleft()
+        method = SendMessage(chat_id=chat_id, text=text)
+        if len(self._recent) >= self.global_rate or now - self._last_by_chat.get(chat_id, -10) < 0.95:
+            self.retry_afters += 1
+            raise TelegramRetryAfter(method=method, message="Flood control exceeded", retry_after=1)
+        if random.random() < self.flaky:
+            raise TelegramNetworkError(method=method, message="Connection reset")
+        self._recent.append(now)
+        self._last_by_chat[chat_id] = now
+        self.delivered[text] += 1
+
+
+def seed_outbox(path: str, messages: int, chats: int) -> None:
+    conn = sqlite3.connect(path)
+    conn.executemany(
+        "INSERT INTO outbox_messages (chat_id, text, status, attempts, next_attempt_at) "
+        "VALUES (?, ?, 'pending', 0, '2000-01-01 00:00:00')",
+        ((i % chats, f"alert {i}") for i in range(messages)),
+    )
+    conn.commit()
+    conn.close()
+
+
+def outbox_counts(path: str) -> dict[str, int]:
+    conn = sqlite3.connect(path)
+    rows = dict(conn.execute("SELECT status, COUNT(*) FROM outbox_messages GROUP BY status").fetchall())
+    conn.close()
+    return rows
+
+
+async def drain(path: str, bot: LimitedBot, args, stop_after: float | None = None) -> None:
+    engine = build_engine(f"sqlite+aiosqlite:///{path}")
+    sessionmaker = build_sessionmaker(engine)
+    sender = NotificationSender(
+        bot, sessionmaker, rate_per_sec=args.rate, concurrency=args.concurrency,
+        batch_size=args.batch, poll_interval=0.2, lease_seconds=args.lease,
+    )
+    with contextlib.redirect_stdout(io.StringIO()):
+        sender.start()
+        t0 = time.monotonic()
+        while True:
+            await asyncio.sleep(0.2)
+            if stop_after is not None and time.monotonic() - t0 > stop_after:
+                break
+            if outbox_counts(path).get("pending", 0) == 0:
+                break
+        await sender.stop()
+    await engine.dispose()
+
+
+async def run(args) -> int:
+    random.seed(1)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        await create_schema(path)
+        seed_outbox(path, args.messages, args.chats)
+
+        bot = LimitedBot(args.tg_global, args.flaky, args.latency_ms / 1000)
+        t0 = time.perf_counter()
+        if args.restart:
+            # Yarıda kes: gönderimdeki parti kirada kalır, kira dolunca yeni süreç alır
+            await drain(path, bot, args, stop_after=2.0)
+            print(f"restart after 2s: {outbox_counts(path)}")
+        await drain(path, bot, args)
+        elapsed = time.perf_counter() - t0
+        counts = outbox_counts(path)
+
+    expected = {f"alert {i}" for i in range(args.messages)}
+    missing = len(expected - set(bot.delivered))
+    duplicated = sum(1 for count in bot.delivered.values() if count > 1)
+    print(
+        f"{args.messages} messages / {args.chats} chats in {elapsed:.1f}s "
+        f"({sum(bot.delivered.values()) / elapsed:.1f} msg/s) | retry_after: {bot.retry_afters}, "
+        f"missing: {missing}, duplicated: {duplicated}, outbox: {counts}"
+    )
+    ok = missing == 0 and counts.get("pending", 0) == 0
+    print("OK" if ok else "FAILED")
+    return 0 if ok else 1
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--messages", type=int, default=600)
+    ap.add_argument("--chats", type=int, default=200)
+    ap.add_argument("--rate", type=float, default=25.0, help="göndericinin global hızı (NOTIFY_RATE_PER_SEC)")
+    ap.add_argument("--concurrency", type=int, default=8)
+    ap.add_argument("--batch", type=int, default=100)
+    ap.add_argument("--lease", type=float, default=3.0)
+    ap.add_argument("--tg-global", type=float, default=30.0, help="sahte Telegram'ın global limiti")
+    ap.add_argument("--flaky", type=float, default=0.02, help="ağ hatası oranı")
+    ap.add_argument("--latency-ms", type=float, default=40.0)
+    ap.add_argument("--restart", action="store_true", help="göndericiyi yarıda durdurup yeniden başlat")
+    args = ap.parse_args(argv)
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,165 @@
+"""Kontrol turu sırasında bot güncellemelerinin gecikmesi: parse havuzu ile / olmadan
+
+SQLite'a N ürün yazılır ve tam bir kontrol turu (check_all_prices)
+çalıştırılır. Ağ sahtedir: MockTransport büyük sentetik ürün sayfaları
+döner. Tur sürerken aiogram Dispatcher'a her `--interval-ms`'de bir /ping
+güncellemesi beslenir. Her güncelleme için planlanan an ile handler'ın
+bitişi arasındaki süre ölçülür.
+
+Havuz modları (PARSE_POOL):
+  inline   parse event loop üzerinde (eski davranış)
+  thread   ThreadPoolExecutor
+  process  ProcessPoolExecutor
+
+Kullanım (repo kökünden):
+    python -m benchmarks.bench_parse_pool
+    python -m benchmarks.bench_parse_pool --products 300 --modes inline,process --workers 2
+    python -m benchmarks.bench_parse_pool --dom-only   # gömülü JSON yok, her sayfa DOM parse
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import httpx
+from aiogram import Bot, Dispatcher
+from aiogram.filters import Command
+from aiogram.types import Chat, Message, Update, User
+
+from benchmarks.bench_active_iteration import create_schema, seed
+from benchmarks.bench_parsers import synthetic_page
+from src.price_tracker_bot.db.engine import build_engine, build_sessionmaker
+from src.price_tracker_bot.services import http_client, parse_pool
+from src.price_tracker_bot.services.price_checker import PriceCheckerService
+
+
+def build_ping_dispatcher() -> Dispatcher:
+    dp = Dispatcher()
+
+    @dp.message(Command("ping"))
+    async def ping(message: Message):
+        return "pong"
+
+    return dp
+
+
+def ping_update(update_id: int) -> Update:
+    user = User(id=1, is_bot=False, first_name="bench")
+    return Update(
+        update_id=update_id,
+        message=Message(
+            message_id=update_id,
+            date=datetime.now(),
+            chat=Chat(id=1, type="private"),
+            from_user=user,
+            text="/ping",
+        ),
+    )
+
+
+def percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def run_mode(path: str, mode: str, args, pages: list[str]) -> dict:
+    conn = sqlite3.connect(path)
+    # Her mod sayfaları baştan parse etsin (hash isabeti olmasın)
+    conn.execute("UPDATE products SET content_hash = NULL, etag = NULL, last_modified = NULL")
+    conn.commit()
+    conn.close()
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, text=pages[hash(str(request.url)) % len(pages)])
+
+    http_client._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    pool = parse_pool._pool = parse_pool.ParsePool(mode=mode, workers=args.workers)
+    if mode == "process":
+        # İşçi süreçlerinin açılışı tura yazılmasın
+        await asyncio.gather(*(pool.analyze(pages[0], "https://x/-p-1", "lxml", True) for _ in range(args.workers)))
+
+    engine = build_engine(f"sqlite+aiosqlite:///{path}")
+    sessionmaker = build_sessionmaker(engine)
+    checker = PriceCheckerService(sessionmaker, concurrency=args.concurrency, per_host_rps=0)
+
+    bot = Bot(token="42:bench")
+    dp = build_ping_dispatcher()
+    latencies: list[float] = []
+    done = asyncio.Event()
+
+    async def feed_updates():
+        update_id = 0
+        interval = args.interval_ms / 1000
+        next_at = time.perf_counter()
+        while not done.is_set():
+            update_id += 1
+            await dp.feed_update(bot, ping_update(update_id))
+            latencies.append((time.perf_counter() - next_at) * 1000)
+            next_at += interval
+            await asyncio.sleep(max(0.0, next_at - time.perf_counter()))
+
+    feeder = asyncio.create_task(feed_updates())
+    t0 = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        stats = await checker.check_all_prices()
+    elapsed = time.perf_counter() - t0
+    done.set()
+    await feeder
+
+    pool.close()
+    parse_pool._pool = None
+    await http_client.close_http_client()
+    await bot.session.close()
+    await engine.dispose()
+    return {
+        "checked": stats.checked,
+        "elapsed": elapsed,
+        "updates": len(latencies),
+        "p50": statistics.median(latencies),
+        "p95": percentile(latencies, 95),
+        "p99": percentile(latencies, 99),
+        "max": max(latencies),
+    }
+
+
+async def run(args) -> None:
+    pages = [synthetic_page(layout, with_state=not args.dom_only and i % 2 == 0)
+             for i, layout in enumerate(("plus-price", "campaign", "lowest-price", "campaign"))]
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        await create_schema(path)
+        seed(path, args.products, url_bytes=80)
+        print(f"{args.products} products, concurrency {args.concurrency}, "
+              f"{args.workers} pool workers, update every {args.interval_ms:g} ms")
+        print(f"{'mode':8} {'cycle s':>8} {'updates':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+        for mode in args.modes.split(","):
+            r = await run_mode(path, mode, args, pages)
+            assert r["checked"] == args.products, r
+            print(f"{mode:8} {r['elapsed']:8.2f} {r['updates']:8} {r['p50']:8.1f} "
+                  f"{r['p95']:8.1f} {r['p99']:8.1f} {r['max']:8.1f}")
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--products", type=int, default=200)
+    ap.add_argument("--concurrency", type=int, default=8)
+    ap.add_argument("--workers", type=int, default=2, help="parse havuzu işçi sayısı")
+    ap.add_argument("--modes", default="inline,thread,process")
+    ap.add_argument("--interval-ms", type=float, default=20.0, help="güncellemeler arası süre")
+    ap.add_argument("--dom-only", action="store_true", help="sayfalarda gömülü JSON olmasın")
+    args = ap.parse_args(argv)
+    asyncio.run(run(args))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,159 @@
+"""Kayıtlı Trendyol sayfaları: parser doğruluk ve hız testi
+
+benchmarks/fixtures/trendyol/ altındaki sayfalar, kodun tanıdığı her fiyat
+yerleşimini içerir:
+- plus-price, kampanya ve lowest-price
+- normal-price'ın iki biçimi
+- eski prc-dsc / prc-slg
+- gömülü state
+- stokta olmayan ürün
+
+Her sayfa servisin kullandığı yoldan (`analyze_page`) her backend ile parse
+edilir. Sonuç expected.json'daki fiyat, başlık ve görselle birebir
+karşılaştırılır. Ardından sayfa başına parse süresi ve tek
+çekirdekte sayfa/sn raporlanır. `--processes P` verilirse P süreçte
+toplam ve çekirdek başına sayfa/sn de ölçülür. Ağ erişimi gerekmez.
+
+Bir sayfada bile uyuşmazlık varsa çıkış kodu 1'dir.
+
+Kullanım (repo kökünden):
+    python -m benchmarks.bench_parser_corpus
+    python -m benchmarks.bench_parser_corpus --backends lxml --repeat 100 --processes 4
+    python -m benchmarks.bench_parser_corpus --record   # expected.json'u yeniden yaz
+
+Yeni yerleşim eklemek için sayfayı fixtures/trendyol/ altına kaydedin,
+sonucu kontrol edip `--record` ile beklenen değerleri güncelleyin.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from benchmarks.bench_parsers import same_result
+from src.price_tracker_bot.services.extractors import ProductInfo
+from src.price_tracker_bot.services.parse_pool import analyze_page
+
+FIXTURES = Path(__file__).parent / "fixtures" / "trendyol"
+EXPECTED = FIXTURES / "expected.json"
+URL = "https://www.trendyol.com/marka/ornek-urun-p-1"
+
+
+def parse_spec(spec: str) -> tuple[str, bool]:
+    """"lxml" veya "json+lxml" -> (backend, embedded_state)"""
+    spec = spec.strip()
+    if spec.startswith("json+"):
+        return spec[5:], True
+    return spec, False
+
+
+def load_corpus() -> dict[str, str]:
+    return {p.name: p.read_text(encoding="utf-8") for p in sorted(FIXTURES.glob("*.html"))}
+
+
+def _parse_all(pages: list[str], backend: str, embedded_state: bool, repeat: int) -> int:
+    """İşçi süreçte tüm sayfaları `repeat` kez parse et"""
+    for _ in range(repeat):
+        for html in pages:
+            analyze_page(html, URL, backend, embedded_state)
+    return len(pages) * repeat
+
+
+def throughput(pages: list[str], spec: str, processes: int, repeat: int) -> float:
+    """`processes` süreçte toplam sayfa/sn (havuz açılışı ölçüme dahil değil)"""
+    backend, embedded_state = parse_spec(spec)
+    with ProcessPoolExecutor(processes) as executor:
+        # Isınma: süreçler başlasın, import ve extractor oluşturma bitsin
+        list(executor.map(_parse_all, [pages] * processes, [backend] * processes,
+                          [embedded_state] * processes, [1] * processes))
+        t0 = time.perf_counter()
+        done = sum(executor.map(_parse_all, [pages] * processes, [backend] * processes,
+                                [embedded_state] * processes, [repeat] * processes))
+        return done / (time.perf_counter() - t0)
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--repeat", type=int, default=20, help="sayfa başına tekrar sayısı")
+    ap.add_argument("--backends", default="bs4,lxml,json+lxml", help="virgülle ayrılmış backend listesi")
+    ap.add_argument("--processes", type=int, default=0, help="çok süreçli verim testi için süreç sayısı")
+    ap.add_argument("--record", action="store_true", help="ilk backend'in sonuçlarını expected.json'a yaz")
+    args = ap.parse_args(argv)
+
+    pages = load_corpus()
+    specs = [s.strip() for s in args.backends.split(",")]
+    expected = json.loads(EXPECTED.read_text(encoding="utf-8")) if EXPECTED.exists() else {}
+
+    total_kb = sum(len(html) for html in pages.values()) / 1024
+    print(f"{len(pages)} fixture pages, {total_kb:.0f} KB total, {args.repeat} repeats\n")
+
+    ok = True
+    recorded: dict[str, dict] = {}
+    timings: dict[str, list[float]] = {spec: [] for spec in specs}
+
+    for page_name, html in pages.items():
+        want = expected.get(page_name)
+        reference = ProductInfo(URL, want["title"], want["price"], want["image_url"]) if want else None
+        failures = []
+        for spec in specs:
+            backend, embedded_state = parse_spec(spec)
+            _, info = analyze_page(html, URL, backend, embedded_state)
+            matches = reference is not None and same_result(info, reference)
+            if spec == specs[0]:
+                recorded[page_name] = {
+                    "layout": (want or {}).get("layout", ""),
+                    "title": info.title,
+                    "price": info.price,
+                    "image_url": info.image_url,
+                }
+            if not matches:
+                failures.append((spec, info))
+            for _ in range(args.repeat):
+                t0 = time.perf_counter()
+                analyze_page(html, URL, backend, embedded_state)
+                timings[spec].append(time.perf_counter() - t0)
+
+        if args.record:
+            print(f"📝 {page_name:30} price={recorded[page_name]['price']} title={recorded[page_name]['title']!r}")
+            continue
+        ok &= not failures
+        mark = "✅" if not failures else "❌"
+        shown = want or {"price": None, "title": None}
+        print(f"{mark} {page_name:30} price={shown['price']} title={shown['title']!r}")
+        if reference is None:
+            print("     expected.json'da kayıt yok (--record ile ekleyin)")
+        for spec, info in failures if reference is not None else ():
+            print(f"     {spec}: price={info.price} title={info.title!r} image={info.image_url}")
+
+    if args.record:
+        EXPECTED.write_text(json.dumps(recorded, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+        print(f"\nWrote {EXPECTED}")
+
+    print(f"\n{'backend':10} {'mean ms/page':>13} {'p50':>8} {'p95':>8} {'pages/s':>9}")
+    for spec, samples in timings.items():
+        samples.sort()
+        mean = statistics.fmean(samples) * 1000
+        p50 = samples[len(samples) // 2] * 1000
+        p95 = samples[int(len(samples) * 0.95) - 1] * 1000
+        print(f"{spec:10} {mean:13.2f} {p50:8.2f} {p95:8.2f} {1000 / mean:9.1f}")
+
+    if args.processes > 0:
+        cpus = os.cpu_count() or 1
+        print(f"\n{args.processes} processes ({cpus} CPUs)")
+        print(f"{'backend':10} {'pages/s':>9} {'per core':>9}")
+        for spec in specs:
+            rate = throughput(list(pages.values()), spec, args.processes, args.repeat)
+            print(f"{spec:10} {rate:9.1f} {rate / min(args.processes, cpus):9.1f}")
+
+    if not args.record:
+        print("\nOK" if ok else "\nFAILED")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
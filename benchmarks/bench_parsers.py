@@ -0,0 +1,175 @@
+"""HTML parser backend benchmark'ı
+
+Her backend'in aynı sayfalarda aynı ProductInfo'yu ürettiğini doğrular ve
+sayfa başına parse süresini karşılaştırır. Ağ erişimi gerekmez.
+
+Kullanım (repo kökünden):
+    python -m benchmarks.bench_parsers                  # sentetik sayfalar
+    python -m benchmarks.bench_parsers sayfa1.html ...  # kayıtlı sayfalar
+    python -m benchmarks.bench_parsers --repeat 50 --backends bs4,lxml,json+lxml
+
+"json+<backend>" önce gömülü state JSON'unu dener, sonra <backend>'e düşer.
+Sentetik sayfaların yarısı gömülü state içerir, yarısı içermez.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+from src.price_tracker_bot.services.extractors import get_extractor
+
+# Trendyol ürün sayfalarındaki fiyat alanı biçimleri
+# (HTML parçası, sayfadaki en düşük fiyat)
+_LAYOUTS = {
+    "plus-price": ("""
+        <div class="ty-plus-price-content">
+          <span class="ty-plus-price-discounted-price">1.149,90 TL</span>
+          <div class="ty-plus-price-original-price">1.299,00 TL</div>
+        </div>""", 1149.90),
+    "campaign": ("""
+        <div class="campaign-price-content">
+          <p class="old-price">899,99 TL</p><p class="new-price">749,50 TL</p>
+        </div>""", 749.50),
+    "lowest-price": ("""
+        <button data-testid="lowest-price"><div class="price-view">
+          <span class="original">420 TL</span><span class="discounted">389,90 TL</span>
+        </div></button>""", 389.90),
+    "normal-price-container": ("""
+        <div data-testid="normal-price"><div class="price-container">
+          <span class="discounted">2.499,00 TL</span></div></div>""", 2499.00),
+    "normal-price-direct": ("""
+        <div data-testid="normal-price"><span class="discounted">59,99 TL</span></div>""", 59.99),
+    "legacy": ("""
+        <div class="pr-bx-w"><span class="prc-org">120 TL</span>
+          <span class="prc-dsc">99,90 TL</span></div>""", 99.90),
+}
+
+
+def embedded_state(price: float) -> str:
+    state = {
+        "product": {
+            "id": 1,
+            "name": "Örnek Ürün 128 GB",
+            "brand": {"id": 7, "name": "Marka"},
+            "images": ["/ty100/product/main.jpg", "/ty100/product/2.jpg"],
+            "price": {
+                "sellingPrice": {"value": round(price * 1.2, 2), "text": "..."},
+                "discountedPrice": {"value": price, "text": "..."},
+                "originalPrice": {"value": round(price * 1.5, 2), "text": "..."},
+            },
+            "variants": [{"attributeValue": str(i), "stock": i} for i in range(50)],
+        }
+    }
+    return (
+        "<script>window.__PRODUCT_DETAIL_APP_INITIAL_STATE__="
+        + json.dumps(state, ensure_ascii=False)
+        + ";window.TYPageName='product_detail';</script>"
+    )
+
+
+def synthetic_page(layout: str, with_state: bool = False, filler_cards: int = 400) -> str:
+    """Gerçek ürün sayfası boyutlarına yakın (yüzlerce KB) sentetik sayfa üret"""
+    fragment, price = _LAYOUTS[layout]
+    state = embedded_state(price) if with_state else ""
+    scripts = "".join(
+        f'<script>window.__chunk_{i}__ = "{"x" * 4000}";</script>' for i in range(40)
+    )
+    nav = "".join(f'<li><a href="/kategori-{i}">Kategori {i}</a></li>' for i in range(300))
+    cards = "".join(
+        f'<div class="p-card-wrppr"><a href="/marka/urun-p-{i}">'
+        f'<img class="p-card-img" src="https://cdn.dsmcdn.com/ty{i}/card.jpg">'
+        f'<span class="prdct-desc-cntnr-name">Öneri ürün {i}</span>'
+        f'<div class="prc-box-dscntd">{100 + i},99 TL</div></a></div>'
+        for i in range(filler_cards)
+    )
+    return f"""<!DOCTYPE html><html lang="tr"><head><meta charset="utf-8">
+<title>Ürün</title>{scripts}</head><body>
+<header><ul>{nav}</ul></header>
+<main><div class="product-container">
+  <div class="gallery"><img data-testid="image" src="//cdn.dsmcdn.com/ty100/product/main.jpg"></div>
+  <h1 class="product-title variant-pdp"><a>Marka</a> <strong>Örnek Ürün 128 GB</strong></h1>
+  {fragment}
+</div>
+<section class="recommendations">{cards}</section></main>{state}
+<footer>{"<p>footer</p>" * 200}</footer></body></html>"""
+
+
+def load_pages(paths: list[str]) -> dict[str, str]:
+    if paths:
+        return {Path(p).name: Path(p).read_text(encoding="utf-8") for p in paths}
+    pages = {}
+    for i, name in enumerate(_LAYOUTS):
+        with_state = i % 2 == 0
+        pages[name + ("+state" if with_state else "")] = synthetic_page(name, with_state)
+    return pages
+
+
+def build_backend(spec: str):
+    """"lxml", "bs4" veya "json+lxml" gibi bir tanımdan backend oluştur"""
+    spec = spec.strip()
+    if spec.startswith("json+"):
+        return get_extractor(spec[5:], embedded_state=True)
+    return get_extractor(spec)
+
+
+def same_result(a, b) -> bool:
+    """Fiyat, görsel ve başlık birebir eşleşmeli"""
+    return (a.price, a.image_url, a.title) == (b.price, b.image_url, b.title)
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("pages", nargs="*", help="HTML dosyaları (boşsa sentetik sayfalar)")
+    ap.add_argument("--repeat", type=int, default=20, help="sayfa başına tekrar sayısı")
+    ap.add_argument("--backends", default="bs4,lxml,json+lxml", help="virgülle ayrılmış backend listesi")
+    args = ap.parse_args(argv)
+
+    pages = load_pages(args.pages)
+    backends = [build_backend(spec) for spec in args.backends.split(",")]
+    url = "https://www.trendyol.com/marka/ornek-urun-p-1"
+
+    total_kb = sum(len(html) for html in pages.values()) / 1024
+    print(f"{len(pages)} pages, {total_kb:.0f} KB total, {args.repeat} repeats\n")
+
+    ok = True
+    results: dict[str, dict[str, object]] = {}
+    timings: dict[str, list[float]] = {b.name: [] for b in backends}
+
+    for page_name, html in pages.items():
+        for backend in backends:
+            info = backend.extract(html, url)
+            results.setdefault(page_name, {})[backend.name] = info
+            for _ in range(args.repeat):
+                t0 = time.perf_counter()
+                backend.extract(html, url)
+                timings[backend.name].append(time.perf_counter() - t0)
+
+        # Tüm backend'ler ilkiyle aynı sonucu vermeli
+        infos = list(results[page_name].values())
+        same = all(same_result(info, infos[0]) for info in infos[1:])
+        ok &= same
+        mark = "✅" if same else "❌"
+        print(f"{mark} {page_name:34} price={infos[0].price} title={infos[0].title!r}")
+        if not same:
+            for name, info in results[page_name].items():
+                print(f"     {name}: {info}")
+
+    print(f"\n{'backend':10} {'mean ms/page':>13} {'p50':>8} {'p95':>8} {'pages/s':>9}")
+    baseline = None
+    for name, samples in timings.items():
+        samples.sort()
+        mean = statistics.fmean(samples) * 1000
+        p50 = samples[len(samples) // 2] * 1000
+        p95 = samples[int(len(samples) * 0.95) - 1] * 1000
+        baseline = baseline or mean
+        print(f"{name:10} {mean:13.2f} {p50:8.2f} {p95:8.2f} {1000 / mean:9.1f}  (x{baseline / mean:.1f})")
+
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
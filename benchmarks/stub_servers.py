@@ -0,0 +1,268 @@
+"""Yerel sahte Trendyol ve Telegram Bot API sunucuları (aiohttp)
+
+StubTrendyol, `-p-<id>` içeren her yolda fixtures/trendyol/ altındaki
+kayıtlı sayfalardan birini döner; hangi sayfanın döneceği ürün id'sinden
+seçilir. Ayarlanabilenler:
+- gecikme (±%50 sapmalı)
+- hata oranı (503)
+- fiyat oynaması: her istekte `drift` olasılıkla ürünün fiyatı %15'e kadar
+  düşer ya da %5'e kadar artar, sayfanın kendi fiyatını geçmez
+- `etag=True`: ETag gönderilir, eşleşen If-None-Match'e 304 dönülür
+
+StubBotApi, `/bot<token>/<method>` isteklerini kabul eder ve sendMessage
+çağrılarını kaydeder. Gerçek Telegram gibi global limit (`global_rate`
+mesaj/sn) ve sohbet başına 1 mesaj/sn uygular, aşılırsa 429 +
+retry_after döner. `flood_rate` oranında ayrıca rastgele 429 verir.
+Bot bu sunucuya `TelegramAPIServer.from_base(stub.base_url)` ile bağlanır.
+
+Tek başına da çalıştırılabilir (Ctrl-C ile durur):
+    python -m benchmarks.stub_servers --trendyol-port 8081 --bot-port 8082 --latency-ms 80
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import re
+import sys
+import time
+from collections import deque
+from dataclasses import dataclass
+from pathlib import Path
+
+from aiohttp import web
+
+FIXTURES = Path(__file__).parent / "fixtures" / "trendyol"
+_PRODUCT_ID = re.compile(r"-p-(\d+)")
+_PRICE_MARK = "\x00price\x00"
+_STATE_MARK = "\x00state-price\x00"
+
+
+def tr_price(price: float, decimals: bool = True) -> str:
+    """1149.9 -> "1.149,90" (decimals=False: 1049 -> "1.049")"""
+    text = f"{price:,.2f}" if decimals else f"{round(price):,}"
+    return text.replace(",", "\x00").replace(".", ",").replace("\x00", ".")
+
+
+@dataclass
+class PageTemplate:
+    """Fiyatı değiştirilebilir kayıtlı sayfa"""
+    name: str
+    html: str
+    price: float | None
+    decimals: bool = True
+
+    def render(self, price: float | None) -> str:
+        if self.price is None:
+            return self.html
+        return (
+            self.html.replace(_PRICE_MARK, tr_price(price, self.decimals))
+            .replace(_STATE_MARK, str(price))
+        )
+
+
+def load_templates() -> list[PageTemplate]:
+    """Kayıtlı sayfaları yükle, expected.json'daki fiyatın yerine işaret koy"""
+    expected = json.loads((FIXTURES / "expected.json").read_text(encoding="utf-8"))
+    templates = []
+    for name, want in sorted(expected.items()):
+        html = (FIXTURES / name).read_text(encoding="utf-8")
+        price = want["price"]
+        decimals = True
+        if price is not None:
+            text = tr_price(price)
+            if text not in html:
+                decimals = False
+                text = tr_price(price, decimals=False)
+            html = html.replace(f"{text} TL", f"{_PRICE_MARK} TL")
+            # Gömülü state'teki indirimli fiyat da aynı değeri taşır
+            html = html.replace(f'"value": {float(price)}', f'"value": {_STATE_MARK}')
+        templates.append(PageTemplate(name, html, price, decimals))
+    return templates
+
+
+class StubTrendyol:
+    """Kayıtlı ürün sayfalarını gecikme, hata ve fiyat oynamasıyla sunar"""
+
+    def __init__(
+        self,
+        latency_ms: float = 50.0,
+        error_rate: float = 0.0,
+        drift: float = 0.0,
+        etag: bool = False,
+        seed: int = 1,
+    ):
+        self.latency = latency_ms / 1000
+        self.error_rate = error_rate
+        self.drift = drift
+        self.etag = etag
+        self.templates = load_templates()
+        self.requests = 0
+        self.errors = 0
+        self.not_modified = 0
+        # Ürün id'si -> (güncel fiyat, sürüm)
+        self._prices: dict[int, tuple[float | None, int]] = {}
+        self._random = random.Random(seed)
+        self._runner: web.AppRunner | None = None
+        self.base_url = ""
+
+    def template_for(self, product_id: int) -> PageTemplate:
+        return self.templates[product_id % len(self.templates)]
+
+    def price_for(self, product_id: int) -> float | None:
+        """Ürünün başlangıç fiyatı (tohumlama için)"""
+        return self.template_for(product_id).price
+
+    async def handle(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        match = _PRODUCT_ID.search(request.path)
+        if match is None:
+            return web.Response(status=404, text="not found")
+        await asyncio.sleep(self.latency * self._random.uniform(0.5, 1.5))
+        if self._random.random() < self.error_rate:
+            self.errors += 1
+            return web.Response(status=503, text="service unavailable")
+
+        product_id = int(match.group(1))
+        template = self.template_for(product_id)
+        price, version = self._prices.get(product_id, (template.price, 0))
+        if price is not None and self._random.random() < self.drift:
+            price = min(template.price, price * self._random.uniform(0.85, 1.05))
+            price = round(price, 2) if template.decimals else float(round(price))
+            version += 1
+        self._prices[product_id] = (price, version)
+
+        headers = {"Content-Type": "text/html; charset=utf-8"}
+        if self.etag:
+            tag = f'"{product_id}-{version}"'
+            headers["ETag"] = tag
+            if request.headers.get("If-None-Match") == tag:
+                self.not_modified += 1
+                return web.Response(status=304, headers=headers)
+        return web.Response(text=template.render(price), headers=headers)
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        app = web.Application()
+        app.router.add_get("/{tail:.*}", self.handle)
+        self._runner = await _serve(app, host, port)
+        self.base_url = _base_url(self._runner)
+        return self.base_url
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+
+class StubBotApi:
+    """sendMessage çağrılarını kaydeden, Telegram limitlerini uygulayan sahte Bot API"""
+
+    def __init__(self, global_rate: float = 30.0, per_chat_interval: float = 1.0,
+                 flood_rate: float = 0.0, latency_ms: float = 20.0, seed: int = 1):
+        self.global_rate = global_rate
+        self.per_chat_interval = per_chat_interval
+        self.flood_rate = flood_rate
+        self.latency = latency_ms / 1000
+        # (chat_id, metin, gönderim zamanı)
+        self.sent: list[tuple[int, str, float]] = []
+        self.too_many_requests = 0
+        self._recent: deque[float] = deque()
+        self._last_by_chat: dict[int, float] = {}
+        self._random = random.Random(seed)
+        self._runner: web.AppRunner | None = None
+        self.base_url = ""
+
+    async def handle(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        if request.content_type == "application/json":
+            data = await request.json()
+        else:
+            data = dict(await request.post())
+        await asyncio.sleep(self.latency)
+
+        if method.lower() != "sendmessage":
+            return web.json_response({"ok": True, "result": True})
+
+        chat_id = int(data["chat_id"])
+        now = time.monotonic()
+        while self._recent and now - self._recent[0] > 1.0:
+            self._recent.popleft()
+        if (
+            len(self._recent) >= self.global_rate
+            or now - self._last_by_chat.get(chat_id, -1e9) < self.per_chat_interval * 0.95
+            or self._random.random() < self.flood_rate
+        ):
+            self.too_many_requests += 1
+            return web.json_response(
+                {"ok": False, "error_code": 429, "description": "Too Many Requests: retry after 1",
+                 "parameters": {"retry_after": 1}},
+                status=429,
+            )
+
+        self._recent.append(now)
+        self._last_by_chat[chat_id] = now
+        self.sent.append((chat_id, data.get("text", ""), now))
+        return web.json_response({"ok": True, "result": {
+            "message_id": len(self.sent),
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "text": data.get("text", ""),
+        }})
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        app = web.Application()
+        app.router.add_post("/bot{token}/{method}", self.handle)
+        self._runner = await _serve(app, host, port)
+        self.base_url = _base_url(self._runner)
+        return self.base_url
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+
+async def _serve(app: web.Application, host: str, port: int) -> web.AppRunner:
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner
+
+
+def _base_url(runner: web.AppRunner) -> str:
+    host, port = runner.addresses[0][:2]
+    return f"http://{host}:{port}"
+
+
+async def serve_forever(args) -> None:
+    trendyol = StubTrendyol(args.latency_ms, args.error_rate, args.drift, args.etag)
+    bot_api = StubBotApi(flood_rate=args.flood_rate)
+    print(f"Trendyol stub: {await trendyol.start(port=args.trendyol_port)}/marka/urun-p-1")
+    print(f"Bot API stub:  {await bot_api.start(port=args.bot_port)}/bot<token>/sendMessage")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await trendyol.stop()
+        await bot_api.stop()
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--trendyol-port", type=int, default=8081)
+    ap.add_argument("--bot-port", type=int, default=8082)
+    ap.add_argument("--latency-ms", type=float, default=50.0)
+    ap.add_argument("--error-rate", type=float, default=0.0)
+    ap.add_argument("--drift", type=float, default=0.1)
+    ap.add_argument("--etag", action="store_true")
+    ap.add_argument("--flood-rate", type=float, default=0.0, help="rastgele 429 oranı")
+    args = ap.parse_args(argv)
+    try:
+        asyncio.run(serve_forever(args))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
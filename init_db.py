@@ -4,6 +4,7 @@ from src.price_tracker_bot.config import load_settings
 from src.price_tracker_bot.db.engine import build_engine
 from src.price_tracker_bot.db.base import Base
 from src.price_tracker_bot.db.models import TrackingItem
+from src.price_tracker_bot.db.schema import write_schema_version
 
 async def init_db():
     """Create all tables"""
@@ -17,6 +18,8 @@ async def init_db():
         
         # Create all tables
         await conn.run_sync(Base.metadata.create_all)
+        # Bot açılışta şemayı bu sürümle tek sorguda doğrular
+        await write_schema_version(conn)
         print("✅ New tables created")
     
     await engine.dispose()
@@ -2,6 +2,12 @@ from __future__ import annotations
 from aiogram.filters.callback_data import CallbackData
 
 class TrackActionCb(CallbackData, prefix="trk"):
-    action: str  # "pause" | "resume" | "remove" | "threshold_menu" | "threshold_set" | "back" | "close" | "show_image" | "refresh_image"
+    action: str  # "open" | "pause" | "resume" | "remove" | "threshold_menu" | "threshold_set" | "back" | "close" | "show_image" | "refresh_image"
     item_id: int
-    value: str | None = None  
\ No newline at end of file
+    value: str | None = None
+
+class ListPageCb(CallbackData, prefix="lst"):
+    """/list sayfalama: `cursor` sınır id'si, `direction` "next" (daha eski) | "prev" (daha yeni)"""
+    direction: str
+    cursor: int
+    page: int
@@ -4,9 +4,12 @@ from .handlers.start import router as start_router
 from .handlers.tracking import router as tracking_router
 from .handlers.callbacks import router as callbacks_router
 from .middlewares.db import DbSessionMiddleware
+from .middlewares.metrics import MetricsMiddleware
 
 def build_dispatcher(sessionmaker) -> Dispatcher:
     dp = Dispatcher()
+    # Önce metrik: ölçülen süreye session açma ve commit de dahil
+    dp.update.middleware(MetricsMiddleware())
     dp.update.middleware(DbSessionMiddleware(sessionmaker))
 
     dp.include_router(start_router)
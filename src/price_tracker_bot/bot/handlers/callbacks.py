@@ -1,14 +1,15 @@
 from __future__ import annotations
 
-import httpx
 from aiogram import Router, Bot
-from aiogram.types import CallbackQuery, BufferedInputFile, InlineKeyboardMarkup
+from aiogram.types import CallbackQuery, InlineKeyboardMarkup
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..callbacks import TrackActionCb
 from ..keyboards import tracking_item_kb, threshold_menu_kb
+from ...db.repo.product_repo import ProductRepo
 from ...db.repo.tracking_repo import TrackingRepo
+from ...services.image_cache import send_product_photo
 from ...services.product_enrichment import product_service
 
 router = Router()
@@ -31,26 +32,43 @@ async def on_track_action(query: CallbackQuery, callback_data: TrackActionCb, db
     item_id = callback_data.item_id
     repo = TrackingRepo(db_session)
 
+    if callback_data.action == "open":
+        # /list sayfasından ürün görünümü: liste mesajı yerinde kalsın
+        item = await repo.get(chat_id=chat_id, item_id=item_id)
+        if not item:
+            await query.answer("Bulunamadı.", show_alert=True)
+            return
+        await query.answer()
+        if query.message:
+            has_image = bool(item.image_url or item.telegram_file_id)
+            await query.message.answer(
+                _item_text(item),
+                reply_markup=tracking_item_kb(item_id=item.id, is_active=item.is_active, has_image=has_image),
+                parse_mode="Markdown",
+                disable_web_page_preview=True
+            )
+        return
+
     if callback_data.action == "pause":
-        ok = await repo.set_active(chat_id=chat_id, item_id=item_id, active=False)
-        if not ok:
+        # Güncel satır UPDATE ... RETURNING ile gelir, ayrıca get gerekmez
+        item = await repo.set_active(chat_id=chat_id, item_id=item_id, active=False)
+        if not item:
             await query.answer("Bulunamadı.", show_alert=True)
             return
-        item = await repo.get(chat_id=chat_id, item_id=item_id)
         await query.answer("Durduruldu.")
-        if query.message and item:
+        if query.message:
             has_image = bool(item.image_url or item.telegram_file_id)
             await query.message.edit_reply_markup(reply_markup=tracking_item_kb(item_id=item_id, is_active=item.is_active, has_image=has_image))
         return
 
     if callback_data.action == "resume":
-        ok = await repo.set_active(chat_id=chat_id, item_id=item_id, active=True)
-        if not ok:
+        # Güncel satır UPDATE ... RETURNING ile gelir, ayrıca get gerekmez
+        item = await repo.set_active(chat_id=chat_id, item_id=item_id, active=True)
+        if not item:
             await query.answer("Bulunamadı.", show_alert=True)
             return
-        item = await repo.get(chat_id=chat_id, item_id=item_id)
         await query.answer("Devam ettirildi.")
-        if query.message and item:
+        if query.message:
             has_image = bool(item.image_url or item.telegram_file_id)
             await query.message.edit_reply_markup(reply_markup=tracking_item_kb(item_id=item_id, is_active=item.is_active, has_image=has_image))
         return
@@ -89,14 +107,13 @@ async def on_track_action(query: CallbackQuery, callback_data: TrackActionCb, db
         except ValueError:
             pct = 0.0
 
-        ok = await repo.set_threshold(chat_id=chat_id, item_id=item_id, pct=pct)
-        if not ok:
+        item = await repo.set_threshold(chat_id=chat_id, item_id=item_id, pct=pct)
+        if not item:
             await query.answer("Kaydedilemedi.", show_alert=True)
             return
 
-        item = await repo.get(chat_id=chat_id, item_id=item_id)
         await query.answer("Eşik kaydedildi ✅")
-        if query.message and item:
+        if query.message:
             text = (
                 "🎯 Bildirim eşiği\n\n"
                 f"Mevcut eşik: %{item.threshold_pct}\n"
@@ -148,34 +165,18 @@ async def on_track_action(query: CallbackQuery, callback_data: TrackActionCb, db
             await query.answer("Bulunamadı.", show_alert=True)
             return
         
-        # Telegram file_id varsa onu kullan (hızlı)
-        if item.telegram_file_id:
-            await query.answer()
-            
-            # Yenileme butonu ekle
-            kb = InlineKeyboardBuilder()
-            kb.button(text="🔄 Görseli Yenile", callback_data=TrackActionCb(action="refresh_image", item_id=item_id).pack())
-            kb.button(text="⬅️ Geri", callback_data=TrackActionCb(action="back", item_id=item_id).pack())
-            kb.adjust(1)
-            
-            caption = f"📦 {item.title or 'Ürün'}\n💰 {item.last_price:.2f} TL"
-            
-            try:
-                await query.message.answer_photo(
-                    photo=item.telegram_file_id,
-                    caption=caption,
-                    reply_markup=kb.as_markup()
-                )
-            except Exception as e:
-                # File_id geçersizse URL'den çek
-                await query.answer("Görsel yükleniyor...", show_alert=False)
-                await _send_image_from_url(query, item, repo)
-            return
-        
-        # URL'den çek
+        # Görseller sohbetler arası paylaşılan file_id cache'inden gönderilir
         if item.image_url:
             await query.answer("Görsel yükleniyor...", show_alert=False)
-            await _send_image_from_url(query, item, repo)
+            await _send_image(query, item, db_session)
+        elif item.telegram_file_id:
+            # Eski kayıtlar: URL'i olmayan ama satırda file_id'si kalmış ürünler
+            await query.answer()
+            await query.message.answer_photo(
+                photo=item.telegram_file_id,
+                caption=_image_caption(item),
+                reply_markup=_image_kb(item.id)
+            )
         else:
             await query.answer("Bu ürünün görseli yok.", show_alert=True)
         return
@@ -194,20 +195,20 @@ async def on_track_action(query: CallbackQuery, callback_data: TrackActionCb, db
             product_info = await product_service.fetch_product_info(item.url)
             
             if product_info.image_url:
-                # Database'i güncelle
-                await repo.add(
-                    chat_id=chat_id,
-                    url=item.url,
-                    baseline_price=product_info.price or item.baseline_price,
-                    title=product_info.title or item.title,
-                    image_url=product_info.image_url
-                )
+                # Database'i güncelle (ürün satırı tüm takipçiler için ortak)
+                await repo.set_image_url(chat_id=chat_id, item_id=item_id, image_url=product_info.image_url)
+                if item.product_id:
+                    await ProductRepo(db_session).update_info(
+                        item.product_id,
+                        title=product_info.title,
+                        image_url=product_info.image_url,
+                    )
                 
                 # Yeni görseli gönder
                 item = await repo.get(chat_id=chat_id, item_id=item_id)
                 if query.message:
                     await query.message.delete()
-                await _send_image_from_url(query, item, repo)
+                await _send_image(query, item, db_session, refresh=True)
             else:
                 await query.answer("Güncel görsel bulunamadı.", show_alert=True)
         except Exception as e:
@@ -217,41 +218,30 @@ async def on_track_action(query: CallbackQuery, callback_data: TrackActionCb, db
     await query.answer("Geçersiz işlem.", show_alert=True)
 
 
-async def _send_image_from_url(query: CallbackQuery, item, repo: TrackingRepo) -> None:
-    """URL'den görsel çek ve gönder, file_id'yi kaydet"""
+def _image_caption(item) -> str:
+    return f"📦 {item.title or 'Ürün'}\n💰 {item.last_price:.2f} TL"
+
+def _image_kb(item_id: int) -> InlineKeyboardMarkup:
+    kb = InlineKeyboardBuilder()
+    kb.button(text="🔄 Görseli Yenile", callback_data=TrackActionCb(action="refresh_image", item_id=item_id).pack())
+    kb.button(text="⬅️ Geri", callback_data=TrackActionCb(action="back", item_id=item_id).pack())
+    kb.adjust(1)
+    return kb.as_markup()
+
+async def _send_image(query: CallbackQuery, item, db_session: AsyncSession, refresh: bool = False) -> None:
+    """Ürün görselini gönder: önce paylaşılan file_id, yoksa indir, küçült ve yükle"""
     if not item.image_url:
         await query.answer("Görsel URL'i yok.", show_alert=True)
         return
-    
+
     try:
-        # Görseli indir
-        async with httpx.AsyncClient(timeout=15.0) as client:
-            response = await client.get(item.image_url)
-            response.raise_for_status()
-            image_data = response.content
-        
-        # Telegram'a gönder
-        kb = InlineKeyboardBuilder()
-        kb.button(text="🔄 Görseli Yenile", callback_data=TrackActionCb(action="refresh_image", item_id=item.id).pack())
-        kb.button(text="⬅️ Geri", callback_data=TrackActionCb(action="back", item_id=item.id).pack())
-        kb.adjust(1)
-        
-        caption = f"📦 {item.title or 'Ürün'}\n💰 {item.last_price:.2f} TL"
-        
-        sent_message = await query.message.answer_photo(
-            photo=BufferedInputFile(image_data, filename="product.jpg"),
-            caption=caption,
-            reply_markup=kb.as_markup()
+        await send_product_photo(
+            query.message,
+            db_session,
+            item.image_url,
+            caption=_image_caption(item),
+            reply_markup=_image_kb(item.id),
+            refresh=refresh,
         )
-        
-        # File ID'yi kaydet (cache için)
-        if sent_message.photo:
-            file_id = sent_message.photo[-1].file_id
-            await repo.set_telegram_file_id(
-                chat_id=item.chat_id,
-                item_id=item.id,
-                file_id=file_id
-            )
-    
     except Exception as e:
-        await query.answer(f"Görsel yüklenemedi: {str(e)[:50]}", show_alert=True)
\ No newline at end of file
+        await query.answer(f"Görsel yüklenemedi: {str(e)[:50]}", show_alert=True)
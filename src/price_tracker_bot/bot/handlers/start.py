@@ -9,6 +9,7 @@ HELP_TEXT = (
     "Komutlar:\n"
     "/add <url>            - ürünü takibe al (mevcut fiyat referans alınır)\n"
     "/list                 - takiplerini listele\n"
+    "/history <id>         - son 30 günün fiyat geçmişi\n"
     "/remove <id>          - takip sil\n"
     "/pause <id>           - takibi durdur\n"
     "/resume <id>          - takibi devam ettir\n"
@@ -1,16 +1,27 @@
 from __future__ import annotations
 
+from datetime import datetime, timedelta, timezone
+
 from aiogram import Router
+from aiogram.exceptions import TelegramBadRequest
 from aiogram.filters import Command
-from aiogram.types import Message, BufferedInputFile
+from aiogram.types import CallbackQuery, Message, BufferedInputFile
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from ...db.repo.price_history_repo import PriceHistoryRepo
+from ...db.repo.product_repo import ProductRepo
 from ...db.repo.tracking_repo import TrackingRepo
-from ...services.product_enrichment import product_service
-from ..keyboards import after_add_kb, tracking_item_kb
+from ...services.price_history import LOCAL_TZ, as_utc
+from ...services.product_enrichment import canonicalize_url, product_service
+from ...services.urls import product_key_from_url
+from ..callbacks import ListPageCb
+from ..keyboards import after_add_kb, tracking_list_kb
 
 router = Router()
 
+# /list sayfası başına takip sayısı
+LIST_PAGE_SIZE = 10
+
 def _parse_url_arg(text: str) -> str | None:
     parts = text.strip().split(maxsplit=1)
     if len(parts) < 2:
@@ -30,6 +41,10 @@ async def add_tracking(message: Message, db_session: AsyncSession) -> None:
     repo = TrackingRepo(db_session)
     
     try:
+        # Kısa linki çöz: takip kaydı kanonik URL ile saklanır, kontrol
+        # döngüleri bir daha redirect çözmez
+        url = await canonicalize_url(url, db_session)
+
         # URL'den ürün bilgilerini çek
         product_info = await product_service.fetch_product_info(url)
         
@@ -45,13 +60,23 @@ async def add_tracking(message: Message, db_session: AsyncSession) -> None:
             )
             return
         
+        # Ürün daha önce başka bir sohbette eklendiyse aynı satırı kullan
+        product = await ProductRepo(db_session).get_or_create(
+            product_key=product_key_from_url(product_info.url),
+            url=product_info.url,
+            title=product_info.title,
+            image_url=product_info.image_url,
+            price=product_info.price,
+        )
+
         # Database'e kaydet
         item = await repo.add(
             chat_id=message.chat.id,
             url=url,
             baseline_price=product_info.price,
             title=product_info.title,
-            image_url=product_info.image_url
+            image_url=product_info.image_url,
+            product_id=product.id,
         )
 
         # Mesajı güncelle
@@ -100,37 +125,122 @@ async def add_tracking(message: Message, db_session: AsyncSession) -> None:
             pass
         # Exception'ı suppress et - middleware commit yapmasın
 
+async def _list_page(
+    repo: TrackingRepo,
+    chat_id: int,
+    page: int = 1,
+    before_id: int | None = None,
+    after_id: int | None = None,
+):
+    """Bir /list sayfasının metnini ve klavyesini hazırla; takip yoksa None
+
+    Sayfalar id üzerinden keyset ile okunur, sayfa numarası sadece
+    gösterim içindir. Arada silinen takipler yüzünden sayfa boş ya da
+    eksik gelirse ilk sayfaya dönülür.
+    """
+    total = await repo.count_by_chat(chat_id)
+    if not total:
+        return None
+    pages = (total + LIST_PAGE_SIZE - 1) // LIST_PAGE_SIZE
+
+    items = await repo.list_page(chat_id, LIST_PAGE_SIZE, before_id=before_id, after_id=after_id)
+    if not items or (after_id is not None and len(items) < LIST_PAGE_SIZE):
+        page = 1
+        items = await repo.list_page(chat_id, LIST_PAGE_SIZE)
+    page = max(1, min(page, pages))
+
+    lines = [f"📋 Takiplerin — toplam {total}, sayfa {page}/{pages}\n"]
+    for it in items:
+        status = "🟢" if it.is_active else "🟡"
+        lines.append(
+            f"{status} {it.id} · {it.title or 'Ürün'}\n"
+            f"     💵 {it.last_price:.2f} TL · 🎯 %{it.threshold_pct}"
+        )
+    lines.append("\nDetay için ürüne dokun.")
+    return "\n".join(lines), tracking_list_kb(items, page=page, pages=pages)
+
 @router.message(Command("list"))
 async def list_tracking(message: Message, db_session: AsyncSession) -> None:
-    repo = TrackingRepo(db_session)
-    items = await repo.list_by_chat(chat_id=message.chat.id)
-
-    if not items:
+    # Tüm takipler yerine tek mesajda sayfa sayfa gezinme
+    result = await _list_page(TrackingRepo(db_session), chat_id=message.chat.id)
+    if result is None:
         await message.answer("Henüz takip yok. /add ile link ekleyebilirsin.")
         return
 
-    await message.answer(f"📋 Toplam {len(items)} takip bulundu:")
+    text, kb = result
+    await message.answer(text, reply_markup=kb, disable_web_page_preview=True)
 
-    for it in items:
-        status = "🟢 aktif" if it.is_active else "🟡 durduruldu"
-        
-        # Başlık varsa göster
-        title_text = f"📦 **{it.title}**\n\n" if it.title else ""
-        
-        text = (
-            f"{title_text}"
-            f"🆔 ID: {it.id} — {status}\n"
-            f"💰 Referans: {it.baseline_price:.2f} TL\n"
-            f"💵 Son fiyat: {it.last_price:.2f} TL\n"
-            f"🎯 Eşik: %{it.threshold_pct}\n"
-            f"🔗 [Link]({it.url})"
-        )
-        
-        has_image = bool(it.image_url or it.telegram_file_id)
-        
-        await message.answer(
-            text,
-            reply_markup=tracking_item_kb(item_id=it.id, is_active=it.is_active, has_image=has_image),
-            parse_mode="Markdown",
-            disable_web_page_preview=True
-        )
\ No newline at end of file
+@router.callback_query(ListPageCb.filter())
+async def on_list_page(query: CallbackQuery, callback_data: ListPageCb, db_session: AsyncSession) -> None:
+    chat_id = query.message.chat.id if query.message else query.from_user.id
+    cursor = callback_data.cursor
+    result = await _list_page(
+        TrackingRepo(db_session),
+        chat_id=chat_id,
+        page=callback_data.page,
+        before_id=cursor if callback_data.direction == "next" else None,
+        after_id=cursor if callback_data.direction == "prev" else None,
+    )
+    await query.answer()
+    if not query.message:
+        return
+    if result is None:
+        await query.message.edit_text("Henüz takip yok. /add ile link ekleyebilirsin.")
+        return
+
+    text, kb = result
+    try:
+        await query.message.edit_text(text, reply_markup=kb, disable_web_page_preview=True)
+    except TelegramBadRequest:
+        # "message is not modified": aynı sayfaya tekrar basıldı
+        pass
+
+@router.message(Command("history"))
+async def price_history(message: Message, db_session: AsyncSession) -> None:
+    arg = _parse_url_arg(message.text or "")
+    if not arg or not arg.isdigit():
+        await message.answer("Kullanım: /history <id>\nÖrnek: /history 12")
+        return
+
+    item = await TrackingRepo(db_session).get(chat_id=message.chat.id, item_id=int(arg))
+    if not item:
+        await message.answer("Bulunamadı.")
+        return
+
+    # Ham gözlemler yerine günlük özetlerden oku (aylar boyunca da ucuz)
+    since = datetime.now(timezone.utc) - timedelta(days=30)
+    days = []
+    opening = None
+    if item.product_id:
+        history = PriceHistoryRepo(db_session)
+        days = await history.list_rollups(item.product_id, "day", since)
+        # Pencere açıldığında geçerli olan fiyat: 30 gün içinde hiç
+        # değişmediyse de en düşük / en yüksek hesabına girmeli
+        opening = await history.last_rollup_before(item.product_id, "day", since)
+
+    if not days and opening is None:
+        await message.answer("Henüz fiyat geçmişi yok. Geçmiş, fiyat değiştikçe birkaç dakika içinde oluşur.")
+        return
+
+    lows = [(row.min_price, row.bucket_start) for row in days]
+    highs = [(row.max_price, row.bucket_start) for row in days]
+    if opening is not None:
+        lows.append((opening.last_price, since))
+        highs.append((opening.last_price, since))
+    lowest = min(lows, key=lambda p: p[0])
+    highest = max(highs, key=lambda p: p[0])
+
+    def _day(ts) -> str:
+        return as_utc(ts).astimezone(LOCAL_TZ).strftime("%d.%m")
+
+    lines = [
+        f"📈 Fiyat geçmişi — {item.title or 'Ürün'}\n",
+        f"⬇️ Son 30 günün en düşüğü: {lowest[0]:.2f} TL ({_day(lowest[1])})",
+        f"⬆️ Son 30 günün en yükseği: {highest[0]:.2f} TL ({_day(highest[1])})",
+        f"💵 Son fiyat: {item.last_price:.2f} TL\n",
+        "Gün: en düşük / en yüksek / son",
+    ]
+    for row in days[-14:]:
+        lines.append(f"{_day(row.bucket_start)}: {row.min_price:.2f} / {row.max_price:.2f} / {row.last_price:.2f}")
+
+    await message.answer("\n".join(lines))
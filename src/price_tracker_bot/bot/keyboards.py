@@ -3,7 +3,7 @@ from __future__ import annotations
 from aiogram.types import InlineKeyboardMarkup
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 
-from .callbacks import TrackActionCb
+from .callbacks import ListPageCb, TrackActionCb
 
 def tracking_item_kb(item_id: int, is_active: bool, has_image: bool = False) -> InlineKeyboardMarkup:
     b = InlineKeyboardBuilder()
@@ -24,6 +24,26 @@ def tracking_item_kb(item_id: int, is_active: bool, has_image: bool = False) ->
     b.adjust(2, 2) if has_image else b.adjust(2, 1)
     return b.as_markup()
 
+def tracking_list_kb(items, page: int, pages: int) -> InlineKeyboardMarkup:
+    """/list sayfası: her takip için bir buton, altta ◀️ / ▶️ gezinme"""
+    b = InlineKeyboardBuilder()
+    for it in items:
+        title = (it.title or "Ürün").strip()
+        if len(title) > 32:
+            title = title[:31] + "…"
+        b.button(text=f"{it.id} · {title}", callback_data=TrackActionCb(action="open", item_id=it.id).pack())
+
+    nav = 0
+    if page > 1:
+        b.button(text="◀️ Önceki", callback_data=ListPageCb(direction="prev", cursor=items[0].id, page=page - 1).pack())
+        nav += 1
+    if page < pages:
+        b.button(text="Sonraki ▶️", callback_data=ListPageCb(direction="next", cursor=items[-1].id, page=page + 1).pack())
+        nav += 1
+
+    b.adjust(*([1] * len(items)), *([nav] if nav else []))
+    return b.as_markup()
+
 def after_add_kb(item_id: int, has_image: bool = False) -> InlineKeyboardMarkup:
     b = InlineKeyboardBuilder()
     
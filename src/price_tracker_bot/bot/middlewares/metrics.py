@@ -0,0 +1,25 @@
+from __future__ import annotations
+
+import time
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.types import Update
+
+from ...services.metrics import UPDATE_SECONDS
+
+class MetricsMiddleware(BaseMiddleware):
+    """Her güncellemenin (handler + DB commit dahil) işlenme süresini ölçer"""
+
+    async def __call__(
+        self,
+        handler: Callable[[Any, Dict[str, Any]], Awaitable[Any]],
+        event: Any,
+        data: Dict[str, Any],
+    ) -> Any:
+        kind = event.event_type if isinstance(event, Update) else type(event).__name__
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        finally:
+            UPDATE_SECONDS.labels(event=kind).observe(time.perf_counter() - started)
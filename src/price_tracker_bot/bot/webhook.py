@@ -0,0 +1,176 @@
+"""Webhook güncellemelerini sınırlı, sohbet bazlı sıralı işçi havuzunda işleme
+
+Telegram'a hemen 200 dönülür, güncelleme havuza bırakılır. Her sohbetin
+bekleyen güncellemeleri kendi kuyruğunda durur; işe hazır sohbetler ortak
+bir sırada bekler ve boşalan işçi sıradaki sohbetin bir güncellemesini
+işler. Bir sohbet aynı anda tek işçide olduğu için güncellemeleri geliş
+sırasıyla işlenir; yavaş bir handler (ör. Trendyol'u bekleyen /add) sadece
+kendi sohbetini bekletir, diğer sohbetler boştaki işçilerle ilerler.
+Bekleyen toplam güncelleme sayısı sınırlıdır: sınır doluyken webhook
+yanıtı bekletilir. Beklemenin süresi aşılırsa 503 dönülür; Telegram
+güncellemeyi sonra tekrar gönderir ve yeni güncellemeleri yavaşlatır.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any
+
+from aiogram import Bot, Dispatcher
+from aiogram.methods import TelegramMethod
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler
+from aiohttp import web
+
+from ..services.metrics import UPDATE_QUEUE_DEPTH, UPDATE_QUEUE_WAIT, UPDATES_REJECTED
+
+log = logging.getLogger(__name__)
+
+
+def shard_key(update: dict) -> int:
+    """Güncellemenin sohbet id'si (yoksa kullanıcı, o da yoksa update_id)"""
+    for key, value in update.items():
+        if key == "update_id" or not isinstance(value, dict):
+            continue
+        chat = value.get("chat") or (value.get("message") or {}).get("chat")
+        if chat:
+            return chat["id"]
+        user = value.get("from") or value.get("user")
+        if user:
+            return user["id"]
+    return update.get("update_id", 0)
+
+
+class UpdateWorkerPool:
+    """Sohbet bazlı sıralı, toplamda en fazla `workers` güncellemeyi eşzamanlı işleyen havuz"""
+
+    def __init__(
+        self,
+        dispatcher: Dispatcher,
+        bot: Bot,
+        workers: int = 8,
+        queue_size: int = 1000,
+        enqueue_timeout: float = 5.0,
+        **data: Any,
+    ):
+        self.dispatcher = dispatcher
+        self.bot = bot
+        self.data = data
+        self.workers = max(1, workers)
+        self.enqueue_timeout = enqueue_timeout
+        # Sohbet -> bekleyen güncellemeler. Sohbet, hazır sırada ya da bir
+        # işçide olduğu sürece burada kalır; yeni güncellemesi sıraya girmez
+        self._chats: dict[int, deque] = {}
+        # İşe hazır sohbetler; her sohbet sırada en fazla bir kez bulunur
+        self._ready: asyncio.Queue[int] = asyncio.Queue()
+        # Bekleyen toplam güncelleme sınırı
+        self._capacity = asyncio.Semaphore(max(1, queue_size))
+        self._tasks: list[asyncio.Task] = []
+        self._closing = False
+
+    def start(self) -> None:
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def submit(self, update: dict) -> bool:
+        """Güncellemeyi sohbetinin kuyruğuna koy; sınır süre içinde boşalmazsa False"""
+        if self._closing:
+            return False
+        # Derinlik kuyruğa koymadan önce artar (işçi azaltmadan önce), red olursa geri alınır
+        UPDATE_QUEUE_DEPTH.inc()
+        if self._capacity.locked():
+            try:
+                await asyncio.wait_for(self._capacity.acquire(), timeout=self.enqueue_timeout)
+            except asyncio.TimeoutError:
+                UPDATE_QUEUE_DEPTH.dec()
+                UPDATES_REJECTED.inc()
+                log.warning("Update queue full, asking Telegram to retry", extra={"update_id": update.get("update_id")})
+                return False
+        else:
+            await self._capacity.acquire()
+
+        key = shard_key(update)
+        item = (update, time.perf_counter())
+        pending = self._chats.get(key)
+        if pending is None:
+            # Sohbetin bekleyen ya da işlenen güncellemesi yok: hazır sıraya gir
+            self._chats[key] = deque((item,))
+            self._ready.put_nowait(key)
+        else:
+            pending.append(item)
+        return True
+
+    async def _worker(self) -> None:
+        while True:
+            key = await self._ready.get()
+            try:
+                pending = self._chats[key]
+                update, received = pending.popleft()
+                self._capacity.release()
+                UPDATE_QUEUE_DEPTH.dec()
+                UPDATE_QUEUE_WAIT.observe(time.perf_counter() - received)
+                try:
+                    result = await self.dispatcher.feed_raw_update(self.bot, update, **self.data)
+                    if isinstance(result, TelegramMethod):
+                        await self.dispatcher.silent_call_request(self.bot, result)
+                except Exception:
+                    log.exception("Error processing update", extra={"update_id": update.get("update_id")})
+                if pending:
+                    # Sohbetin sıradaki güncellemesi: diğer sohbetler de ilerlesin diye sıranın sonuna
+                    self._ready.put_nowait(key)
+                else:
+                    del self._chats[key]
+            finally:
+                self._ready.task_done()
+
+    async def close(self, timeout: float = 10.0) -> None:
+        """Yeni güncelleme alma, bekleyenleri işle ve işçileri durdur (süre aşılırsa iptal et)"""
+        if not self._tasks:
+            return
+        self._closing = True
+        try:
+            await asyncio.wait_for(self._ready.join(), timeout=timeout)
+        except asyncio.TimeoutError:
+            log.warning(
+                "Update workers cancelled on shutdown",
+                extra={"pending": sum(len(q) for q in self._chats.values())},
+            )
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+
+class PooledRequestHandler(SimpleRequestHandler):
+    """Güncellemeyi UpdateWorkerPool'a bırakıp hemen yanıt veren webhook handler'ı"""
+
+    def __init__(
+        self,
+        dispatcher: Dispatcher,
+        bot: Bot,
+        workers: int = 8,
+        queue_size: int = 1000,
+        enqueue_timeout: float = 5.0,
+        secret_token: str | None = None,
+        **data: Any,
+    ):
+        super().__init__(dispatcher, bot, handle_in_background=True, secret_token=secret_token, **data)
+        self.pool = UpdateWorkerPool(dispatcher, bot, workers, queue_size, enqueue_timeout, **data)
+
+    def register(self, app: web.Application, /, path: str, **kwargs: Any) -> None:
+        app.on_startup.append(self._start_pool)
+        super().register(app, path=path, **kwargs)
+
+    async def _start_pool(self, app: web.Application) -> None:
+        self.pool.start()
+
+    async def _handle_request_background(self, bot: Bot, request: web.Request) -> web.Response:
+        update = await request.json(loads=bot.session.json_loads)
+        if not await self.pool.submit(update):
+            return web.Response(status=503, text="busy")
+        return web.json_response({}, dumps=bot.session.json_dumps)
+
+    async def close(self) -> None:
+        await self.pool.close()
+        await super().close()
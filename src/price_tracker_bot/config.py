@@ -1,21 +1,142 @@
 from dataclasses import dataclass
+import logging
 import os
 from dotenv import load_dotenv
 
 load_dotenv()
 
+log = logging.getLogger(__name__)
+
 @dataclass(frozen=True)
 class Settings:
     bot_token: str
     database_url: str
     webhook_url: str | None
     port: int
+    # Polling modu ve işçiler için ayrı /metrics sunucusunun portu (0 = kapalı);
+    # webhook modunda /metrics ana porttadır
+    metrics_port: int = 0
+    # Fiyat kontrol pipeline ayarları
+    check_concurrency: int = 8
+    per_host_rps: float = 2.0
+    db_write_chunk: int = 200
+    check_read_chunk: int = 500
+    # Uyarlanır kontrol planı: tur aralığı, dakikalık çekim bütçesi ve
+    # volatiliteye göre ürün başı kontrol aralığının alt / üst sınırı
+    check_tick_seconds: int = 30
+    check_rate_per_min: float = 60.0
+    check_min_interval_min: float = 5.0
+    check_max_interval_min: float = 360.0
+    # Kontrol modu ("due" | "sweep") ve tur başına süre sınırı (sn): süre
+    # dolunca kalan ürünler sonraki tura kalır, turlar üst üste binmez
+    check_mode: str = "due"
+    check_time_budget: float | None = None
+    # Çok işçili kontrol: işçi kimliği (boşsa host:pid), ürün kirasının süresi
+    # ve bu süreçte fiyat kontrolünün çalışıp çalışmayacağı
+    checker_worker_id: str | None = None
+    check_lease_seconds: float = 300.0
+    checker_enabled: bool = True
+    # Bildirim gönderimi: global mesaj/sn, sohbet başına mesajlar arası süre,
+    # eşzamanlı sohbet sayısı, geçici hatalarda en fazla deneme ve
+    # gönderilmiş / başarısız mesajların outbox'ta saklanma süresi (saat, 0 = silme)
+    notify_rate_per_sec: float = 25.0
+    notify_per_chat_interval: float = 1.0
+    notify_concurrency: int = 8
+    notify_max_attempts: int = 8
+    notify_retention_hours: float = 72.0
+    # Webhook güncellemeleri: işçi sayısı (0 = aiogram'ın sınırsız arka plan
+    # görevleri), işçi başına kuyruk ve kuyruk doluyken en fazla bekleme (sn)
+    update_workers: int = 0
+    update_queue_size: int = 1000
+    update_enqueue_timeout: float = 5.0
+    # Paylaşılan HTTP client ayarları
+    http_max_connections: int = 20
+    http_max_keepalive: int = 10
+    http2: bool = False
+    # HTML parser backend'i: "lxml" (derlenmiş XPath) veya "bs4" (BeautifulSoup)
+    parser_backend: str = "lxml"
+    # Sayfadaki gömülü state JSON'unu önce dene (yoksa DOM parser'a düş)
+    parser_embedded_state: bool = True
+    # Parse havuzu: "thread", "process" veya "inline" (event loop üzerinde)
+    parse_pool: str = "thread"
+    parse_workers: int = 2
+    parse_max_pending: int | None = None
+    # Ürün görselleri: ilk yüklemeden önce uzun kenar sınırı (0 = küçültme
+    # yok; açmak için Pillow kurulmalı) ve küçültülen görselin JPEG kalitesi
+    image_max_side: int = 0
+    image_jpeg_quality: int = 85
+    # İsteğe bağlı profil: çıktı klasörü, açılışta profillenecek tur sayısı,
+    # örnekleme aralığı, tracemalloc görüntü aralığı (dk, 0 = kapalı) ve
+    # /debug endpoint'lerinin jetonu (boşsa endpoint'ler kapalı)
+    profile_dir: str = "profiles"
+    profile_cycles: int = 0
+    profile_sample_ms: float = 10.0
+    profile_memory_interval_min: float = 0.0
+    profile_memory_frames: int = 10
+    profile_token: str | None = None
+    # Log: seviye, biçim ("json" | "text"), kuyruk boyutu ve tekrarlayan
+    # uyarı / hataların örneklenmesi (pencere başına ilk N kayıt)
+    log_level: str = "INFO"
+    log_format: str = "json"
+    log_queue_size: int = 10000
+    log_sample_burst: int = 5
+    log_sample_window: float = 60.0
 
 def load_settings() -> Settings:
     token = os.getenv("BOT_TOKEN", "").strip()
     db_url = os.getenv("DATABASE_URL", "").strip()
     webhook_url = os.getenv("WEBHOOK_URL", "").strip() or None
     port = int(os.getenv("PORT", "8080"))
+    metrics_port = int(os.getenv("METRICS_PORT", "0"))
+    check_concurrency = max(1, int(os.getenv("CHECK_CONCURRENCY", "8")))
+    per_host_rps = float(os.getenv("PER_HOST_RPS", "2.0"))
+    db_write_chunk = max(1, int(os.getenv("DB_WRITE_CHUNK", "200")))
+    check_read_chunk = max(1, int(os.getenv("CHECK_READ_CHUNK", "500")))
+    check_tick_seconds = max(1, int(os.getenv("CHECK_TICK_SECONDS", "30")))
+    check_rate_per_min = float(os.getenv("CHECK_RATE_PER_MIN", "60"))
+    check_min_interval_min = float(os.getenv("CHECK_MIN_INTERVAL_MIN", "5"))
+    check_max_interval_min = float(os.getenv("CHECK_MAX_INTERVAL_MIN", "360"))
+    check_mode = os.getenv("CHECK_MODE", "due").strip().lower() or "due"
+    if check_mode not in ("due", "sweep"):
+        raise RuntimeError(f"Unknown CHECK_MODE: {check_mode!r} (expected 'due' or 'sweep')")
+    # Varsayılan bütçe tur aralığının %80'i: bir sonraki tetiklemeden önce biter
+    check_time_budget = float(os.getenv("CHECK_TIME_BUDGET_SECONDS", "0")) or check_tick_seconds * 0.8
+    checker_worker_id = os.getenv("CHECKER_WORKER_ID", "").strip() or None
+    check_lease_seconds = float(os.getenv("CHECK_LEASE_SECONDS", "300"))
+    checker_enabled = os.getenv("CHECKER_ENABLED", "1").strip().lower() not in ("0", "false", "no")
+    notify_rate_per_sec = float(os.getenv("NOTIFY_RATE_PER_SEC", "25"))
+    notify_per_chat_interval = float(os.getenv("NOTIFY_PER_CHAT_INTERVAL", "1.0"))
+    notify_concurrency = max(1, int(os.getenv("NOTIFY_CONCURRENCY", "8")))
+    notify_max_attempts = max(1, int(os.getenv("NOTIFY_MAX_ATTEMPTS", "8")))
+    notify_retention_hours = max(0.0, float(os.getenv("NOTIFY_RETENTION_HOURS", "72")))
+    update_workers = max(0, int(os.getenv("UPDATE_WORKERS", "0")))
+    update_queue_size = max(1, int(os.getenv("UPDATE_QUEUE_SIZE", "1000")))
+    update_enqueue_timeout = max(0.0, float(os.getenv("UPDATE_ENQUEUE_TIMEOUT", "5")))
+    http_max_connections = int(os.getenv("HTTP_MAX_CONNECTIONS", "20"))
+    http_max_keepalive = int(os.getenv("HTTP_MAX_KEEPALIVE", "10"))
+    http2 = os.getenv("HTTP2", "").strip().lower() in ("1", "true", "yes")
+    parser_backend = os.getenv("PARSER_BACKEND", "lxml").strip().lower() or "lxml"
+    parser_embedded_state = os.getenv("PARSER_EMBEDDED_STATE", "1").strip().lower() not in ("0", "false", "no")
+    parse_pool = os.getenv("PARSE_POOL", "thread").strip().lower() or "thread"
+    parse_workers = max(1, int(os.getenv("PARSE_WORKERS", "2")))
+    parse_max_pending = int(os.getenv("PARSE_MAX_PENDING", "0")) or None
+    image_max_side = max(0, int(os.getenv("IMAGE_MAX_SIDE", "0")))
+    image_jpeg_quality = min(95, max(10, int(os.getenv("IMAGE_JPEG_QUALITY", "85"))))
+    profile_dir = os.getenv("PROFILE_DIR", "profiles").strip() or "profiles"
+    profile_cycles = max(0, int(os.getenv("PROFILE_CYCLES", "0")))
+    profile_sample_ms = max(1.0, float(os.getenv("PROFILE_SAMPLE_MS", "10")))
+    profile_memory_interval_min = max(0.0, float(os.getenv("PROFILE_MEMORY_INTERVAL_MIN", "0")))
+    profile_memory_frames = max(1, int(os.getenv("PROFILE_MEMORY_FRAMES", "10")))
+    profile_token = os.getenv("PROFILE_TOKEN", "").strip() or None
+    log_level = os.getenv("LOG_LEVEL", "INFO").strip().upper() or "INFO"
+    if not isinstance(logging.getLevelName(log_level), int):
+        raise RuntimeError(f"Unknown LOG_LEVEL: {log_level!r}")
+    log_format = os.getenv("LOG_FORMAT", "json").strip().lower() or "json"
+    if log_format not in ("json", "text"):
+        raise RuntimeError(f"Unknown LOG_FORMAT: {log_format!r} (expected 'json' or 'text')")
+    log_queue_size = max(100, int(os.getenv("LOG_QUEUE_SIZE", "10000")))
+    log_sample_burst = max(0, int(os.getenv("LOG_SAMPLE_BURST", "5")))
+    log_sample_window = max(1.0, float(os.getenv("LOG_SAMPLE_WINDOW_SECONDS", "60")))
     
     if not token:
         raise RuntimeError("BOT_TOKEN is missing. Create a .env file based on .env.example")
@@ -30,11 +151,55 @@ def load_settings() -> Settings:
         elif db_url.startswith("postgresql://"):
             db_url = "postgresql+asyncpg://" + db_url[13:]  # "postgresql://" kaldır
     
-    print(f"🔧 Final Database URL format: {db_url[:30]}...")  # Debug için
+    # Parola loga düşmesin: sadece şema
+    log.debug("Database URL normalized", extra={"scheme": db_url.split("://", 1)[0]})
     
     return Settings(
         bot_token=token,
         database_url=db_url,
         webhook_url=webhook_url,
-        port=port
+        port=port,
+        metrics_port=metrics_port,
+        check_concurrency=check_concurrency,
+        per_host_rps=per_host_rps,
+        db_write_chunk=db_write_chunk,
+        check_read_chunk=check_read_chunk,
+        check_tick_seconds=check_tick_seconds,
+        check_rate_per_min=check_rate_per_min,
+        check_min_interval_min=check_min_interval_min,
+        check_max_interval_min=check_max_interval_min,
+        check_mode=check_mode,
+        check_time_budget=check_time_budget,
+        checker_worker_id=checker_worker_id,
+        check_lease_seconds=check_lease_seconds,
+        checker_enabled=checker_enabled,
+        notify_rate_per_sec=notify_rate_per_sec,
+        notify_per_chat_interval=notify_per_chat_interval,
+        notify_concurrency=notify_concurrency,
+        notify_max_attempts=notify_max_attempts,
+        notify_retention_hours=notify_retention_hours,
+        update_workers=update_workers,
+        update_queue_size=update_queue_size,
+        update_enqueue_timeout=update_enqueue_timeout,
+        http_max_connections=http_max_connections,
+        http_max_keepalive=http_max_keepalive,
+        http2=http2,
+        parser_backend=parser_backend,
+        parser_embedded_state=parser_embedded_state,
+        parse_pool=parse_pool,
+        parse_workers=parse_workers,
+        parse_max_pending=parse_max_pending,
+        image_max_side=image_max_side,
+        image_jpeg_quality=image_jpeg_quality,
+        profile_dir=profile_dir,
+        profile_cycles=profile_cycles,
+        profile_sample_ms=profile_sample_ms,
+        profile_memory_interval_min=profile_memory_interval_min,
+        profile_memory_frames=profile_memory_frames,
+        profile_token=profile_token,
+        log_level=log_level,
+        log_format=log_format,
+        log_queue_size=log_queue_size,
+        log_sample_burst=log_sample_burst,
+        log_sample_window=log_sample_window,
     )
\ No newline at end of file
@@ -1,12 +1,14 @@
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 
+from ..services.metrics import instrument_engine
+
 def build_engine(database_url: str):
     """
     Create database engine with optimized settings for cloud deployment
     """
     # PostgreSQL için connection pool ayarları
     if "postgresql" in database_url:
-        return create_async_engine(
+        engine = create_async_engine(
             database_url,
             pool_pre_ping=True,
             pool_size=5,  # Render free tier için optimize edilmiş
@@ -16,11 +18,14 @@ def build_engine(database_url: str):
         )
     # SQLite için basit ayarlar
     else:
-        return create_async_engine(
+        engine = create_async_engine(
             database_url,
             pool_pre_ping=True,
             echo=False
         )
+    # Sorgu süreleri /metrics'e (price_tracker_db_query_seconds)
+    instrument_engine(engine)
+    return engine
 
 def build_sessionmaker(engine) -> async_sessionmaker[AsyncSession]:
     return async_sessionmaker(engine, expire_on_commit=False)
\ No newline at end of file
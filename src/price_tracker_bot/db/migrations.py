@@ -0,0 +1,192 @@
+"""Mevcut veritabanları için eklemeli (additive) şema geçişleri
+
+`create_all` eksik tabloları oluşturur ama var olan tablolara sütun
+eklemez. Burada modellerde olup veritabanında olmayan sütunlar
+`ALTER TABLE ... ADD COLUMN` ile eklenir (satırlar silinmez), ardından yeni
+sütunların gerektirdiği veri doldurulur: ürün tablosundan önce eklenmiş
+takiplerin `product_id`'si URL'deki ürün anahtarından bağlanır.
+"""
+from __future__ import annotations
+
+import logging
+
+from sqlalchemy import Column, Connection, MetaData, Table, bindparam, column as column_clause, inspect, select, table as table_clause, update
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+from sqlalchemy.schema import CreateColumn
+
+from .base import Base
+from .models import TrackingItem
+from .repo.product_repo import ProductRepo
+from .repo.short_link_repo import ShortLinkRepo
+from ..services.urls import canonical_url, needs_resolution, product_key_from_url
+
+log = logging.getLogger(__name__)
+
+# Backfill'de tek seferde bağlanan takip sayısı
+BACKFILL_CHUNK = 500
+
+
+def _column_ddl(conn: Connection, column: Column, with_default: bool = True) -> str:
+    dialect = conn.dialect
+    if with_default:
+        ddl = str(CreateColumn(column).compile(dialect=dialect))
+    else:
+        ddl = f"{dialect.identifier_preparer.quote(column.name)} {column.type.compile(dialect=dialect)}"
+    for fk in column.foreign_keys:
+        target = fk.column
+        ddl += (
+            f" REFERENCES {dialect.identifier_preparer.format_table(target.table)}"
+            f" ({dialect.identifier_preparer.quote(target.name)})"
+        )
+        if fk.ondelete:
+            ddl += f" ON DELETE {fk.ondelete}"
+    return ddl
+
+
+def _add_column(conn: Connection, table: Table, column: Column) -> bool:
+    """Sütunu mevcut tabloya ekle; eklenemiyorsa False"""
+    default = column.server_default
+    constant = default is None or isinstance(getattr(default, "arg", None), str)
+    table_name = conn.dialect.identifier_preparer.format_table(table)
+
+    if not constant and conn.dialect.name == "sqlite":
+        # SQLite ADD COLUMN sabit olmayan DEFAULT (CURRENT_TIMESTAMP) kabul
+        # etmez: sütun boş eklenir, mevcut satırlar varsayılan ifadeyle doldurulur
+        conn.exec_driver_sql(f"ALTER TABLE {table_name} ADD COLUMN {_column_ddl(conn, column, with_default=False)}")
+        # Sadece bu sütun güncellenir: modeldeki onupdate'ler (updated_at)
+        # henüz eklenmemiş sütunlara yazmaya çalışmasın
+        target = table_clause(table.name, column_clause(column.name), schema=table.schema)
+        conn.execute(update(target).values({column.name: default.arg}))
+        return True
+
+    if not column.nullable and default is None:
+        # Mevcut satırlar için değer yok; NOT NULL sütun eklenemez
+        return False
+
+    conn.exec_driver_sql(f"ALTER TABLE {table_name} ADD COLUMN {_column_ddl(conn, column)}")
+    return True
+
+
+def add_missing_columns(conn: Connection) -> list[str]:
+    """Var olan tablolara modellerdeki eksik sütunları ekle
+
+    Eklenen sütunları "tablo.sütun" olarak döndürür. Eklenemeyen sütunlar
+    (varsayılanı olmayan NOT NULL) loglanır ve atlanır.
+    """
+    inspector = inspect(conn)
+    existing = set(inspector.get_table_names())
+    added: list[str] = []
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing:
+            continue
+        have = {c["name"] for c in inspector.get_columns(table.name)}
+        new_names = set()
+        for column in table.columns:
+            if column.name in have:
+                continue
+            if _add_column(conn, table, column):
+                added.append(f"{table.name}.{column.name}")
+                new_names.add(column.name)
+            else:
+                log.warning(
+                    "Column cannot be added to existing table",
+                    extra={"table": table.name, "column": column.name},
+                )
+        # Eklenen sütunlara bağlı index'ler (create_all mevcut tablolara eklemez)
+        for index in table.indexes:
+            if new_names & {c.name for c in index.columns}:
+                index.create(conn, checkfirst=True)
+    return added
+
+
+def missing_columns(conn: Connection, metadata: MetaData = Base.metadata) -> list[str]:
+    """Modellerde olup veritabanında olmayan tablo / sütunlar ("tablo" ya da "tablo.sütun")"""
+    inspector = inspect(conn)
+    existing = set(inspector.get_table_names())
+    missing: list[str] = []
+    for table in metadata.sorted_tables:
+        if table.name not in existing:
+            missing.append(table.name)
+            continue
+        have = {c["name"] for c in inspector.get_columns(table.name)}
+        missing.extend(f"{table.name}.{c.name}" for c in table.columns if c.name not in have)
+    return missing
+
+
+async def backfill_tracking_products(conn: AsyncConnection) -> int:
+    """Ürünü olmayan takipleri URL'deki ürün anahtarıyla ürüne bağla
+
+    `product_id` sütunundan önce eklenmiş takipler fiyat kontrolüne
+    (claim_due / iter_active_work) girmez; bu yüzden şema geçişinde bağlanır.
+    Kısa linkler (ty.gl) `short_links` tablosunda çözülmüşse ürün kanonik
+    URL ile oluşturulur; ağ isteği yapılmaz, çözülmemiş olanları ilk fiyat
+    kontrolü çözüp ürünü kanonik URL'e taşır. Bağlanan takip sayısını döndürür.
+    """
+    linked = 0
+    table = TrackingItem.__table__
+    async with AsyncSession(bind=conn, expire_on_commit=False) as session:
+        repo = ProductRepo(session)
+        short_links = ShortLinkRepo(session)
+        product_ids: dict[str, int] = {}
+        last_id = 0
+        while True:
+            rows = (await session.execute(
+                select(table.c.id, table.c.url, table.c.title, table.c.image_url, table.c.last_price)
+                .where(table.c.product_id.is_(None), table.c.id > last_id)
+                .order_by(table.c.id)
+                .limit(BACKFILL_CHUNK)
+            )).all()
+            if not rows:
+                break
+            last_id = rows[-1].id
+
+            updates = []
+            for row in rows:
+                url = row.url
+                if needs_resolution(url):
+                    url = canonical_url(await short_links.get_resolved(url) or url)
+                key = product_key_from_url(url)
+                if key not in product_ids:
+                    # Var olan ürünün fiyatı eski takip fiyatıyla ezilmesin
+                    product = await repo.get_by_key(key)
+                    if product is None:
+                        product = await repo.get_or_create(
+                            product_key=key,
+                            url=url,
+                            title=row.title,
+                            image_url=row.image_url,
+                            price=row.last_price,
+                        )
+                    product_ids[key] = product.id
+                updates.append({"b_id": row.id, "b_product_id": product_ids[key]})
+            await session.execute(
+                update(table)
+                .where(table.c.id == bindparam("b_id"))
+                .values(product_id=bindparam("b_product_id")),
+                updates,
+            )
+            linked += len(updates)
+        await session.flush()
+    return linked
+
+
+async def migrate(conn: AsyncConnection) -> list[str]:
+    """Eksik tabloları oluştur, eksik sütunları ekle ve veriyi doldur
+
+    Açık bir transaction (engine.begin()) içinde çağrılmalıdır. Eklemeden
+    sonra tablolar modellerle eşleşmiyorsa veri doldurulmadan RuntimeError
+    fırlatılır. Eklenen sütunları döndürür.
+    """
+    await conn.run_sync(Base.metadata.create_all)
+    added = await conn.run_sync(add_missing_columns)
+    missing = await conn.run_sync(missing_columns)
+    if missing:
+        raise RuntimeError(
+            "Database schema does not match the models and could not be migrated, "
+            f"missing: {', '.join(missing)}. Add them manually or recreate the "
+            "database with init_db.py (deletes all data)."
+        )
+    linked = await backfill_tracking_products(conn)
+    if added or linked:
+        log.info("Database migrated", extra={"added_columns": added, "linked_tracking_items": linked})
+    return added
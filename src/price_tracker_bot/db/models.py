@@ -1,15 +1,49 @@
 from __future__ import annotations
 
-from sqlalchemy import BigInteger, Boolean, Float, Integer, String, DateTime, func
+from sqlalchemy import BigInteger, Boolean, Float, ForeignKey, Index, Integer, String, Text, DateTime, UniqueConstraint, func
 from sqlalchemy.orm import Mapped, mapped_column
 
 from .base import Base
 
+class Product(Base):
+    """Birden fazla sohbetin takip edebildiği tekil ürün (her döngüde bir kez çekilir)"""
+    __tablename__ = "products"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    # Trendyol URL'indeki "-p-<id>" kısmı (yoksa normalize edilmiş URL)
+    product_key: Mapped[str] = mapped_column(String(256), unique=True, index=True, nullable=False)
+
+    url: Mapped[str] = mapped_column(String(2048), nullable=False)
+
+    title: Mapped[str | None] = mapped_column(String(512), nullable=True)
+    image_url: Mapped[str | None] = mapped_column(String(2048), nullable=True)
+    last_price: Mapped[float | None] = mapped_column(Float, nullable=True)
+
+    # Koşullu istek doğrulayıcıları ve son yanıtın fiyat bölgesi hash'i
+    etag: Mapped[str | None] = mapped_column(String(256), nullable=True)
+    last_modified: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    content_hash: Mapped[str | None] = mapped_column(String(64), nullable=True)
+
+    # Uyarlanır kontrol planı: vadesi gelen ürünler indeksli sorguyla seçilir,
+    # volatilite (0..1) fiyatı sık değişen ürünlerin daha sık kontrolünü sağlar
+    next_check_at: Mapped[object] = mapped_column(DateTime(timezone=True), index=True, server_default=func.now())
+    volatility: Mapped[float] = mapped_column(Float, nullable=False, default=0.5, server_default="0.5")
+    # Çok işçili kontrol: ürünü şu an kontrol eden işçinin talep jetonu ve
+    # talebin geçerlilik süresi (süresi dolan talep başka işçiye düşer)
+    lease_owner: Mapped[str | None] = mapped_column(String(128), nullable=True)
+    lease_until: Mapped[object | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    created_at: Mapped[object] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    updated_at: Mapped[object] = mapped_column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
 class TrackingItem(Base):
     __tablename__ = "tracking_items"
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     chat_id: Mapped[int] = mapped_column(BigInteger, index=True)
+    product_id: Mapped[int | None] = mapped_column(
+        ForeignKey("products.id", ondelete="SET NULL"), index=True, nullable=True
+    )
 
     url: Mapped[str] = mapped_column(String(2048), nullable=False)
 
@@ -24,4 +58,85 @@ class TrackingItem(Base):
     is_active: Mapped[bool] = mapped_column(Boolean, nullable=False, default=True)
 
     created_at: Mapped[object] = mapped_column(DateTime(timezone=True), server_default=func.now())
-    updated_at: Mapped[object] = mapped_column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
\ No newline at end of file
+    updated_at: Mapped[object] = mapped_column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+class ShortLink(Base):
+    """Çözümlenmiş kısa linkler (ty.gl -> kanonik Trendyol URL'i)"""
+    __tablename__ = "short_links"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    short_url: Mapped[str] = mapped_column(String(512), unique=True, index=True, nullable=False)
+    resolved_url: Mapped[str] = mapped_column(String(2048), nullable=False)
+
+    created_at: Mapped[object] = mapped_column(DateTime(timezone=True), server_default=func.now())
+
+class PriceObservation(Base):
+    """Ürün fiyatı her değiştiğinde eklenen ham kayıt (append-only)"""
+    __tablename__ = "price_observations"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    product_id: Mapped[int] = mapped_column(ForeignKey("products.id", ondelete="CASCADE"), index=True, nullable=False)
+    price: Mapped[float] = mapped_column(Float, nullable=False)
+    observed_at: Mapped[object] = mapped_column(DateTime(timezone=True), nullable=False)
+
+class PriceRollup(Base):
+    """Saatlik / günlük min-max-son fiyat özetleri (geçmiş sorguları buradan okur)"""
+    __tablename__ = "price_rollups"
+    __table_args__ = (UniqueConstraint("product_id", "granularity", "bucket_start"),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    product_id: Mapped[int] = mapped_column(ForeignKey("products.id", ondelete="CASCADE"), index=True, nullable=False)
+    granularity: Mapped[str] = mapped_column(String(8), nullable=False)  # "hour" | "day"
+    bucket_start: Mapped[object] = mapped_column(DateTime(timezone=True), nullable=False)
+
+    min_price: Mapped[float] = mapped_column(Float, nullable=False)
+    max_price: Mapped[float] = mapped_column(Float, nullable=False)
+    last_price: Mapped[float] = mapped_column(Float, nullable=False)
+    last_observed_at: Mapped[object] = mapped_column(DateTime(timezone=True), nullable=False)
+
+class AppState(Base):
+    """Arka plan işlerinin küçük durum kayıtları (ör. rollup kaldığı yer)"""
+    __tablename__ = "app_state"
+
+    key: Mapped[str] = mapped_column(String(64), primary_key=True)
+    value: Mapped[str] = mapped_column(String(1024), nullable=False)
+
+    updated_at: Mapped[object] = mapped_column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+class OutboxMessage(Base):
+    """Gönderilmeyi bekleyen bildirimler (checker yazar, sender boşaltır)"""
+    __tablename__ = "outbox_messages"
+    __table_args__ = (Index("ix_outbox_messages_due", "status", "next_attempt_at"),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    chat_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    tracking_item_id: Mapped[int | None] = mapped_column(
+        ForeignKey("tracking_items.id", ondelete="SET NULL"), nullable=True
+    )
+    text: Mapped[str] = mapped_column(Text, nullable=False)
+
+    # "pending" | "sent" | "failed"
+    status: Mapped[str] = mapped_column(String(16), nullable=False, default="pending", server_default="pending")
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    next_attempt_at: Mapped[object] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    last_error: Mapped[str | None] = mapped_column(String(512), nullable=True)
+    # Birden çok sender çalışırsa aynı mesajı iki kez göndermesin
+    lease_owner: Mapped[str | None] = mapped_column(String(128), nullable=True)
+    lease_until: Mapped[object | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    created_at: Mapped[object] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    sent_at: Mapped[object | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
+class ImageCache(Base):
+    """Telegram'a bir kez yüklenmiş ürün görselleri (tüm sohbetler aynı file_id'yi kullanır)"""
+    __tablename__ = "image_cache"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    # Görsel URL'inin sha256'sı (URL'ler indeks için fazla uzun olabilir)
+    url_hash: Mapped[str] = mapped_column(String(64), unique=True, index=True, nullable=False)
+    # İndirilen baytların sha256'sı: farklı URL'lerdeki aynı görsel tekrar yüklenmez
+    content_hash: Mapped[str] = mapped_column(String(64), index=True, nullable=False)
+    file_id: Mapped[str] = mapped_column(String(512), nullable=False)
+    size_bytes: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+    created_at: Mapped[object] = mapped_column(DateTime(timezone=True), server_default=func.now())
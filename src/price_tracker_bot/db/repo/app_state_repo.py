@@ -0,0 +1,23 @@
+from __future__ import annotations
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models import AppState
+
+class AppStateRepo:
+    def __init__(self, session: AsyncSession) -> None:
+        self.session = session
+
+    async def get(self, key: str) -> str | None:
+        q = select(AppState.value).where(AppState.key == key)
+        res = await self.session.execute(q)
+        return res.scalar_one_or_none()
+
+    async def set(self, key: str, value: str) -> None:
+        state = await self.session.get(AppState, key)
+        if state is None:
+            self.session.add(AppState(key=key, value=value))
+        else:
+            state.value = value
+        await self.session.flush()
@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+from sqlalchemy import delete, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models import ImageCache
+
+class ImageCacheRepo:
+    def __init__(self, session: AsyncSession) -> None:
+        self.session = session
+
+    async def get_file_id(self, url_hash: str) -> str | None:
+        q = select(ImageCache.file_id).where(ImageCache.url_hash == url_hash)
+        res = await self.session.execute(q)
+        return res.scalar_one_or_none()
+
+    async def get_file_id_by_content(self, content_hash: str) -> str | None:
+        q = select(ImageCache.file_id).where(ImageCache.content_hash == content_hash).limit(1)
+        res = await self.session.execute(q)
+        return res.scalar_one_or_none()
+
+    async def save(self, url_hash: str, content_hash: str, file_id: str, size_bytes: int) -> None:
+        """Yüklenen görseli kaydet (aynı URL eşzamanlı kaydedildiyse dokunma)"""
+        try:
+            async with self.session.begin_nested():
+                self.session.add(ImageCache(
+                    url_hash=url_hash,
+                    content_hash=content_hash,
+                    file_id=file_id,
+                    size_bytes=size_bytes,
+                ))
+        except IntegrityError:
+            pass
+
+    async def forget_url(self, url_hash: str) -> None:
+        await self.session.execute(delete(ImageCache).where(ImageCache.url_hash == url_hash))
+
+    async def forget_file_id(self, file_id: str) -> None:
+        """Telegram'ın artık kabul etmediği file_id'yi tüm URL'lerden sil"""
+        await self.session.execute(delete(ImageCache).where(ImageCache.file_id == file_id))
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from sqlalchemy import delete, func, insert, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models import OutboxMessage
+
+class OutboxRepo:
+    def __init__(self, session: AsyncSession) -> None:
+        self.session = session
+
+    async def enqueue_many(self, rows: list[dict]) -> None:
+        """Bildirimleri kuyruğa ekle: {"chat_id", "tracking_item_id", "text"}"""
+        if rows:
+            await self.session.execute(insert(OutboxMessage), rows)
+
+    async def claim_due(self, now: datetime, limit: int, owner: str, lease_until: datetime) -> list[OutboxMessage]:
+        """Gönderim zamanı gelmiş bekleyen mesajları kirala (ProductRepo.claim_due ile aynı yöntem)"""
+        due = (
+            select(OutboxMessage.id)
+            .where(
+                OutboxMessage.status == "pending",
+                OutboxMessage.next_attempt_at <= now,
+                or_(OutboxMessage.lease_until.is_(None), OutboxMessage.lease_until < now),
+            )
+            .order_by(OutboxMessage.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        claim = (
+            update(OutboxMessage)
+            .where(OutboxMessage.id.in_(due.scalar_subquery()))
+            .values(lease_owner=owner, lease_until=lease_until)
+        )
+        if self.session.get_bind().dialect.update_returning:
+            res = await self.session.execute(
+                claim.returning(OutboxMessage).execution_options(populate_existing=True, synchronize_session=False)
+            )
+            return sorted(res.scalars().all(), key=lambda m: m.id)
+
+        await self.session.execute(claim.execution_options(synchronize_session=False))
+        q = select(OutboxMessage).where(OutboxMessage.lease_owner == owner).order_by(OutboxMessage.id)
+        res = await self.session.execute(q)
+        return list(res.scalars().all())
+
+    async def bulk_finish(self, rows: list[dict]) -> None:
+        """Gönderim sonuçlarını yaz ve kirayı bırak
+
+        rows: {"id", "status", "attempts", "next_attempt_at", "last_error", "sent_at"}
+        """
+        if rows:
+            await self.session.execute(
+                update(OutboxMessage),
+                [{**row, "lease_owner": None, "lease_until": None} for row in rows],
+            )
+
+    async def count_pending(self) -> int:
+        q = select(func.count()).select_from(OutboxMessage).where(OutboxMessage.status == "pending")
+        res = await self.session.execute(q)
+        return int(res.scalar_one())
+
+    async def delete_finished(self, before: datetime, limit: int) -> int:
+        """`before`'dan önce oluşturulmuş gönderilmiş / başarısız mesajları sil
+
+        Uzun süren tek bir DELETE kilit tutmasın diye en fazla `limit` satır
+        silinir; silinen sayıyı döndürür.
+        """
+        finished = (
+            select(OutboxMessage.id)
+            .where(OutboxMessage.status.in_(("sent", "failed")), OutboxMessage.created_at < before)
+            .limit(limit)
+        )
+        res = await self.session.execute(
+            delete(OutboxMessage)
+            .where(OutboxMessage.id.in_(finished.scalar_subquery()))
+            .execution_options(synchronize_session=False)
+        )
+        return res.rowcount or 0
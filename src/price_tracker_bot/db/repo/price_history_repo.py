@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models import PriceObservation, PriceRollup
+
+class PriceHistoryRepo:
+    def __init__(self, session: AsyncSession) -> None:
+        self.session = session
+
+    async def observations_after(self, after_id: int, limit: int) -> list[PriceObservation]:
+        """Verilen id'den sonraki ham gözlemler (id sırasıyla)"""
+        q = (
+            select(PriceObservation)
+            .where(PriceObservation.id > after_id)
+            .order_by(PriceObservation.id)
+            .limit(limit)
+        )
+        res = await self.session.execute(q)
+        return list(res.scalars().all())
+
+    async def rollups_for(
+        self,
+        product_ids: set[int],
+        granularity: str,
+        since: datetime,
+    ) -> list[PriceRollup]:
+        """Birleştirme için mevcut özet satırları"""
+        q = select(PriceRollup).where(
+            PriceRollup.product_id.in_(product_ids),
+            PriceRollup.granularity == granularity,
+            PriceRollup.bucket_start >= since,
+        )
+        res = await self.session.execute(q)
+        return list(res.scalars().all())
+
+    async def list_rollups(self, product_id: int, granularity: str, since: datetime) -> list[PriceRollup]:
+        """Bir ürünün özetleri, eskiden yeniye"""
+        q = (
+            select(PriceRollup)
+            .where(
+                PriceRollup.product_id == product_id,
+                PriceRollup.granularity == granularity,
+                PriceRollup.bucket_start >= since,
+            )
+            .order_by(PriceRollup.bucket_start)
+        )
+        res = await self.session.execute(q)
+        return list(res.scalars().all())
+
+    async def last_rollup_before(self, product_id: int, granularity: str, before: datetime) -> PriceRollup | None:
+        """`before`'dan önceki son özet (son fiyatı o anda geçerli olan fiyattır)"""
+        q = (
+            select(PriceRollup)
+            .where(
+                PriceRollup.product_id == product_id,
+                PriceRollup.granularity == granularity,
+                PriceRollup.bucket_start < before,
+            )
+            .order_by(PriceRollup.bucket_start.desc())
+            .limit(1)
+        )
+        res = await self.session.execute(q)
+        return res.scalar_one_or_none()
@@ -0,0 +1,211 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+
+from sqlalchemy import exists, insert, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only
+
+from ..models import PriceObservation, Product, TrackingItem
+
+class ProductRepo:
+    def __init__(self, session: AsyncSession) -> None:
+        self.session = session
+
+    async def get_by_key(self, product_key: str) -> Product | None:
+        q = select(Product).where(Product.product_key == product_key)
+        res = await self.session.execute(q)
+        return res.scalar_one_or_none()
+
+    async def get_or_create(
+        self,
+        product_key: str,
+        url: str,
+        title: str | None = None,
+        image_url: str | None = None,
+        price: float | None = None,
+    ) -> Product:
+        """Anahtara göre ürünü getir, yoksa oluştur; bilgileri güncel tut"""
+        product = await self.get_by_key(product_key)
+        if product is None:
+            try:
+                # Aynı ürün başka bir istekte eşzamanlı eklenirse unique hatası
+                # sadece bu savepoint'i geri alır
+                async with self.session.begin_nested():
+                    product = Product(
+                        product_key=product_key,
+                        url=url,
+                        title=title,
+                        image_url=image_url,
+                        last_price=price,
+                    )
+                    self.session.add(product)
+                if price is not None:
+                    await self.record_price(product.id, price)
+                return product
+            except IntegrityError:
+                product = await self.get_by_key(product_key)
+                if product is None:
+                    raise
+
+        if title:
+            product.title = title
+        if image_url:
+            product.image_url = image_url
+        if price is not None and price != product.last_price:
+            product.last_price = price
+            await self.record_price(product.id, price)
+            # Fiyat döngü dışında değişti; bir sonraki kontrol tam parse etsin
+            product.etag = None
+            product.last_modified = None
+            product.content_hash = None
+        await self.session.flush()
+        return product
+
+    async def list_active_after(self, after_id: int, limit: int) -> list[Product]:
+        """Keyset sayfalama: id'si `after_id`'den büyük, aktif takibi olan ürünler
+
+        Sadece fiyat kontrolünün ihtiyaç duyduğu kolonlar yüklenir.
+        """
+        has_active = exists().where(TrackingItem.product_id == Product.id, TrackingItem.is_active == True)
+        q = (
+            select(Product)
+            .options(load_only(
+                Product.id,
+                Product.url,
+                Product.last_price,
+                Product.etag,
+                Product.last_modified,
+                Product.content_hash,
+            ))
+            .where(has_active, Product.id > after_id)
+            .order_by(Product.id)
+            .limit(limit)
+        )
+        res = await self.session.execute(q)
+        return list(res.scalars().all())
+
+    async def claim_due(self, now: datetime, limit: int, owner: str, lease_until: datetime) -> list[Product]:
+        """Vadesi gelmiş ve talep edilmemiş (ya da talebi süresi dolmuş) ürünleri kirala
+
+        Tek bir UPDATE ... WHERE id IN (SELECT ... LIMIT n) ifadesi kullanılır.
+        Postgres'te alt sorgu FOR UPDATE SKIP LOCKED ile başka işçilerin
+        kilitlediği satırları atlar; SQLite yazımları zaten tek tek
+        sıraladığından aynı ifade orada da atomiktir. Kiralanan satırlar
+        `UPDATE ... RETURNING` ile döner; desteklemeyen sürümlerde `owner`
+        jetonuyla geri okunur (her talep için tekil olmalıdır).
+        """
+        has_active = exists().where(TrackingItem.product_id == Product.id, TrackingItem.is_active == True)
+        due = (
+            select(Product.id)
+            .where(
+                Product.next_check_at <= now,
+                or_(Product.lease_until.is_(None), Product.lease_until < now),
+                has_active,
+            )
+            .order_by(Product.next_check_at, Product.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        claim = (
+            update(Product)
+            .where(Product.id.in_(due.scalar_subquery()))
+            .values(lease_owner=owner, lease_until=lease_until)
+        )
+        columns = load_only(
+            Product.id,
+            Product.url,
+            Product.last_price,
+            Product.etag,
+            Product.last_modified,
+            Product.content_hash,
+            Product.volatility,
+            Product.next_check_at,
+        )
+        if self.session.get_bind().dialect.update_returning:
+            # Kiralanan satırlar aynı sorguyla döner; RETURNING sırası garanti değil
+            res = await self.session.execute(
+                claim.returning(Product).options(columns)
+                .execution_options(populate_existing=True, synchronize_session=False)
+            )
+            return sorted(res.scalars().all(), key=lambda p: (p.next_check_at, p.id))
+
+        await self.session.execute(claim.execution_options(synchronize_session=False))
+        q = (
+            select(Product)
+            .options(columns)
+            .where(Product.lease_owner == owner)
+            .order_by(Product.next_check_at, Product.id)
+        )
+        res = await self.session.execute(q)
+        return list(res.scalars().all())
+
+    async def bulk_reschedule(self, rows: list[dict]) -> None:
+        """Kontrolü biten ürünleri yeniden planla ve talebi bırak
+
+        rows: {"id", "volatility", "next_check_at"}
+        """
+        if rows:
+            await self.session.execute(
+                update(Product),
+                [{**row, "lease_owner": None, "lease_until": None} for row in rows],
+            )
+
+    async def record_price(self, product_id: int, price: float, observed_at: datetime | None = None) -> None:
+        """Fiyat geçmişine gözlem ekle (sadece fiyat değiştiğinde çağrılır)"""
+        self.session.add(
+            PriceObservation(
+                product_id=product_id,
+                price=price,
+                observed_at=observed_at or datetime.now(timezone.utc),
+            )
+        )
+        await self.session.flush()
+
+    async def bulk_update_prices(self, rows: list[dict]) -> None:
+        """Birden çok ürünün fiyatını tek executemany UPDATE ile yaz
+
+        rows: {"id", "last_price", "etag", "last_modified", "content_hash"}
+        """
+        if rows:
+            await self.session.execute(update(Product), rows)
+
+    async def bulk_record_prices(self, rows: list[dict]) -> None:
+        """Fiyat geçmişine toplu gözlem ekle: {"product_id", "price", "observed_at"}"""
+        if rows:
+            await self.session.execute(insert(PriceObservation), rows)
+
+    async def update_info(self, product_id: int, title: str | None, image_url: str | None) -> bool:
+        """Başlık ve görseli güncelle (boş değerler mevcut bilgiyi ezmez)"""
+        values = {}
+        if title:
+            values["title"] = title
+        if image_url:
+            values["image_url"] = image_url
+        if not values:
+            return False
+        q = update(Product).where(Product.id == product_id).values(**values)
+        res = await self.session.execute(q)
+        return (res.rowcount or 0) > 0
+
+    async def relink(self, product_id: int, product_key: str, url: str) -> int:
+        """Ürünü çözülmüş (kanonik) URL'ine taşı, geçerli ürün id'sini döndür
+
+        Anahtar zaten başka bir üründeyse takipler o ürüne bağlanır ve onun
+        id'si döner; eski ürünün aktif takibi kalmadığı için kontrole girmez.
+        """
+        existing = (await self.session.execute(
+            select(Product.id).where(Product.product_key == product_key)
+        )).scalar_one_or_none()
+        if existing is not None and existing != product_id:
+            await self.session.execute(
+                update(TrackingItem)
+                .where(TrackingItem.product_id == product_id)
+                .values(product_id=existing)
+            )
+            return existing
+        await self.session.execute(
+            update(Product).where(Product.id == product_id).values(product_key=product_key, url=url)
+        )
+        return product_id
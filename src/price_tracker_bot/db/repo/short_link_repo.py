@@ -0,0 +1,24 @@
+from __future__ import annotations
+
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models import ShortLink
+
+class ShortLinkRepo:
+    def __init__(self, session: AsyncSession) -> None:
+        self.session = session
+
+    async def get_resolved(self, short_url: str) -> str | None:
+        q = select(ShortLink.resolved_url).where(ShortLink.short_url == short_url)
+        res = await self.session.execute(q)
+        return res.scalar_one_or_none()
+
+    async def save(self, short_url: str, resolved_url: str) -> None:
+        """Çözümlenmiş linki kaydet (zaten varsa dokunma)"""
+        try:
+            async with self.session.begin_nested():
+                self.session.add(ShortLink(short_url=short_url, resolved_url=resolved_url))
+        except IntegrityError:
+            pass
@@ -1,7 +1,8 @@
 from __future__ import annotations
 
-from sqlalchemy import delete, select, update
+from sqlalchemy import bindparam, delete, func, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only
 
 from ..models import TrackingItem
 
@@ -16,9 +17,11 @@ class TrackingRepo:
         baseline_price: float,
         title: str | None = None,
         image_url: str | None = None,
+        product_id: int | None = None,
     ) -> TrackingItem:
         item = TrackingItem(
             chat_id=chat_id,
+            product_id=product_id,
             url=url,
             baseline_price=baseline_price,
             last_price=baseline_price,
@@ -31,8 +34,42 @@ class TrackingRepo:
         await self.session.flush()
         return item
 
-    async def list_by_chat(self, chat_id: int) -> list[TrackingItem]:
-        q = select(TrackingItem).where(TrackingItem.chat_id == chat_id).order_by(TrackingItem.id.desc())
+    async def count_by_chat(self, chat_id: int) -> int:
+        q = select(func.count()).select_from(TrackingItem).where(TrackingItem.chat_id == chat_id)
+        res = await self.session.execute(q)
+        return int(res.scalar_one())
+
+    async def list_page(
+        self,
+        chat_id: int,
+        limit: int,
+        before_id: int | None = None,
+        after_id: int | None = None,
+    ) -> list[TrackingItem]:
+        """Keyset sayfalama, yeniden eskiye (id azalan)
+
+        before_id: bu id'den eski sonraki sayfa; after_id: bu id'den yeni
+        önceki sayfa. İkisi de yoksa ilk sayfa.
+        """
+        q = (
+            select(TrackingItem)
+            .options(load_only(
+                TrackingItem.id,
+                TrackingItem.title,
+                TrackingItem.is_active,
+                TrackingItem.last_price,
+                TrackingItem.threshold_pct,
+            ))
+            .where(TrackingItem.chat_id == chat_id)
+        )
+        if after_id is not None:
+            # Önceki sayfa: artan sırayla oku, sonra ters çevir
+            q = q.where(TrackingItem.id > after_id).order_by(TrackingItem.id.asc()).limit(limit)
+            res = await self.session.execute(q)
+            return list(reversed(res.scalars().all()))
+        if before_id is not None:
+            q = q.where(TrackingItem.id < before_id)
+        q = q.order_by(TrackingItem.id.desc()).limit(limit)
         res = await self.session.execute(q)
         return list(res.scalars().all())
 
@@ -46,47 +83,86 @@ class TrackingRepo:
         res = await self.session.execute(q)
         return (res.rowcount or 0) > 0
 
-    async def set_active(self, chat_id: int, item_id: int, active: bool) -> bool:
+    async def _update_returning(self, chat_id: int, item_id: int, **values) -> TrackingItem | None:
+        """Takibi güncelle ve güncel satırı aynı sorguyla döndür
+
+        Postgres ve SQLite >= 3.35 `UPDATE ... RETURNING` destekler: buton
+        başına tek round-trip. Desteklemeyen sürümlerde UPDATE + SELECT.
+        """
         q = (
             update(TrackingItem)
             .where(TrackingItem.chat_id == chat_id, TrackingItem.id == item_id)
-            .values(is_active=active)
+            .values(**values)
         )
+        if self.session.get_bind().dialect.update_returning:
+            res = await self.session.execute(
+                q.returning(TrackingItem).execution_options(populate_existing=True)
+            )
+            return res.scalar_one_or_none()
+
         res = await self.session.execute(q)
-        return (res.rowcount or 0) > 0
+        if not res.rowcount:
+            return None
+        return await self.get(chat_id=chat_id, item_id=item_id)
+
+    async def set_active(self, chat_id: int, item_id: int, active: bool) -> TrackingItem | None:
+        return await self._update_returning(chat_id, item_id, is_active=active)
 
-    async def set_threshold(self, chat_id: int, item_id: int, pct: float) -> bool:
+    async def set_threshold(self, chat_id: int, item_id: int, pct: float) -> TrackingItem | None:
         if pct < 0:
             pct = 0.0
+        return await self._update_returning(chat_id, item_id, threshold_pct=float(pct))
+
+    async def set_image_url(self, chat_id: int, item_id: int, image_url: str) -> bool:
+        """Görsel URL'ini güncelle, eski file_id geçersiz sayılır"""
         q = (
             update(TrackingItem)
             .where(TrackingItem.chat_id == chat_id, TrackingItem.id == item_id)
-            .values(threshold_pct=float(pct))
+            .values(image_url=image_url, telegram_file_id=None)
         )
         res = await self.session.execute(q)
         return (res.rowcount or 0) > 0
 
-    async def set_telegram_file_id(self, chat_id: int, item_id: int, file_id: str) -> bool:
+    async def list_active_for_products(self, product_ids: list[int]) -> dict[int, list[TrackingItem]]:
+        """Verilen ürünlerin aktif takipleri, ürüne göre gruplu
+
+        Bildirim ve eşik kontrolü için gereken kolonlar dışındakiler
+        (görsel URL'i, file_id, tarihler) yüklenmez.
+        """
+        if not product_ids:
+            return {}
         q = (
-            update(TrackingItem)
-            .where(TrackingItem.chat_id == chat_id, TrackingItem.id == item_id)
-            .values(telegram_file_id=file_id)
+            select(TrackingItem)
+            .options(load_only(
+                TrackingItem.id,
+                TrackingItem.chat_id,
+                TrackingItem.product_id,
+                TrackingItem.url,
+                TrackingItem.title,
+                TrackingItem.baseline_price,
+                TrackingItem.last_price,
+                TrackingItem.threshold_pct,
+            ))
+            .where(TrackingItem.is_active == True, TrackingItem.product_id.in_(product_ids))
+            .order_by(TrackingItem.product_id, TrackingItem.id)
         )
         res = await self.session.execute(q)
-        return (res.rowcount or 0) > 0
-    
-    async def list_active(self) -> list[TrackingItem]:
-        """Tüm aktif ürünleri getir"""
-        q = select(TrackingItem).where(TrackingItem.is_active == True)
-        res = await self.session.execute(q)
-        return list(res.scalars().all())
-    
-    async def update_price(self, item_id: int, new_price: float) -> bool:
-        """Ürünün son fiyatını güncelle"""
+        grouped: dict[int, list[TrackingItem]] = {}
+        for item in res.scalars():
+            grouped.setdefault(item.product_id, []).append(item)
+        return grouped
+
+    async def bulk_update_price_for_products(self, rows: list[dict]) -> None:
+        """Birden çok ürünün aktif takipçilerini tek executemany UPDATE ile güncelle
+
+        rows: {"b_product_id", "b_price"}
+        """
+        if not rows:
+            return
+        table = TrackingItem.__table__
         q = (
-            update(TrackingItem)
-            .where(TrackingItem.id == item_id)
-            .values(last_price=new_price)
+            update(table)
+            .where(table.c.product_id == bindparam("b_product_id"), table.c.is_active == True)
+            .values(last_price=bindparam("b_price"))
         )
-        res = await self.session.execute(q)
-        return (res.rowcount or 0) > 0
\ No newline at end of file
+        await self.session.execute(q, rows)
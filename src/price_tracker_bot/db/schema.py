@@ -0,0 +1,84 @@
+"""Şema sürümü kontrolü (açılışta tek sorgu)
+
+Modellerdeki tablo / sütun / index tanımlarından kısa bir parmak izi
+hesaplanır ve app_state'te `schema_version` anahtarıyla saklanır. Açılışta
+sadece bu satır okunur; eşleşiyorsa şema hazırdır ve `create_all`'un tablo
+başına yaptığı varlık sorguları atlanır. Satır yoksa ya da parmak izi
+değişmişse şema geçişi çalışır (bkz. migrations.py: eksik tablolar ve
+sütunlar eklenir, veri silinmez). Sürüm ancak veritabanındaki tabloların
+sütunları modellerle eşleşiyorsa yazılır; eşleşmiyorsa açılış hata ile
+durur, eksik şema güncelmiş gibi işaretlenmez.
+"""
+from __future__ import annotations
+
+import hashlib
+import logging
+
+from sqlalchemy import MetaData, delete, insert, select
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+from . import models  # noqa: F401  (tablolar Base.metadata'ya kaydolsun)
+from .base import Base
+from .migrations import migrate
+from .models import AppState
+
+log = logging.getLogger(__name__)
+
+SCHEMA_KEY = "schema_version"
+
+
+def schema_version(metadata: MetaData = Base.metadata) -> str:
+    """Tablo, sütun ve index tanımlarının kısa hash'i"""
+    parts = []
+    for table in sorted(metadata.tables.values(), key=lambda t: t.name):
+        parts.append(table.name)
+        parts.extend(
+            f"{c.name}:{c.type}:{int(c.nullable)}:{int(c.primary_key)}"
+            for c in table.columns
+        )
+        parts.extend(sorted(
+            f"ix:{ix.name}:{','.join(c.name for c in ix.columns)}:{int(bool(ix.unique))}"
+            for ix in table.indexes
+        ))
+    return hashlib.sha256("\n".join(parts).encode()).hexdigest()[:16]
+
+
+async def read_schema_version(conn: AsyncConnection) -> str | None:
+    """Kayıtlı şema sürümü (app_state tablosu henüz yoksa None)"""
+    try:
+        result = await conn.execute(select(AppState.value).where(AppState.key == SCHEMA_KEY))
+    except DBAPIError:
+        return None
+    return result.scalar_one_or_none()
+
+
+async def write_schema_version(conn: AsyncConnection, version: str | None = None) -> None:
+    """Şema sürümünü app_state'e yaz (açık transaction içinde çağrılmalı)"""
+    await conn.execute(delete(AppState).where(AppState.key == SCHEMA_KEY))
+    await conn.execute(insert(AppState).values(key=SCHEMA_KEY, value=version or schema_version()))
+
+
+async def ensure_schema(engine: AsyncEngine) -> bool:
+    """Şema güncelse tek sorguyla dön; değilse şema geçişini çalıştır
+
+    Geçişten sonra tüm tablo ve sütunlar doğrulanır; eksik kalan varsa
+    (ör. varsayılanı olmayan NOT NULL sütun) sürüm yazılmaz ve RuntimeError
+    fırlatılır. Geçiş çalıştıysa / sürüm yazıldıysa True döner.
+    """
+    expected = schema_version()
+    async with engine.connect() as conn:
+        current = await read_schema_version(conn)
+    if current == expected:
+        return False
+
+    async with engine.begin() as conn:
+        # Geçiş sonunda sütunlar modellerle eşleşmiyorsa RuntimeError: sürüm
+        # yazılmaz, sonraki açılış kontrolü tekrarlar (Postgres'te DDL de geri alınır)
+        added = await migrate(conn)
+        await write_schema_version(conn, expected)
+    log.info(
+        "Database schema verified" if current is None else "Database schema upgraded",
+        extra={"schema_version": expected, "previous": current, "added_columns": added},
+    )
+    return True
@@ -1,3 +1,8 @@
+import time
+
+# Açılış süresi ağır importlar (aiogram, SQLAlchemy) dahil ölçülsün
+_STARTED = time.perf_counter()
+
 import asyncio
 from aiogram import Bot
 from aiogram.types import Update
@@ -7,22 +12,33 @@ from aiohttp import web
 
 from .config import load_settings
 from .db.engine import build_engine, build_sessionmaker
-from .db.base import Base
+from .db.schema import ensure_schema
 from .bot.dispatcher import build_dispatcher
-from .services.price_checker import PriceCheckerService
-
-async def init_database(engine):
-    """Veritabanı tablolarını oluştur"""
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
-    print("✅ Database tables created successfully")
+from .bot.webhook import PooledRequestHandler
+from .services.notification_sender import build_notification_sender
+from .services.http_client import configure_http_client, close_http_client
+from .services.image_cache import configure_image_cache
+from .services.log import setup_logging, stop_logging
+from .services.metrics import metrics_handler, start_metrics_server
+from .services.parse_pool import start_parse_pool, close_parse_pool
+from .services.profiling import register_profiling_routes, start_profiler
+from .services.price_checker import build_price_checker, schedule_price_checks
+from .services.price_history import PriceHistoryService
+from .services.product_enrichment import product_service
+from .services.startup import StartupTimer
 
 async def health_check(request):
     """Health check endpoint for Render"""
     return web.Response(text="OK", status=200)
 
 async def main() -> None:
+    # Açılışın aşamalara dağılımı "Startup done" logunda ve /metrics'te
+    startup = StartupTimer(_STARTED)
+    startup.mark("imports")
     settings = load_settings()
+    # Servis logları kuyruk üzerinden, arka plan thread'inde yazılır (LOG_*)
+    setup_logging(settings)
+    startup.mark("config")
     
     # Debug: Hangi database kullanıldığını göster
     print(f"📊 Database URL: {settings.database_url[:50]}...")
@@ -32,69 +48,155 @@ async def main() -> None:
     engine = build_engine(settings.database_url)
     sessionmaker = build_sessionmaker(engine)
     
-    # Veritabanı tablolarını oluştur (yoksa)
-    await init_database(engine)
+    # Şema sürümü tek sorguyla kontrol edilir; tablolar sadece sürüm
+    # yoksa / değiştiyse oluşturulur (bkz. db/schema.py)
+    await ensure_schema(engine)
+    startup.mark("database")
+
+    # Scraper ve görsel indirme için paylaşılan HTTP client (keep-alive);
+    # httpx ve client ilk istekte kurulur
+    configure_http_client(settings)
+    # Hash / parse işleri event loop dışında (PARSE_POOL)
+    start_parse_pool(settings)
+    product_service.set_parser_backend(settings.parser_backend, embedded_state=settings.parser_embedded_state)
+    # İsteğe bağlı CPU / bellek profili (PROFILE_*)
+    profiler = start_profiler(settings)
+    configure_image_cache(settings)
+    startup.mark("services")
 
     dp = build_dispatcher(sessionmaker)
+    startup.mark("dispatcher")
     
     # Otomatik fiyat kontrolü için scheduler
-    price_checker = PriceCheckerService(bot, sessionmaker)
     scheduler = AsyncIOScheduler()
     
-    # Her 5 dakikada bir fiyat kontrolü yap
+    if settings.checker_enabled:
+        # Kısa aralıklı turlarla sadece vadesi gelen ürünleri kontrol et; ayrı
+        # işçi süreçleri (worker.py) varsa ürünler aralarında kirayla paylaşılır
+        price_checker = build_price_checker(sessionmaker, settings)
+        schedule_price_checks(scheduler, price_checker, settings)
+    
+    # Fiyat geçmişi özetlerini (saatlik / günlük) 10 dakikada bir güncelle
+    price_history = PriceHistoryService(sessionmaker)
     scheduler.add_job(
-        price_checker.check_all_prices,
+        price_history.run_rollups,
         'interval',
-        minutes=5,
-        id='price_checker',
+        minutes=10,
+        id='price_rollups',
         replace_existing=True
     )
     
+    if settings.profile_memory_interval_min:
+        # Uzun çalışmada bellek büyümesini izlemek için periyodik tracemalloc görüntüsü
+        scheduler.add_job(
+            profiler.memory_snapshot,
+            'interval',
+            minutes=settings.profile_memory_interval_min,
+            id='memory_snapshot',
+            replace_existing=True
+        )
+    
     scheduler.start()
-    print("✅ Scheduler başlatıldı - Her 5 dakikada fiyat kontrolü yapılacak")
     
-    # Webhook veya polling modunu seç
-    if settings.webhook_url:
-        # Webhook modu (Render için)
-        print(f"🌐 Webhook modu - {settings.webhook_url}")
-        
-        # Webhook'u ayarla
-        webhook_path = "/webhook"
-        await bot.set_webhook(
-            url=f"{settings.webhook_url}{webhook_path}",
-            drop_pending_updates=True
+    # Fiyat düşüş bildirimleri outbox'tan, Telegram limitlerine uyularak gönderilir
+    notification_sender = build_notification_sender(bot, sessionmaker, settings)
+    notification_sender.start()
+    # Saklama süresi dolan gönderilmiş / başarısız outbox satırlarını sil
+    scheduler.add_job(
+        notification_sender.purge_finished,
+        'interval',
+        hours=1,
+        id='outbox_cleanup',
+        replace_existing=True
+    )
+    if settings.checker_enabled:
+        print(
+            f"✅ Scheduler başlatıldı - {settings.check_tick_seconds} sn'de bir vadesi gelen ürünler "
+            f"kontrol edilecek (en fazla {settings.check_rate_per_min:g}/dk)"
         )
+    else:
+        print("✅ Scheduler başlatıldı - fiyat kontrolü bu süreçte kapalı (CHECKER_ENABLED=0)")
+    startup.mark("scheduler")
+    
+    metrics_runner = None
+    runner = None
+    try:
+        # Webhook veya polling modunu seç
+        if settings.webhook_url:
+            # Webhook modu (Render için)
+            print(f"🌐 Webhook modu - {settings.webhook_url}")
         
-        # Aiohttp app oluştur
-        app = web.Application()
+            # Webhook'u ayarla
+            webhook_path = "/webhook"
+            await bot.set_webhook(
+                url=f"{settings.webhook_url}{webhook_path}",
+                drop_pending_updates=True
+            )
         
-        # Health check endpoint
-        app.router.add_get("/health", health_check)
+            # Aiohttp app oluştur
+            app = web.Application()
         
-        # Aiogram'ın built-in webhook handler'ını kullan
-        webhook_requests_handler = SimpleRequestHandler(
-            dispatcher=dp,
-            bot=bot,
-        )
-        webhook_requests_handler.register(app, path=webhook_path)
+            # Health check endpoint
+            app.router.add_get("/health", health_check)
+            # Prometheus metrikleri
+            app.router.add_get("/metrics", metrics_handler)
+            # PROFILE_TOKEN ayarlıysa /debug/profile ve /debug/memory
+            register_profiling_routes(app)
         
-        # Web sunucuyu başlat
-        runner = web.AppRunner(app)
-        await runner.setup()
-        site = web.TCPSite(runner, '0.0.0.0', settings.port)
-        await site.start()
+            if settings.update_workers:
+                # Güncellemeler sınırlı, sohbet bazlı sıralı işçi havuzunda (UPDATE_WORKERS)
+                webhook_requests_handler = PooledRequestHandler(
+                    dispatcher=dp,
+                    bot=bot,
+                    workers=settings.update_workers,
+                    queue_size=settings.update_queue_size,
+                    enqueue_timeout=settings.update_enqueue_timeout,
+                )
+            else:
+                # Aiogram'ın built-in webhook handler'ını kullan
+                webhook_requests_handler = SimpleRequestHandler(
+                    dispatcher=dp,
+                    bot=bot,
+                )
+            webhook_requests_handler.register(app, path=webhook_path)
         
-        print(f"✅ Bot webhook modunda çalışıyor - Port: {settings.port}")
-        print(f"✅ Health check: http://0.0.0.0:{settings.port}/health")
-        print(f"✅ Webhook: {settings.webhook_url}{webhook_path}")
+            # Web sunucuyu başlat
+            runner = web.AppRunner(app)
+            await runner.setup()
+            site = web.TCPSite(runner, '0.0.0.0', settings.port)
+            await site.start()
         
-        # Sonsuza kadar çalışmaya devam et
-        await asyncio.Event().wait()
-    else:
-        # Polling modu (Local için)
-        print("🔄 Polling modu - Local development")
-        await bot.delete_webhook(drop_pending_updates=True)
-        await dp.start_polling(bot)
+            print(f"✅ Bot webhook modunda çalışıyor - Port: {settings.port}")
+            print(f"✅ Health check: http://0.0.0.0:{settings.port}/health")
+            print(f"✅ Metrics: http://0.0.0.0:{settings.port}/metrics")
+            print(f"✅ Webhook: {settings.webhook_url}{webhook_path}")
+            startup.mark("webhook")
+            startup.report("bot")
+        
+            # Sonsuza kadar çalışmaya devam et
+            await asyncio.Event().wait()
+        else:
+            # Polling modu (Local için)
+            print("🔄 Polling modu - Local development")
+            if settings.metrics_port:
+                metrics_runner = await start_metrics_server(settings.metrics_port)
+            await bot.delete_webhook(drop_pending_updates=True)
+            startup.mark("webhook")
+            startup.report("bot")
+            await dp.start_polling(bot)
+    finally:
+        if runner is not None:
+            # Webhook'u kapat; havuz kullanılıyorsa kuyruktaki güncellemeler işlenir
+            await runner.cleanup()
+        scheduler.shutdown(wait=False)
+        await notification_sender.stop()
+        if metrics_runner is not None:
+            await metrics_runner.cleanup()
+        await close_http_client()
+        close_parse_pool()
+        await bot.session.close()
+        await engine.dispose()
+        stop_logging()
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
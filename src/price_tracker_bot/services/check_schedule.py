@@ -0,0 +1,43 @@
+"""Ürün bazlı uyarlanır kontrol aralığı (volatiliteye göre sık / seyrek)"""
+from __future__ import annotations
+
+import random
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+
+@dataclass(frozen=True)
+class CheckPolicy:
+    """Volatilite skorundan bir sonraki kontrol zamanını hesaplar
+
+    Volatilite, "kontrol başına fiyat değişti mi" olayının üstel hareketli
+    ortalamasıdır (0..1). Skor 1'e yaklaştıkça aralık `min_interval`'a,
+    0'a yaklaştıkça `max_interval`'a iner / çıkar (geometrik ölçek). Aralığa
+    eklenen ±`jitter` oranındaki sapma, aynı anda eklenen ürünlerin hep
+    birlikte vadesinin dolmasını engeller.
+    """
+    min_interval: timedelta = timedelta(minutes=5)
+    max_interval: timedelta = timedelta(hours=6)
+    # Her kontrolde yeni gözlemin ağırlığı
+    alpha: float = 0.3
+    jitter: float = 0.2
+
+    def decayed(self, volatility: float | None) -> float:
+        """Fiyat değişmediyse yeni skor"""
+        return (volatility if volatility is not None else 0.5) * (1 - self.alpha)
+
+    def bumped(self, decayed: float) -> float:
+        """Fiyat değiştiyse yeni skor (`decayed` üzerine değişim ağırlığı eklenir)"""
+        return min(1.0, decayed + self.alpha)
+
+    def interval(self, volatility: float) -> timedelta:
+        lo = self.min_interval.total_seconds()
+        hi = max(lo, self.max_interval.total_seconds())
+        vol = min(1.0, max(0.0, volatility))
+        seconds = lo * (hi / lo) ** (1 - vol) if lo > 0 else hi * (1 - vol)
+        if self.jitter:
+            seconds *= random.uniform(1 - self.jitter, 1 + self.jitter)
+        return timedelta(seconds=seconds)
+
+    def next_check_at(self, now: datetime, volatility: float) -> datetime:
+        return now + self.interval(volatility)
@@ -0,0 +1,494 @@
+"""Ürün sayfasından başlık, fiyat ve görsel çıkaran parser backend'leri
+
+Her backend aynı `extract(html, url) -> ProductInfo` arayüzünü uygular ve
+aynı sonucu üretmek zorundadır; `PARSER_BACKEND` ile seçilir.
+"""
+from __future__ import annotations
+
+import importlib.util
+import json
+import re
+from dataclasses import dataclass
+from typing import Optional, Protocol
+
+
+@dataclass
+class ProductInfo:
+    """Ürün bilgileri"""
+    url: str
+    title: Optional[str] = None
+    price: Optional[float] = None
+    image_url: Optional[str] = None
+    currency: str = "TL"
+
+
+class ProductExtractor(Protocol):
+    name: str
+
+    def extract(self, html: str, url: str) -> ProductInfo: ...
+
+
+def parse_price(price_text: str) -> Optional[float]:
+    """Metin içinden fiyat çıkar
+
+    Kabul edilen biçimler: "1.149,90 TL" (Türkçe), "1,049.50" (İngilizce),
+    "1.049 TL" (kuruşsuz binlik ayırıcı -> 1049) ve "149,90" / "149.90".
+    """
+    if not price_text:
+        return None
+    
+    # Sadece sayıları ve nokta/virgül al
+    cleaned = re.sub(r"[^\d,.]", "", price_text)
+    
+    if "," in cleaned and cleaned.rfind(",") > cleaned.rfind("."):
+        # Türkçe biçim: nokta binlik ayırıcı, virgül kuruş ("1.149,90")
+        cleaned = cleaned.replace(".", "").replace(",", ".")
+    elif "," in cleaned:
+        # İngilizce biçim: virgül binlik ayırıcı ("1,049.50")
+        cleaned = cleaned.replace(",", "")
+    elif re.fullmatch(r"\d{1,3}(\.\d{3})+", cleaned):
+        # Kuruşsuz binlik ayırıcı ("1.049 TL" -> 1049)
+        cleaned = cleaned.replace(".", "")
+    elif cleaned.count(".") > 1:
+        # Birden fazla nokta varsa son noktadan sonrası kuruş
+        parts = cleaned.split(".")
+        cleaned = "".join(parts[:-1]) + "." + parts[-1]
+    
+    try:
+        return float(cleaned)
+    except (ValueError, AttributeError):
+        return None
+
+
+def _clean_title(text: str | None) -> Optional[str]:
+    """Başlıktaki boşlukları tek boşluğa indir (tüm backend'ler aynı başlığı döndürsün)"""
+    return (" ".join(text.split()) or None) if text else None
+
+
+class SoupExtractor:
+    """BeautifulSoup ile tam ağaç kurup arayan ilk (referans) backend"""
+    name = "bs4"
+    package = "bs4"
+
+    def extract(self, html: str, url: str) -> ProductInfo:
+        from bs4 import BeautifulSoup
+
+        soup = BeautifulSoup(html, "lxml")
+        
+        # Başlık - Yeni selector (iki farklı format)
+        title = None
+        # Format 1: data-testid="product-title"
+        title_elem = soup.find("h1", attrs={"data-testid": "product-title"})
+        if not title_elem:
+            # Format 2: class="product-title variant-pdp"
+            title_elem = soup.find("h1", class_="product-title variant-pdp")
+        if not title_elem:
+            # Format 3: Sadece "product-title" class'ı
+            title_elem = soup.find("h1", class_="product-title")
+        if not title_elem:
+            # Fallback: pr-new-br
+            title_elem = soup.find("h1", class_="pr-new-br")
+        if not title_elem:
+            # Son fallback: herhangi bir h1
+            title_elem = soup.find("h1")
+        if title_elem:
+            # Sadece metin al, <a> ve <strong> içindeki metinler dahil; marka
+            # (<a>) ile ürün adı (<span>) arasına boşluk konur
+            title = _clean_title(title_elem.get_text(" ", strip=True))
+        
+        # Fiyat - Yeni selector (en ucuz fiyatı bul)
+        price = None
+        prices = []
+        
+        # 1. ty-plus-price yapısındaki fiyatlar (sepette/kampanya fiyatları)
+        plus_price_elem = soup.find("div", class_="ty-plus-price-content")
+        if plus_price_elem:
+            # Sepette indirimli fiyat
+            discounted_elem = plus_price_elem.find("span", class_="ty-plus-price-discounted-price")
+            if discounted_elem:
+                price_val = parse_price(discounted_elem.get_text(strip=True))
+                if price_val:
+                    prices.append(price_val)
+            
+            # Normal fiyat
+            original_elem = plus_price_elem.find("div", class_="ty-plus-price-original-price")
+            if original_elem:
+                price_val = parse_price(original_elem.get_text(strip=True))
+                if price_val:
+                    prices.append(price_val)
+        
+        # 2. campaign-price-content yapısı
+        campaign_price_elem = soup.find("div", class_="campaign-price-content")
+        if campaign_price_elem:
+            # Sepette indirimli fiyat
+            new_price = campaign_price_elem.find("p", class_="new-price")
+            if new_price:
+                price_val = parse_price(new_price.get_text(strip=True))
+                if price_val:
+                    prices.append(price_val)
+            
+            # Eski fiyat
+            old_price = campaign_price_elem.find("p", class_="old-price")
+            if old_price:
+                price_val = parse_price(old_price.get_text(strip=True))
+                if price_val:
+                    prices.append(price_val)
+        
+        # 3. data-testid="lowest-price" yapısı (14 günün en düşük fiyatı)
+        lowest_price_btn = soup.find("button", attrs={"data-testid": "lowest-price"})
+        if lowest_price_btn:
+            price_view = lowest_price_btn.find("div", class_="price-view")
+            if price_view:
+                # Sadece indirimli fiyatı al (en ucuz olan)
+                discounted = price_view.find("span", class_="discounted")
+                if discounted:
+                    price_val = parse_price(discounted.get_text(strip=True))
+                    if price_val:
+                        prices.append(price_val)
+        
+        # 4. data-testid="normal-price" yapısı (iki farklı format)
+        price_wrapper = soup.find("div", attrs={"data-testid": "normal-price"})
+        if price_wrapper:
+            # Format 1: price-container içinde discounted span
+            price_container = price_wrapper.find("div", class_="price-container")
+            if price_container:
+                price_elem = price_container.find("span", class_="discounted")
+                if price_elem:
+                    price_val = parse_price(price_elem.get_text(strip=True))
+                    if price_val:
+                        prices.append(price_val)
+            else:
+                # Format 2: Doğrudan discounted span
+                price_elem = price_wrapper.find("span", class_="discounted")
+                if price_elem:
+                    price_val = parse_price(price_elem.get_text(strip=True))
+                    if price_val:
+                        prices.append(price_val)
+        
+        # 5. Fallback fiyat selector'ları
+        if not prices:
+            price_elem = soup.find("span", class_="prc-dsc")
+            if not price_elem:
+                price_elem = soup.find("span", class_="prc-slg")
+            if price_elem:
+                price_val = parse_price(price_elem.get_text(strip=True))
+                if price_val:
+                    prices.append(price_val)
+        
+        # En ucuz fiyatı al
+        if prices:
+            price = min(prices)
+        
+        # Resim - Yeni selector
+        image_url = None
+        # Önce data-testid="image" içinde ara
+        img_elem = soup.find("img", attrs={"data-testid": "image"})
+        if not img_elem:
+            img_elem = soup.find("img", class_="ph-gallery-img")
+        if not img_elem:
+            img_elem = soup.find("img", attrs={"data-src": True})
+        if img_elem:
+            image_url = img_elem.get("src") or img_elem.get("data-src")
+            if image_url and not image_url.startswith("http"):
+                image_url = "https:" + image_url
+        
+        return ProductInfo(
+            url=url,
+            title=title,
+            price=price,
+            image_url=image_url,
+            currency="TL"
+        )
+
+
+def _has_class(name: str) -> str:
+    """BeautifulSoup'un class_=... eşleşmesinin XPath karşılığı"""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+def _text(elem) -> str:
+    """get_text(strip=True) ile aynı: her parça kırpılıp boşluksuz birleşir"""
+    return "".join(s.strip() for s in elem.itertext())
+
+
+class LxmlExtractor:
+    """lxml ağacı üzerinde önceden derlenmiş XPath'lerle arayan backend
+
+    Python nesnesi ağacı kurmadığı ve her arama C tarafında yapıldığı için
+    BeautifulSoup'a göre sayfa başına belirgin şekilde daha ucuzdur.
+    """
+    name = "lxml"
+    package = "lxml"
+
+    def __init__(self):
+        from lxml import etree
+
+        xp = etree.XPath
+        self._parser = etree.HTMLParser(remove_comments=True, no_network=True)
+        self._etree = etree
+
+        # Başlık: SoupExtractor ile aynı öncelik sırası
+        self._title_paths = [
+            xp('//h1[@data-testid="product-title"]'),
+            xp('//h1[@class="product-title variant-pdp"]'),
+            xp(f'//h1[{_has_class("product-title")}]'),
+            xp(f'//h1[{_has_class("pr-new-br")}]'),
+            xp("//h1"),
+        ]
+
+        self._plus_price = xp(f'//div[{_has_class("ty-plus-price-content")}]')
+        self._plus_discounted = xp(f'.//span[{_has_class("ty-plus-price-discounted-price")}]')
+        self._plus_original = xp(f'.//div[{_has_class("ty-plus-price-original-price")}]')
+
+        self._campaign_price = xp(f'//div[{_has_class("campaign-price-content")}]')
+        self._campaign_new = xp(f'.//p[{_has_class("new-price")}]')
+        self._campaign_old = xp(f'.//p[{_has_class("old-price")}]')
+
+        self._lowest_price = xp('//button[@data-testid="lowest-price"]')
+        self._price_view = xp(f'.//div[{_has_class("price-view")}]')
+        self._discounted = xp(f'.//span[{_has_class("discounted")}]')
+
+        self._normal_price = xp('//div[@data-testid="normal-price"]')
+        self._price_container = xp(f'.//div[{_has_class("price-container")}]')
+
+        self._legacy_prices = [
+            xp(f'//span[{_has_class("prc-dsc")}]'),
+            xp(f'//span[{_has_class("prc-slg")}]'),
+        ]
+
+        self._image_paths = [
+            xp('//img[@data-testid="image"]'),
+            xp(f'//img[{_has_class("ph-gallery-img")}]'),
+            xp("//img[@data-src]"),
+        ]
+
+    @staticmethod
+    def _first(path, node):
+        found = path(node)
+        return found[0] if found else None
+
+    def _add_price(self, prices: list[float], elem) -> None:
+        if elem is not None:
+            price_val = parse_price(_text(elem))
+            if price_val:
+                prices.append(price_val)
+
+    def extract(self, html: str, url: str) -> ProductInfo:
+        root = self._etree.fromstring(html, self._parser)
+        if root is None:
+            return ProductInfo(url=url)
+        first = self._first
+
+        title = None
+        for path in self._title_paths:
+            title_elem = first(path, root)
+            if title_elem is not None:
+                title = _clean_title(" ".join(title_elem.itertext()))
+                break
+
+        prices: list[float] = []
+
+        plus_price_elem = first(self._plus_price, root)
+        if plus_price_elem is not None:
+            self._add_price(prices, first(self._plus_discounted, plus_price_elem))
+            self._add_price(prices, first(self._plus_original, plus_price_elem))
+
+        campaign_price_elem = first(self._campaign_price, root)
+        if campaign_price_elem is not None:
+            self._add_price(prices, first(self._campaign_new, campaign_price_elem))
+            self._add_price(prices, first(self._campaign_old, campaign_price_elem))
+
+        lowest_price_btn = first(self._lowest_price, root)
+        if lowest_price_btn is not None:
+            price_view = first(self._price_view, lowest_price_btn)
+            if price_view is not None:
+                self._add_price(prices, first(self._discounted, price_view))
+
+        price_wrapper = first(self._normal_price, root)
+        if price_wrapper is not None:
+            price_container = first(self._price_container, price_wrapper)
+            scope = price_container if price_container is not None else price_wrapper
+            self._add_price(prices, first(self._discounted, scope))
+
+        if not prices:
+            for path in self._legacy_prices:
+                price_elem = first(path, root)
+                if price_elem is not None:
+                    self._add_price(prices, price_elem)
+                    break
+
+        image_url = None
+        for path in self._image_paths:
+            img_elem = first(path, root)
+            if img_elem is not None:
+                image_url = img_elem.get("src") or img_elem.get("data-src")
+                if image_url and not image_url.startswith("http"):
+                    image_url = "https:" + image_url
+                break
+
+        return ProductInfo(
+            url=url,
+            title=title,
+            price=min(prices) if prices else None,
+            image_url=image_url,
+            currency="TL"
+        )
+
+
+# Trendyol ürün sayfalarının script içine gömdüğü state objesi
+_STATE_MARKER = "__PRODUCT_DETAIL_APP_INITIAL_STATE__"
+_STATE_PRICE_KEYS = ("discountedPrice", "sellingPrice")
+_CDN_BASE = "https://cdn.dsmcdn.com"
+_json_decoder = json.JSONDecoder()
+
+
+def find_embedded_state(html: str):
+    """Gömülü state JSON'unu bul ve sadece o objeyi decode et
+
+    Sayfada düz metin araması yapılır; HTML'in geri kalanı hiç parse edilmez.
+    """
+    pos = html.find(_STATE_MARKER)
+    if pos == -1:
+        return None
+
+    end = pos + len(_STATE_MARKER)
+    start = html.find("{", end)
+    # Marker ile "{" arasında atama dışında bir şey varsa yanlış yerdeyiz
+    if start == -1 or html[end:start].strip(" \t\r\n=\"']") != "":
+        return None
+    try:
+        state, _ = _json_decoder.raw_decode(html, start)
+    except ValueError:
+        return None
+    return state
+
+
+def _state_price(price: dict) -> Optional[float]:
+    prices = []
+    for key in _STATE_PRICE_KEYS:
+        entry = price.get(key)
+        value = entry.get("value") if isinstance(entry, dict) else entry
+        if isinstance(value, (int, float)) and value > 0:
+            prices.append(float(value))
+    return min(prices) if prices else None
+
+
+def _state_image(images) -> Optional[str]:
+    if not images:
+        return None
+    image = images[0]
+    if isinstance(image, dict):
+        image = image.get("url") or image.get("path")
+    if not isinstance(image, str) or not image:
+        return None
+    if image.startswith("//"):
+        return "https:" + image
+    if not image.startswith("http"):
+        return _CDN_BASE + ("" if image.startswith("/") else "/") + image
+    return image
+
+
+def parse_embedded_state(html: str, url: str) -> ProductInfo | None:
+    """Gömülü state'ten ProductInfo üret (fiyat bulunamazsa None)"""
+    state = find_embedded_state(html)
+    product = state.get("product") if isinstance(state, dict) else None
+    if not isinstance(product, dict):
+        return None
+
+    price = _state_price(product.get("price") or {})
+    if price is None:
+        return None
+
+    name = product.get("name")
+    brand = product.get("brand")
+    brand_name = brand.get("name") if isinstance(brand, dict) else None
+    title = _clean_title(" ".join(part for part in (brand_name, name) if part))
+
+    return ProductInfo(
+        url=url,
+        title=title,
+        price=price,
+        image_url=_state_image(product.get("images")),
+        currency="TL"
+    )
+
+
+# DOM fiyat yerleşimlerinin sayfadaki işaretleri (bölge tespiti için)
+_PRICE_REGION_MARKERS = (
+    "ty-plus-price-content",
+    "campaign-price-content",
+    "lowest-price",
+    "normal-price",
+    "prc-dsc",
+    "prc-slg",
+)
+_PRICE_REGION_TAIL = 2048
+
+
+def price_region(html: str) -> str:
+    """Sayfanın fiyatı belirleyen kısmını döndür (içerik hash'i için)
+
+    Gömülü state varsa onun script bloğu, yoksa ilk ve son fiyat
+    işareti arasındaki bölge kullanılır. Öneri listeleri, takip
+    token'ları gibi her istekte değişen kısımlar hash'e girmez.
+    """
+    pos = html.find(_STATE_MARKER)
+    if pos != -1:
+        end = html.find("</script>", pos)
+        return html[pos:end if end != -1 else len(html)]
+
+    positions = [pos for pos in (html.find(m) for m in _PRICE_REGION_MARKERS) if pos != -1]
+    if not positions:
+        return html
+    start = min(positions)
+    last = max(html.rfind(m) for m in _PRICE_REGION_MARKERS)
+    return html[start:last + _PRICE_REGION_TAIL]
+
+
+class EmbeddedStateExtractor:
+    """Önce gömülü state JSON'unu dener, yoksa DOM backend'ine düşer
+
+    State objesi fiyatı doğrudan sayı olarak taşır; DOM'daki beş farklı
+    fiyat yerleşiminin tahmin edilmesine gerek kalmaz.
+    """
+
+    def __init__(self, fallback: ProductExtractor):
+        self.fallback = fallback
+        self.name = f"json+{fallback.name}"
+
+    def extract(self, html: str, url: str) -> ProductInfo:
+        try:
+            info = parse_embedded_state(html, url)
+        except (ValueError, AttributeError, TypeError):
+            info = None
+        return info or self.fallback.extract(html, url)
+
+
+_EXTRACTORS = {
+    SoupExtractor.name: SoupExtractor,
+    LxmlExtractor.name: LxmlExtractor,
+}
+
+
+def check_backend(name: str) -> None:
+    """Backend adını ve paketinin kurulu olduğunu, paketi import etmeden doğrula"""
+    if name not in _EXTRACTORS:
+        raise RuntimeError(
+            f"Unknown PARSER_BACKEND '{name}'. Choose one of: {', '.join(_EXTRACTORS)}"
+        )
+    package = _EXTRACTORS[name].package
+    if importlib.util.find_spec(package) is None:
+        raise RuntimeError(f"PARSER_BACKEND '{name}' needs the '{package}' package")
+
+
+def get_extractor(name: str, embedded_state: bool = False) -> ProductExtractor:
+    """İsme göre parser backend'i oluştur
+
+    `embedded_state=True` ise backend gömülü state JSON'u hızlı yolunun
+    arkasına yedek olarak konur.
+    """
+    check_backend(name)
+    extractor = _EXTRACTORS[name]()
+    if embedded_state:
+        return EmbeddedStateExtractor(extractor)
+    return extractor
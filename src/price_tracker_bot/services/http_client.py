@@ -0,0 +1,77 @@
+"""Uygulama genelinde paylaşılan HTTP client
+
+httpx ilk istekte import edilir: açılışta sadece ayarlar saklanır
+(`configure_http_client`), client ilk `get_http_client` çağrısında kurulur.
+"""
+from __future__ import annotations
+
+import importlib.util
+import logging
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import httpx
+
+log = logging.getLogger(__name__)
+
+_client: httpx.AsyncClient | None = None
+# configure_http_client ile verilen ayarlar (None = varsayılanlar)
+_settings = None
+
+
+def build_http_client(
+    timeout: float = 10.0,
+    max_connections: int = 20,
+    max_keepalive_connections: int = 10,
+    keepalive_expiry: float = 30.0,
+    http2: bool = False,
+) -> httpx.AsyncClient:
+    """Keep-alive ve bağlantı limitleri ayarlı bir AsyncClient oluştur"""
+    # HTTP/2 için h2 paketi gerekli (pip install httpx[http2])
+    if http2 and importlib.util.find_spec("h2") is None:
+        log.warning("HTTP2=1 but the 'h2' package is not installed, falling back to HTTP/1.1")
+        http2 = False
+
+    import httpx
+
+    return httpx.AsyncClient(
+        timeout=timeout,
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        ),
+        http2=http2,
+    )
+
+
+def _build_configured() -> httpx.AsyncClient:
+    if _settings is None:
+        return build_http_client()
+    return build_http_client(
+        max_connections=_settings.http_max_connections,
+        max_keepalive_connections=_settings.http_max_keepalive,
+        http2=_settings.http2,
+    )
+
+
+def configure_http_client(settings) -> None:
+    """Açılışta ayarları sakla; client (ve httpx) ilk kullanımda kurulur"""
+    global _settings
+    _settings = settings
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Paylaşılan client'ı döndür (henüz yoksa saklanan ayarlarla oluştur)"""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = _build_configured()
+    return _client
+
+
+async def close_http_client() -> None:
+    """Uygulama kapanışında bağlantıları kapat"""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
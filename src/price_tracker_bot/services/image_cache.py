@@ -0,0 +1,139 @@
+"""Ürün görsellerinin Telegram file_id cache'i (sohbetler arası paylaşılır)
+
+Bir görsel Telegram'a bir kez yüklenir; dönen file_id görsel URL'inin ve
+içeriğinin hash'iyle saklanır. Aynı ürünü takip eden diğer sohbetler ve
+aynı görseli başka URL'den sunan ürünler bu file_id ile gönderilir, bayt
+tekrar indirilip yüklenmez. İlk yüklemeden önce çok büyük görseller
+(Pillow kuruluysa) küçültülür.
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import importlib.util
+import io
+import logging
+
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import BufferedInputFile, Message
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..db.repo.image_cache_repo import ImageCacheRepo
+from .cache import LruTtlCache
+from .http_client import get_http_client
+
+log = logging.getLogger(__name__)
+
+# Pillow isteğe bağlı (yoksa görseller olduğu gibi yüklenir) ve ilk
+# küçültmede import edilir; açılışı yavaşlatmasın
+_HAS_PILLOW = importlib.util.find_spec("PIL") is not None
+
+# Uzun kenarı bundan büyük görseller küçültülür (0 = küçültme yok)
+_max_side = 0
+_jpeg_quality = 85
+# URL hash'i -> file_id; sık açılan görseller için veritabanına da gidilmesin
+_file_ids: LruTtlCache[str, str] = LruTtlCache(maxsize=4096, ttl=24 * 3600)
+
+
+def configure_image_cache(settings) -> None:
+    """Açılışta küçültme ayarlarını uygula"""
+    global _max_side, _jpeg_quality
+    _max_side = settings.image_max_side
+    _jpeg_quality = settings.image_jpeg_quality
+    if _max_side and not _HAS_PILLOW:
+        log.warning("IMAGE_MAX_SIDE is set but Pillow is not installed, images are uploaded as is")
+
+
+def _sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def downscale(data: bytes, max_side: int, quality: int = 85) -> bytes:
+    """Uzun kenarı `max_side`'ı aşan görseli JPEG olarak küçült
+
+    Pillow yoksa, görsel zaten küçükse, okunamıyorsa ya da sonuç
+    büyümüşse orijinal baytlar döner.
+    """
+    if max_side <= 0 or not _HAS_PILLOW:
+        return data
+    from PIL import Image
+
+    try:
+        with Image.open(io.BytesIO(data)) as img:
+            if max(img.size) <= max_side:
+                return data
+            img.thumbnail((max_side, max_side))
+            if img.mode not in ("RGB", "L"):
+                img = img.convert("RGB")
+            out = io.BytesIO()
+            img.save(out, "JPEG", quality=quality, optimize=True)
+    except Exception as e:
+        log.info("Image downscale failed, uploading original", extra={"error": type(e).__name__, "detail": str(e)[:300]})
+        return data
+    small = out.getvalue()
+    return small if len(small) < len(data) else data
+
+
+async def send_product_photo(
+    message: Message,
+    session: AsyncSession,
+    image_url: str,
+    caption: str,
+    reply_markup=None,
+    refresh: bool = False,
+) -> Message:
+    """Ürün görselini cache'teki file_id ile, yoksa indirip yükleyerek gönder
+
+    refresh=True: URL'in kayıtlı file_id'si atlanır, görsel yeniden indirilir.
+    """
+    repo = ImageCacheRepo(session)
+    url_hash = _sha256(image_url.encode())
+
+    if refresh:
+        _file_ids.pop(url_hash)
+        await repo.forget_url(url_hash)
+    else:
+        file_id = _file_ids.get(url_hash) or await repo.get_file_id(url_hash)
+        if file_id:
+            sent = await _answer_cached(message, repo, file_id, caption, reply_markup)
+            if sent is not None:
+                _file_ids.put(url_hash, file_id)
+                return sent
+            _file_ids.pop(url_hash)
+
+    response = await get_http_client().get(image_url, timeout=15.0)
+    response.raise_for_status()
+    data = response.content
+    content_hash = _sha256(data)
+
+    # Aynı görsel başka bir URL'den zaten yüklenmiş olabilir
+    sent = None
+    file_id = await repo.get_file_id_by_content(content_hash)
+    if file_id:
+        sent = await _answer_cached(message, repo, file_id, caption, reply_markup)
+
+    if sent is None:
+        # Pillow CPU'da çalışır, event loop'u bloklamasın
+        upload = await asyncio.to_thread(downscale, data, _max_side, _jpeg_quality)
+        sent = await message.answer_photo(
+            photo=BufferedInputFile(upload, filename="product.jpg"),
+            caption=caption,
+            reply_markup=reply_markup,
+        )
+        if not sent.photo:
+            return sent
+        file_id = sent.photo[-1].file_id
+
+    await repo.save(url_hash, content_hash, file_id, len(data))
+    _file_ids.put(url_hash, file_id)
+    return sent
+
+
+async def _answer_cached(message: Message, repo: ImageCacheRepo, file_id: str, caption: str, reply_markup) -> Message | None:
+    """file_id ile gönder; Telegram reddederse kaydı sil ve None döndür"""
+    try:
+        return await message.answer_photo(photo=file_id, caption=caption, reply_markup=reply_markup)
+    except TelegramBadRequest as e:
+        log.info("Cached image file_id rejected, re-uploading", extra={"error": type(e).__name__, "detail": str(e)[:300]})
+        await repo.forget_file_id(file_id)
+        return None
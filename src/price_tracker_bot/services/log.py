@@ -0,0 +1,165 @@
+"""Kuyruk üzerinden çalışan yapılandırılmış log
+
+Log çağrısı kaydı sadece sınırlı bir kuyruğa koyar; biçimlendirme ve
+stdout'a yazma arka plandaki QueueListener thread'inde yapılır. Bu yüzden
+stdout yavaşladığında (ör. Render'da büyük turlarda) event loop beklemez.
+
+- LOG_FORMAT=json: her kayıt tek satır JSON. `extra` ile verilen alanlar
+  (product_id, duration_ms, outcome, error...) satırın alanları olur.
+- LOG_FORMAT=text: insan için okunur tek satır (yerel geliştirme).
+
+Tekrarlayan uyarı / hatalar örneklenir: aynı mesaj ve hata türü
+LOG_SAMPLE_WINDOW_SECONDS içinde ilk LOG_SAMPLE_BURST kez yazılır, kalanı
+sayılır. Pencere sonrası ilk kayıtta atlanan sayı `suppressed` alanında
+görünür. Kuyruk dolarsa kayıt düşürülür, düşürülen sayı `dropped`
+alanında görünür.
+"""
+from __future__ import annotations
+
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+from datetime import datetime, timezone
+
+# Paket kökü ("src.price_tracker_bot" ya da "price_tracker_bot"); modüller
+# logging.getLogger(__name__) kullanır, seviye buradan ayarlanır
+_PACKAGE = __name__.rsplit(".", 2)[0]
+
+# LogRecord'un kendi alanları; bunların dışındakiler `extra` ile gelmiştir
+_RESERVED = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+_listener: logging.handlers.QueueListener | None = None
+
+
+def _extra_fields(record: logging.LogRecord) -> dict:
+    return {k: v for k, v in record.__dict__.items() if k not in _RESERVED}
+
+
+class JsonFormatter(logging.Formatter):
+    """Kaydı tek satır JSON'a çevir"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        entry.update(_extra_fields(record))
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """`zaman SEVİYE logger: mesaj anahtar=değer ...`"""
+
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        fields = _extra_fields(record)
+        if fields:
+            first, _, rest = line.partition("\n")
+            line = first + " " + " ".join(f"{k}={v}" for k, v in fields.items()) + (f"\n{rest}" if rest else "")
+        return line
+
+
+class ErrorSampler(logging.Filter):
+    """Aynı uyarı / hatanın pencere başına ilk `burst` kaydını geçir"""
+
+    def __init__(self, burst: int = 5, window: float = 60.0):
+        super().__init__()
+        self.burst = burst
+        self.window = window
+        # (logger, mesaj, hata türü) -> [pencere başı, sayı, atlanan]
+        self._windows: dict[tuple, list] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno < logging.WARNING or self.burst <= 0:
+            return True
+        key = (record.name, record.msg, getattr(record, "error", None))
+        state = self._windows.get(key)
+        if state is None or record.created - state[0] >= self.window:
+            if len(self._windows) > 1000:
+                self._windows.clear()
+            self._windows[key] = [record.created, 1, 0]
+            if state is not None and state[2]:
+                record.suppressed = state[2]
+            return True
+        state[1] += 1
+        if state[1] <= self.burst:
+            return True
+        state[2] += 1
+        return False
+
+
+class _EnqueueHandler(logging.handlers.QueueHandler):
+    """Kaydı biçimlendirmeden kuyruğa koyan, kuyruk doluysa düşüren handler
+
+    Standart QueueHandler mesajı ve traceback'i çağıran thread'de
+    biçimlendirir. Burada sadece mesaj argümanlarla birleştirilir (sonradan
+    değişebilirler), gerisi listener thread'inde yapılır.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        if self.dropped:
+            record.dropped = self.dropped
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            return
+        self.dropped = 0
+
+
+def setup_logging(settings) -> None:
+    """Paket logger'larını kuyruğa bağla ve listener thread'ini başlat"""
+    global _listener
+    stop_logging()
+
+    output = logging.StreamHandler(sys.stdout)
+    output.setFormatter(JsonFormatter() if settings.log_format == "json" else TextFormatter())
+    log_queue: queue.Queue = queue.Queue(maxsize=settings.log_queue_size)
+    handler = _EnqueueHandler(log_queue)
+    handler.addFilter(ErrorSampler(settings.log_sample_burst, settings.log_sample_window))
+
+    # Kütüphane logları (aiogram, apscheduler) da aynı kuyruktan, WARNING ve üstü
+    root = logging.getLogger()
+    for old in [h for h in root.handlers if isinstance(h, _EnqueueHandler)]:
+        root.removeHandler(old)
+    root.addHandler(handler)
+    root.setLevel(logging.WARNING)
+    logging.getLogger(_PACKAGE).setLevel(settings.log_level)
+    # Biçimler dosya / satır / süreç bilgisi kullanmıyor; kayıt başına yığın
+    # taraması ve süreç sorgusu yapılmasın (logging HOWTO, "Optimization")
+    logging._srcfile = None
+    logging.logProcesses = False
+    logging.logMultiprocessing = False
+
+    _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+
+
+def stop_logging() -> None:
+    """Kuyruktaki kayıtları yaz ve listener'ı durdur"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(stop_logging)
@@ -0,0 +1,118 @@
+"""Prometheus metrikleri ve /metrics endpoint'i
+
+Webhook modunda /metrics ana aiohttp uygulamasına eklenir. Polling modu
+ve işçi süreçleri için METRICS_PORT ile küçük ayrı bir sunucu açılır.
+"""
+from __future__ import annotations
+
+import logging
+import time
+
+from aiohttp import web
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+from sqlalchemy import event
+
+from .profiling import register_profiling_routes
+
+log = logging.getLogger(__name__)
+
+# Ağ ve DB süreleri için ms'den saniyelere kadar kovalar
+_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+_CYCLE_BUCKETS = (0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800)
+
+FETCH_SECONDS = Histogram(
+    "price_tracker_fetch_seconds", "Ürün sayfası isteğinin süresi", buckets=_LATENCY_BUCKETS
+)
+FETCHES_IN_FLIGHT = Gauge("price_tracker_fetches_in_flight", "Şu an süren ürün sayfası istekleri")
+FETCH_ERRORS = Counter(
+    "price_tracker_fetch_errors_total", "Başarısız ürün sayfası istekleri", ["status"]
+)
+PARSE_SECONDS = Histogram(
+    "price_tracker_parse_seconds", "Sayfa hash + parse süresi (havuz beklemesi dahil)", buckets=_LATENCY_BUCKETS
+)
+DB_QUERY_SECONDS = Histogram(
+    "price_tracker_db_query_seconds", "Veritabanı sorgu süresi", ["operation"], buckets=_LATENCY_BUCKETS
+)
+CYCLE_SECONDS = Histogram(
+    "price_tracker_cycle_seconds", "Fiyat kontrol turunun süresi", ["mode"], buckets=_CYCLE_BUCKETS
+)
+ITEMS_CHECKED = Counter(
+    "price_tracker_products_checked_total", "Kontrol edilen ürünler", ["result"]
+)
+PARSES_SKIPPED = Counter(
+    "price_tracker_parses_skipped_total",
+    "Parse edilmeden geçilen sayfalar (not_modified: 304, hash_hit: fiyat bölgesi hash'i aynı)",
+    ["reason"],
+)
+NOTIFICATIONS = Counter(
+    "price_tracker_notifications_total", "Bildirim gönderim sonuçları", ["status"]
+)
+UPDATE_SECONDS = Histogram(
+    "price_tracker_bot_update_seconds", "Telegram güncellemesinin işlenme süresi", ["event"],
+    buckets=_LATENCY_BUCKETS,
+)
+UPDATE_QUEUE_DEPTH = Gauge(
+    "price_tracker_bot_update_queue_depth", "Webhook işçi havuzunda bekleyen güncellemeler"
+)
+UPDATE_QUEUE_WAIT = Histogram(
+    "price_tracker_bot_update_queue_wait_seconds", "Güncellemenin havuz kuyruğunda beklediği süre",
+    buckets=_LATENCY_BUCKETS,
+)
+UPDATES_REJECTED = Counter(
+    "price_tracker_bot_updates_rejected_total", "Havuz dolu olduğu için 503 ile geri çevrilen güncellemeler"
+)
+STARTUP_SECONDS = Gauge(
+    "price_tracker_startup_seconds", "Sürecin son açılışında aşamaların süresi", ["phase"]
+)
+
+_DB_OPERATIONS = {"select", "insert", "update", "delete"}
+
+
+def _before_query(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_query(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["query_started"].pop()
+    operation = statement.lstrip().split(None, 1)[0].lower() if statement.strip() else ""
+    if operation not in _DB_OPERATIONS:
+        operation = "other"
+    DB_QUERY_SECONDS.labels(operation=operation).observe(time.perf_counter() - started)
+
+
+def _query_error(context):
+    # Hata veren sorgunun başlangıç zamanı yığında kalmasın
+    conn = context.connection
+    if conn is not None and conn.info.get("query_started"):
+        conn.info["query_started"].pop()
+
+
+def instrument_engine(engine) -> None:
+    """Engine üzerindeki her sorgunun süresini ölç (tüm repo'lar buradan geçer)"""
+    sync_engine = getattr(engine, "sync_engine", engine)
+    if event.contains(sync_engine, "before_cursor_execute", _before_query):
+        return
+    event.listen(sync_engine, "before_cursor_execute", _before_query)
+    event.listen(sync_engine, "after_cursor_execute", _after_query)
+    event.listen(sync_engine, "handle_error", _query_error)
+
+
+async def metrics_handler(request: web.Request) -> web.Response:
+    """Prometheus metin formatında tüm metrikler"""
+    return web.Response(body=generate_latest(), headers={"Content-Type": CONTENT_TYPE_LATEST})
+
+
+async def start_metrics_server(port: int) -> web.AppRunner:
+    """/metrics (ve açıksa /debug profil endpoint'leri) sunan küçük sunucuyu başlat
+
+    Polling modu ve işçi süreçleri için; webhook modunda aynı route'lar ana
+    uygulamadadır.
+    """
+    app = web.Application()
+    app.router.add_get("/metrics", metrics_handler)
+    register_profiling_routes(app)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, "0.0.0.0", port).start()
+    log.info("Metrics server started", extra={"url": f"http://0.0.0.0:{port}/metrics"})
+    return runner
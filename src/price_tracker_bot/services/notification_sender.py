@@ -0,0 +1,283 @@
+"""Bildirim outbox'ını Telegram hız limitlerine uyarak boşaltan gönderici"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import random
+import socket
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+
+from aiogram import Bot
+from aiogram.exceptions import (
+    TelegramBadRequest,
+    TelegramForbiddenError,
+    TelegramNotFound,
+    TelegramRetryAfter,
+    TelegramUnauthorizedError,
+)
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from ..db.repo.outbox_repo import OutboxRepo
+from .metrics import NOTIFICATIONS
+from .rate_limit import KeyedRateLimiter, TokenBucket
+
+log = logging.getLogger(__name__)
+
+# Tekrar denemenin anlamsız olduğu hatalar (bot engellendi, sohbet yok, mesaj geçersiz)
+_PERMANENT_ERRORS = (TelegramForbiddenError, TelegramBadRequest, TelegramNotFound, TelegramUnauthorizedError)
+
+
+class NotificationSender:
+    """Outbox'taki bekleyen mesajları gönderen arka plan görevi
+
+    Telegram limitleri: global ~30 mesaj/sn (token bucket) ve sohbet
+    başına ~1 mesaj/sn (sohbet bazlı sıra). `retry_after` yanıtında
+    gönderim o süre kadar durdurulur ve mesaj deneme hakkı harcanmadan
+    yeniden planlanır. Diğer geçici hatalar üstel geri çekilmeyle
+    `max_attempts` kez denenir. Mesajlar veritabanında durduğu için
+    yeniden başlatmada kaybolmaz; kira ile birden çok süreç aynı
+    mesajı iki kez göndermez. Sonuçlar parti bitmeden `finish_interval`
+    sn'de bir yazılır ve bir sohbetin partideki payı kiranın dörtte
+    birinde gönderilebilecek kadarla sınırlanır; kira gönderim sürerken
+    dolmaz, çökmede sadece son yazılmamış sonuçlar tekrar gönderilir.
+    """
+
+    def __init__(
+        self,
+        bot: Bot,
+        sessionmaker: async_sessionmaker[AsyncSession],
+        rate_per_sec: float = 25.0,
+        per_chat_interval: float = 1.0,
+        concurrency: int = 8,
+        batch_size: int = 100,
+        max_attempts: int = 8,
+        poll_interval: float = 1.0,
+        lease_seconds: float = 300.0,
+        worker_id: str | None = None,
+        retention_hours: float = 72.0,
+        finish_interval: float = 5.0,
+    ):
+        self.bot = bot
+        self.sessionmaker = sessionmaker
+        # Küçük patlama payı: saniyelik pencerede limit aşılmasın
+        self.bucket = TokenBucket(rate_per_sec, burst=max(1.0, rate_per_sec / 5))
+        self.chat_limiter = KeyedRateLimiter(1.0 / per_chat_interval if per_chat_interval > 0 else 0.0)
+        self.concurrency = max(1, concurrency)
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        # Sohbet başına ~1 mesaj/sn: bir sohbetin payı kiranın dörtte birinde biter
+        self.per_chat_limit = (
+            max(1, int(lease_seconds / 4 / per_chat_interval)) if per_chat_interval > 0 else max(1, batch_size)
+        )
+        self.finish_interval = finish_interval
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.retention_hours = retention_hours
+        self.sent = 0
+        self.retried = 0
+        self.failed = 0
+        self._stopping = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        self._stopping.set()
+        if self._task is not None:
+            try:
+                await asyncio.wait_for(self._task, timeout=10)
+            except asyncio.TimeoutError:
+                self._task.cancel()
+            self._task = None
+
+    async def run(self) -> None:
+        """Durdurulana kadar outbox'ı boşalt; iş yoksa `poll_interval` bekle"""
+        while not self._stopping.is_set():
+            try:
+                processed = await self.drain_once()
+            except Exception:
+                log.exception("Error in notification sender")
+                processed = 0
+            if not processed:
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def drain_once(self) -> int:
+        """Bir parti mesajı kirala, gönder ve sonuçları yaz; parti boyutunu döndür"""
+        now = datetime.now(timezone.utc)
+        owner = f"{self.worker_id}:{uuid.uuid4().hex[:12]}"
+        async with self.sessionmaker() as session:
+            messages = await OutboxRepo(session).claim_due(
+                now, self.batch_size, owner, now + timedelta(seconds=self.lease_seconds)
+            )
+            await session.commit()
+        if not messages:
+            return 0
+
+        # Aynı sohbetin mesajları sırayla, farklı sohbetler eşzamanlı
+        by_chat: dict[int, list] = defaultdict(list)
+        results: list[dict] = []
+        for message in messages:
+            chat_messages = by_chat[message.chat_id]
+            if len(chat_messages) < self.per_chat_limit:
+                chat_messages.append(message)
+            else:
+                # Sohbetin payı doldu: kira hemen bırakılır, sonraki parti alır
+                results.append(self._result(message, "pending", message.attempts))
+
+        sent_before, failed_before = self.sent, self.failed
+        # Sohbet aralığı beklenirken slot tutulmaz; sadece uçuştaki istekler sınırlanır
+        slots = asyncio.Semaphore(self.concurrency)
+        sending = asyncio.gather(*(
+            self._send_chat(chat_messages, results, slots) for chat_messages in by_chat.values()
+        ))
+        try:
+            # Sonuçlar gönderim sürerken parça parça yazılır
+            while not (await asyncio.wait({sending}, timeout=self.finish_interval))[0]:
+                try:
+                    await self._finish(results)
+                except Exception:
+                    # Yazılamayanlar listede kalır, sonraki yazımda tekrar denenir
+                    log.exception("Error writing outbox results")
+            await sending
+        finally:
+            sending.cancel()
+        await self._finish(results)
+
+        sent = self.sent - sent_before
+        failed = self.failed - failed_before
+        log.info(
+            "Outbox batch done",
+            extra={"sent": sent, "rescheduled": len(messages) - sent - failed, "failed": failed},
+        )
+        return len(messages)
+
+    async def _finish(self, results: list[dict]) -> None:
+        """Biriken gönderim sonuçlarını yaz ve kiralarını bırak"""
+        if not results:
+            return
+        batch = results[:]
+        async with self.sessionmaker() as session:
+            await OutboxRepo(session).bulk_finish(batch)
+            await session.commit()
+        # Yazım sürerken eklenenler listede kalır
+        del results[:len(batch)]
+
+    async def purge_finished(self, chunk_size: int = 1000) -> int:
+        """Saklama süresi dolmuş gönderilmiş / başarısız mesajları sil (periyodik iş)
+
+        Her parça kendi kısa transaction'ında silinir; silinen sayıyı döndürür.
+        """
+        if self.retention_hours <= 0:
+            return 0
+        before = datetime.now(timezone.utc) - timedelta(hours=self.retention_hours)
+        total = 0
+        while True:
+            async with self.sessionmaker() as session:
+                deleted = await OutboxRepo(session).delete_finished(before, chunk_size)
+                await session.commit()
+            total += deleted
+            if deleted < chunk_size:
+                break
+        if total:
+            log.info("Outbox purged", extra={"deleted": total, "retention_hours": self.retention_hours})
+        return total
+
+    async def _send_chat(self, messages, results: list[dict], slots: asyncio.Semaphore) -> None:
+        deferred_until: datetime | None = None
+        for message in messages:
+            if deferred_until is not None:
+                # Sohbet retry_after aldı; sırayı bozmamak için kalanlar da ertelenir
+                results.append(self._result(message, "pending", message.attempts, deferred_until))
+                continue
+            if self._stopping.is_set():
+                # Kapanışta gönderilmemiş mesajlar olduğu gibi geri bırakılır
+                results.append(self._result(message, "pending", message.attempts))
+                continue
+
+            await self.chat_limiter.wait_key(message.chat_id)
+            try:
+                async with slots:
+                    await self.bucket.acquire()
+                    await self.bot.send_message(
+                        chat_id=message.chat_id,
+                        text=message.text,
+                        parse_mode="Markdown",
+                        disable_web_page_preview=True
+                    )
+                self.sent += 1
+                NOTIFICATIONS.labels(status="sent").inc()
+                # Sohbet aralığı gerçek gönderim anından sayılsın (global bekleme kaydırmasın)
+                self.chat_limiter.delay_key(message.chat_id, self.chat_limiter.interval)
+                results.append(self._result(message, "sent", message.attempts + 1, sent_at=datetime.now(timezone.utc)))
+            except TelegramRetryAfter as e:
+                self.retried += 1
+                NOTIFICATIONS.labels(status="retried").inc()
+                self.bucket.pause(e.retry_after)
+                self.chat_limiter.delay_key(message.chat_id, e.retry_after)
+                deferred_until = datetime.now(timezone.utc) + timedelta(seconds=e.retry_after)
+                results.append(self._result(message, "pending", message.attempts, deferred_until, str(e)))
+            except _PERMANENT_ERRORS as e:
+                self.failed += 1
+                NOTIFICATIONS.labels(status="failed").inc()
+                log.warning(
+                    "Notification failed permanently",
+                    extra={"message_id": message.id, "chat_id": message.chat_id,
+                           "error": type(e).__name__, "detail": str(e)},
+                )
+                results.append(self._result(message, "failed", message.attempts + 1, error=str(e)))
+            except Exception as e:
+                attempts = message.attempts + 1
+                if attempts >= self.max_attempts:
+                    self.failed += 1
+                    NOTIFICATIONS.labels(status="failed").inc()
+                    log.warning(
+                        "Giving up on notification",
+                        extra={"message_id": message.id, "chat_id": message.chat_id, "attempts": attempts,
+                               "error": type(e).__name__, "detail": str(e)},
+                    )
+                    results.append(self._result(message, "failed", attempts, error=str(e)))
+                    continue
+                self.retried += 1
+                NOTIFICATIONS.labels(status="retried").inc()
+                retry_at = datetime.now(timezone.utc) + self._backoff(attempts)
+                results.append(self._result(message, "pending", attempts, retry_at, str(e)))
+
+    @staticmethod
+    def _backoff(attempts: int) -> timedelta:
+        """5 sn'den başlayıp 1 saate kadar katlanan, ±%20 sapmalı bekleme"""
+        seconds = min(3600.0, 5.0 * 2 ** (attempts - 1))
+        return timedelta(seconds=seconds * random.uniform(0.8, 1.2))
+
+    @staticmethod
+    def _result(message, status: str, attempts: int, next_attempt_at=None, error=None, sent_at=None) -> dict:
+        return {
+            "id": message.id,
+            "status": status,
+            "attempts": attempts,
+            "next_attempt_at": next_attempt_at or message.next_attempt_at,
+            "last_error": error[:512] if error else message.last_error,
+            "sent_at": sent_at,
+        }
+
+
+def build_notification_sender(bot: Bot, sessionmaker: async_sessionmaker[AsyncSession], settings) -> NotificationSender:
+    """Ayarlardan bildirim göndericisini oluştur"""
+    return NotificationSender(
+        bot,
+        sessionmaker,
+        rate_per_sec=settings.notify_rate_per_sec,
+        per_chat_interval=settings.notify_per_chat_interval,
+        concurrency=settings.notify_concurrency,
+        max_attempts=settings.notify_max_attempts,
+        worker_id=settings.checker_worker_id,
+        retention_hours=settings.notify_retention_hours,
+    )
@@ -0,0 +1,124 @@
+"""HTML parse işlerini event loop dışına taşıyan havuz
+
+Fiyat bölgesinin hash'i ve ürün parse'ı CPU işidir. Event loop üzerinde
+çalıştıklarında kontrol turu boyunca bot güncellemeleri gecikir. Havuz
+modları:
+  thread   ThreadPoolExecutor (varsayılan; ek süreç belleği yok, GIL'i paylaşır)
+  process  ProcessPoolExecutor (GIL'den bağımsız, çok çekirdekte en iyisi)
+  inline   eski davranış: doğrudan event loop üzerinde
+Bekleyen iş sayısı sınırlıdır; havuz doluyken yeni sayfa beklemeye alınır,
+böylece yavaş parse sırasında HTML'ler bellekte birikmez.
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Optional
+
+from .extractors import ProductExtractor, ProductInfo, get_extractor, price_region
+
+POOL_MODES = ("process", "thread", "inline")
+
+# Süreç başına extractor önbelleği (işçi süreçlerinde ilk işte oluşturulur)
+_extractors: dict[tuple[str, bool], ProductExtractor] = {}
+
+_pool: "ParsePool | None" = None
+
+
+def content_hash(html: str) -> str:
+    """Fiyat bölgesinin kısa hash'i"""
+    return hashlib.blake2b(price_region(html).encode("utf-8"), digest_size=16).hexdigest()
+
+
+def analyze_page(
+    html: str,
+    url: str,
+    backend: str,
+    embedded_state: bool,
+    previous_hash: Optional[str] = None,
+) -> tuple[str, Optional[ProductInfo]]:
+    """Sayfanın hash'ini hesapla, değiştiyse parse et
+
+    İşçi süreçlerinde çalışabilmesi için modül seviyesinde ve argümanları
+    picklable'dır; sadece hash ve küçük ProductInfo geri döner.
+    """
+    digest = content_hash(html)
+    if previous_hash and digest == previous_hash:
+        return digest, None
+    key = (backend, embedded_state)
+    extractor = _extractors.get(key)
+    if extractor is None:
+        extractor = _extractors[key] = get_extractor(backend, embedded_state=embedded_state)
+    return digest, extractor.extract(html, url)
+
+
+class ParsePool:
+    """`analyze_page`'i seçilen executor'da, sınırlı sayıda bekleyen işle çalıştırır"""
+
+    def __init__(self, mode: str = "thread", workers: int = 2, max_pending: int | None = None):
+        if mode not in POOL_MODES:
+            raise ValueError(f"Unknown parse pool mode: {mode!r} (expected one of {', '.join(POOL_MODES)})")
+        self.mode = mode
+        self.workers = max(1, workers)
+        self._executor: Executor | None = None
+        if mode == "process":
+            # Çalışan bir event loop'tan fork güvenli değil; işçiler temiz başlasın
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        elif mode == "thread":
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="parse")
+        self._slots = asyncio.Semaphore(max_pending or self.workers * 2)
+
+    async def analyze(
+        self,
+        html: str,
+        url: str,
+        backend: str,
+        embedded_state: bool,
+        previous_hash: Optional[str] = None,
+    ) -> tuple[str, Optional[ProductInfo]]:
+        if self._executor is None:
+            return analyze_page(html, url, backend, embedded_state, previous_hash)
+        async with self._slots:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self._executor, analyze_page, html, url, backend, embedded_state, previous_hash
+            )
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+def start_parse_pool(settings) -> ParsePool:
+    """Uygulama açılışında parse havuzunu oluştur"""
+    global _pool
+    if _pool is not None:
+        _pool.close()
+    _pool = ParsePool(
+        mode=settings.parse_pool,
+        workers=settings.parse_workers,
+        max_pending=settings.parse_max_pending,
+    )
+    return _pool
+
+
+def get_parse_pool() -> ParsePool:
+    """Paylaşılan havuzu döndür (başlatılmadıysa event loop üzerinde çalışır)"""
+    global _pool
+    if _pool is None:
+        _pool = ParsePool(mode="inline")
+    return _pool
+
+
+def close_parse_pool() -> None:
+    """Uygulama kapanışında işçileri kapat"""
+    global _pool
+    if _pool is not None:
+        _pool.close()
+        _pool = None
+
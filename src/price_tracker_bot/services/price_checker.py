@@ -2,100 +2,543 @@
 from __future__ import annotations
 
 import asyncio
-from datetime import datetime
+import logging
+import math
+import os
+import socket
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
 
-from aiogram import Bot
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
+from ..db.repo.app_state_repo import AppStateRepo
+from ..db.repo.product_repo import ProductRepo
 from ..db.repo.tracking_repo import TrackingRepo
-from .product_enrichment import product_service
+from .check_schedule import CheckPolicy
+from .metrics import CYCLE_SECONDS, ITEMS_CHECKED, PARSES_SKIPPED
+from .price_writer import OutboxEntry, PriceUpdate, PriceWriteBuffer, ScheduleUpdate
+from .product_enrichment import canonicalize_url, product_service
+from .profiling import get_profiler
+from .rate_limit import HostRateLimiter
+from .urls import is_short_link, product_key_from_url
+
+log = logging.getLogger(__name__)
+
+# Tam tarama (CHECK_MODE=sweep) kaldığı ürün id'sini burada saklar
+_SWEEP_CURSOR_KEY = "price_check_cursor"
+
+
+async def iter_active_work(
+    sessionmaker: async_sessionmaker[AsyncSession],
+    chunk_size: int = 500,
+    after_id: int = 0,
+):
+    """Aktif ürünleri takipçileriyle birlikte id sırasıyla parça parça üret
+
+    Keyset sayfalama (id > son_id) kullanılır ve her parça kendi kısa
+    session'ında okunur; bellek kullanımı katalog boyutundan bağımsızdır
+    ve ilk ürünün işlenmesi tüm listenin yüklenmesini beklemez.
+    `after_id` verilirse o id'den sonrasından devam edilir.
+    """
+    last_id = after_id
+    while True:
+        async with sessionmaker() as session:
+            products = await ProductRepo(session).list_active_after(last_id, chunk_size)
+            if not products:
+                return
+            subscribers = await TrackingRepo(session).list_active_for_products([p.id for p in products])
+
+        yield [(product, subscribers.get(product.id, [])) for product in products]
+
+        if len(products) < chunk_size:
+            return
+        last_id = products[-1].id
+
+
+async def claim_due_work(
+    sessionmaker: async_sessionmaker[AsyncSession],
+    worker_id: str,
+    limit: int,
+    lease_seconds: float = 300.0,
+    now: datetime | None = None,
+):
+    """Vadesi gelen en fazla `limit` ürünü takipçileriyle birlikte kirala
+
+    Kiralanan ürünler `lease_seconds` süresince diğer işçilere görünmez; böylece
+    aynı veritabanını paylaşan birden çok süreç vadesi gelen ürünleri
+    bölüşür. Kontrol bitince yeni plan yazılırken kira bırakılır; işçi
+    çökerse kiranın süresi dolunca ürün tekrar seçilir.
+    """
+    now = now or datetime.now(timezone.utc)
+    # Her talep kendi jetonuyla işaretlenir, kiralanan satırlar bununla okunur
+    owner = f"{worker_id}/{uuid.uuid4().hex[:8]}"
+    async with sessionmaker() as session:
+        products = await ProductRepo(session).claim_due(now, limit, owner, now + timedelta(seconds=lease_seconds))
+        await session.commit()
+        if not products:
+            return []
+        subscribers = await TrackingRepo(session).list_active_for_products([p.id for p in products])
+
+    return [(product, subscribers.get(product.id, [])) for product in products]
+
+
+def price_drop_text(item, old_price: float, new_price: float, drop_pct: float) -> str:
+    """Fiyat düşüş bildirimi metni"""
+    return (
+        f"🎉 **Fiyat Düştü!**\n\n"
+        f"📦 {item.title or 'Ürün'}\n\n"
+        f"💰 Eski fiyat: {old_price:.2f} TL\n"
+        f"💰 Yeni fiyat: **{new_price:.2f} TL**\n"
+        f"📉 Düşüş: %{drop_pct:.1f}\n\n"
+        f"🔗 [Ürüne Git]({item.url})"
+    )
+
+
+@dataclass
+class CycleStats:
+    """Bir kontrol turunun sayaçları (total/checked/failed ürün bazlıdır)"""
+    total: int = 0
+    subscriptions: int = 0
+    checked: int = 0
+    failed: int = 0
+    notified: int = 0
+    # Koşullu istek tasarrufu: 304 dönen ve fiyat bölgesi hash'i aynı kalan sayfalar
+    not_modified: int = 0
+    hash_hits: int = 0
+    fetch_errors: int = 0
+    write_failures: int = 0
+    # Zaman bütçesi dolduğu için bu turda kontrol edilmeden bırakılan ürünler
+    deferred: int = 0
+    # Tur yarıda kaldıysa kontrol edilen son ürün id'si (tam taramanın devam
+    # noktası); tur tüm kaynağı bitirdiyse None
+    resume_after: int | None = None
+    started_at: float = field(default_factory=time.perf_counter)
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started_at
+
+    @property
+    def items_per_sec(self) -> float:
+        elapsed = self.elapsed
+        return (self.checked + self.failed) / elapsed if elapsed > 0 else 0.0
 
 
 class PriceCheckerService:
     """Periyodik olarak ürün fiyatlarını kontrol eder"""
-    
-    def __init__(self, bot: Bot, sessionmaker: async_sessionmaker[AsyncSession]):
-        self.bot = bot
-        self.sessionmaker = sessionmaker
-    
-    async def check_all_prices(self):
-        """Tüm aktif ürünlerin fiyatlarını kontrol et"""
-        async with self.sessionmaker() as session:
-            try:
-                repo = TrackingRepo(session)
-                
-                # Tüm aktif ürünleri al
-                items = await repo.list_active()
-                
-                print(f"[{datetime.now()}] Checking {len(items)} active items...")
-                
-                for item in items:
-                    try:
-                        # Ürün bilgilerini çek
-                        product_info = await product_service.fetch_product_info(item.url)
-                        
-                        if not product_info.price:
-                            continue
-                        
-                        current_price = product_info.price
-                        old_price = item.last_price or item.baseline_price
-                        
-                        # Fiyat düştü mü kontrol et
-                        if current_price < old_price:
-                            price_drop_pct = ((old_price - current_price) / old_price) * 100
-                            
-                            # Eşik kontrolü
-                            if price_drop_pct >= item.threshold_pct:
-                                # Kullanıcıya bildirim gönder
-                                await self._send_price_drop_notification(
-                                    item, 
-                                    old_price, 
-                                    current_price, 
-                                    price_drop_pct
-                                )
-                        
-                        # Fiyatı güncelle
-                        await repo.update_price(item.id, current_price)
-                        
-                        # Rate limiting için kısa bekleme
-                        await asyncio.sleep(2)
-                        
-                    except Exception as e:
-                        print(f"Error checking item {item.id}: {e}")
-                        await session.rollback()
-                        continue
-                
-                # Tüm değişiklikleri commit et
-                await session.commit()
-                
-            except Exception as e:
-                print(f"Error in price checker: {e}")
-                await session.rollback()
-    
-    async def _send_price_drop_notification(
-        self, 
-        item, 
-        old_price: float, 
-        new_price: float, 
-        drop_pct: float
+
+    def __init__(
+        self,
+        sessionmaker: async_sessionmaker[AsyncSession],
+        concurrency: int = 8,
+        per_host_rps: float = 2.0,
+        write_chunk_size: int = 200,
+        read_chunk_size: int = 500,
+        policy: CheckPolicy | None = None,
+        rate_per_min: float = 60.0,
+        tick_seconds: float = 30.0,
+        worker_id: str | None = None,
+        lease_seconds: float = 300.0,
+        time_budget: float | None = None,
     ):
-        """Fiyat düşüş bildirimi gönder"""
-        try:
-            message = (
-                f"🎉 **Fiyat Düştü!**\n\n"
-                f"📦 {item.title or 'Ürün'}\n\n"
-                f"💰 Eski fiyat: {old_price:.2f} TL\n"
-                f"💰 Yeni fiyat: **{new_price:.2f} TL**\n"
-                f"📉 Düşüş: %{drop_pct:.1f}\n\n"
-                f"🔗 [Ürüne Git]({item.url})"
+        self.sessionmaker = sessionmaker
+        self.concurrency = max(1, concurrency)
+        self.rate_limiter = HostRateLimiter(per_host_rps)
+        self.write_chunk_size = write_chunk_size
+        self.read_chunk_size = read_chunk_size
+        self.policy = policy or CheckPolicy()
+        # Tur başına çekim bütçesi katalog boyutundan değil, hedef hızdan gelir
+        self.tick_budget = max(1, math.ceil(rate_per_min * tick_seconds / 60))
+        # Birden çok işçi aynı veritabanını paylaşabilir; ürünler kirayla dağıtılır
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.lease_seconds = lease_seconds
+        # Tur başına süre sınırı (sn); dolunca kalan ürünler sonraki tura kalır
+        self.time_budget = time_budget
+        # Aynı süreçte turlar üst üste binmesin
+        self._cycle_lock = asyncio.Lock()
+
+    async def check_all_prices(self, resume: bool = False):
+        """Tüm aktif ürünlerin fiyatlarını eşzamanlı olarak kontrol et
+
+        Aynı ürünü takip eden sohbetler ürün satırında birleşir: her ürün
+        turda bir kez çekilir ve sonuç tüm takipçilerin eşiğine uygulanır.
+
+        resume=True: tarama veritabanında saklanan ürün id'sinden devam eder
+        ve zaman bütçesi dolunca kaldığı yeri kaydeder; katalog ne kadar
+        büyük olursa olsun her ürün sırayla kontrol edilir, yeniden
+        başlatmada baştan başlanmaz.
+        """
+        if self._cycle_lock.locked():
+            log.warning("Price check skipped: previous cycle still running", extra={"mode": "full"})
+            return CycleStats()
+        async with self._cycle_lock:
+            after_id = await self._load_cursor() if resume else 0
+            log.info(
+                "Price check started",
+                extra={"mode": "full", "concurrency": self.concurrency, "resume_after": after_id},
             )
-            
-            await self.bot.send_message(
-                chat_id=item.chat_id,
-                text=message,
-                parse_mode="Markdown",
-                disable_web_page_preview=True
+            with get_profiler().cycle("full"):
+                stats = await self._run_cycle(
+                    iter_active_work(self.sessionmaker, self.read_chunk_size, after_id=after_id),
+                    deadline=self._deadline(),
+                )
+            if resume:
+                # Tarama bittiyse sonraki tur baştan başlar
+                await self._save_cursor(stats.resume_after or 0)
+            return stats
+
+    async def check_due_prices(self, limit: int | None = None):
+        """Sadece kontrol vakti gelmiş ürünleri (en fazla tur bütçesi kadar) kontrol et"""
+        if self._cycle_lock.locked():
+            log.warning("Price check skipped: previous cycle still running", extra={"mode": "due"})
+            return CycleStats()
+        async with self._cycle_lock:
+            return await self._check_due(limit)
+
+    async def _check_due(self, limit: int | None) -> CycleStats:
+        deadline = self._deadline()
+        try:
+            work = await claim_due_work(
+                self.sessionmaker, self.worker_id, limit or self.tick_budget, self.lease_seconds
             )
-            print(f"✅ Notification sent for item {item.id}")
+        except Exception:
+            log.exception("Error claiming due products")
+            return CycleStats()
+        if not work:
+            return CycleStats()
+        log.info(
+            "Price check started",
+            extra={"mode": "due", "products": len(work), "worker": self.worker_id},
+        )
+
+        async def source():
+            yield work
+
+        with get_profiler().cycle("due"):
+            return await self._run_cycle(source(), scheduled=True, deadline=deadline)
+
+    def _deadline(self) -> float | None:
+        return time.perf_counter() + self.time_budget if self.time_budget else None
+
+    async def _load_cursor(self) -> int:
+        try:
+            async with self.sessionmaker() as session:
+                return int(await AppStateRepo(session).get(_SWEEP_CURSOR_KEY) or 0)
+        except Exception as e:
+            log.warning("Error reading price check cursor", extra={"error": type(e).__name__, "detail": str(e)})
+            return 0
+
+    async def _save_cursor(self, product_id: int) -> None:
+        try:
+            async with self.sessionmaker() as session:
+                await AppStateRepo(session).set(_SWEEP_CURSOR_KEY, str(product_id))
+                await session.commit()
         except Exception as e:
-            print(f"Failed to send notification for item {item.id}: {e}")
+            log.warning("Error saving price check cursor", extra={"error": type(e).__name__, "detail": str(e)})
+
+    async def _run_cycle(self, source, scheduled: bool = False, deadline: float | None = None) -> CycleStats:
+        """Ürün parçalarını işçilere dağıt, yazımları boşalt ve özet yazdır
+
+        `deadline` (perf_counter) geçtikten sonra kaynaktan yeni parça
+        okunmaz, kuyruktan alınan ürünler kontrol edilmeden ertelenir.
+        Kuyruk FIFO olduğu için kontrol edilenler id sırasının başı,
+        ertelenenler sonudur; `stats.resume_after` buradan hesaplanır.
+        """
+        stats = CycleStats()
+        last_queued_id: int | None = None
+        exhausted = False
+
+        # Ürünler keyset sayfalarıyla okunup sınırlı bir kuyruğa akar; işçiler
+        # ilk parça gelir gelmez başlar
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency * 2)
+        # Fiyat yazımları biriktirilip parça parça, kendi commit'leriyle yazılır
+        writer = PriceWriteBuffer(self.sessionmaker, chunk_size=self.write_chunk_size)
+
+        deferred_ids: list[int] = []
+        workers = [
+            asyncio.create_task(self._worker(queue, writer, stats, scheduled, deadline, deferred_ids))
+            for _ in range(self.concurrency)
+        ]
+        try:
+            async for chunk in source:
+                stats.total += len(chunk)
+                for product, items in chunk:
+                    stats.subscriptions += len(items)
+                    await queue.put((product, items))
+                    last_queued_id = product.id
+                if deadline is not None and time.perf_counter() >= deadline:
+                    break
+            else:
+                exhausted = True
+        except Exception:
+            log.exception("Error reading active products")
+        finally:
+            # Her işçiye bir durdurma işareti
+            for _ in workers:
+                await queue.put(None)
+
+        await asyncio.gather(*workers)
+        try:
+            await writer.flush()
+        except Exception:
+            log.exception("Error flushing price writes")
+        stats.write_failures = writer.failed
+        if deferred_ids:
+            stats.resume_after = min(deferred_ids) - 1
+        elif not exhausted:
+            stats.resume_after = last_queued_id
+
+        mode = "due" if scheduled else "full"
+        CYCLE_SECONDS.labels(mode=mode).observe(stats.elapsed)
+        log.info(
+            "Cycle done",
+            extra={
+                "mode": mode,
+                "products": stats.total,
+                "items": stats.subscriptions,
+                "checked": stats.checked,
+                "failed": stats.failed,
+                "notified": stats.notified,
+                "duration_ms": round(stats.elapsed * 1000),
+                "items_per_sec": round(stats.items_per_sec, 2),
+                "not_modified": stats.not_modified,
+                "hash_hits": stats.hash_hits,
+                "fetch_errors": stats.fetch_errors,
+                "write_failures": stats.write_failures,
+                "deferred": stats.deferred,
+            },
+        )
+        return stats
+
+    async def _worker(
+        self,
+        queue: asyncio.Queue,
+        writer: PriceWriteBuffer,
+        stats: CycleStats,
+        scheduled: bool,
+        deadline: float | None = None,
+        deferred_ids: list[int] | None = None,
+    ):
+        """Kuyruktan ürün alıp kontrol eden işçi"""
+        while True:
+            work = await queue.get()
+            if work is None:
+                return
+            product, items = work
+
+            if deadline is not None and time.perf_counter() >= deadline:
+                # Zaman bütçesi doldu: çekmeden bırak, sonraki tur ilk sıradan alır
+                stats.deferred += 1
+                ITEMS_CHECKED.labels(result="deferred").inc()
+                if deferred_ids is not None:
+                    deferred_ids.append(product.id)
+                if scheduled:
+                    # Kira bırakılır, vade şimdi kalır (plan ve volatilite değişmez)
+                    await writer.add(
+                        ScheduleUpdate(
+                            product_id=product.id,
+                            volatility=product.volatility,
+                            next_check_at=datetime.now(timezone.utc),
+                        )
+                    )
+                continue
+
+            outcome = "failed"
+            started = time.perf_counter()
+            try:
+                outcome = await self._check_product(product, items, writer, stats)
+                stats.checked += 1
+                ITEMS_CHECKED.labels(result="checked").inc()
+            except Exception as e:
+                stats.failed += 1
+                ITEMS_CHECKED.labels(result="failed").inc()
+                # Tekrarlayan hatalar (ör. aynı timeout) log katmanında örneklenir
+                log.warning(
+                    "Product check failed",
+                    extra={
+                        "product_id": product.id,
+                        "duration_ms": round((time.perf_counter() - started) * 1000, 1),
+                        "outcome": outcome,
+                        "error": type(e).__name__,
+                        "detail": str(e)[:300],
+                    },
+                )
+            else:
+                if log.isEnabledFor(logging.DEBUG):
+                    log.debug(
+                        "Product checked",
+                        extra={
+                            "product_id": product.id,
+                            "duration_ms": round((time.perf_counter() - started) * 1000, 1),
+                            "outcome": outcome,
+                            "subscribers": len(items),
+                        },
+                    )
+            changed = outcome == "price_changed"
+
+            if scheduled:
+                # Sonuç ne olursa olsun yeni planı yaz ve kirayı bırak; fiyatı
+                # oynayan ürün daha sık, sabit kalan daha seyrek kontrol edilir
+                volatility = self.policy.decayed(product.volatility)
+                if changed:
+                    volatility = self.policy.bumped(volatility)
+                await writer.add(
+                    ScheduleUpdate(
+                        product_id=product.id,
+                        volatility=volatility,
+                        next_check_at=self.policy.next_check_at(datetime.now(timezone.utc), volatility),
+                    )
+                )
+
+    async def _relink_short_url(self, product) -> bool:
+        """Kısa linkli ürünü (ör. eski takiplerden geçişle gelen ty.gl) kanonik URL'ine taşı
+
+        Ürünün URL'i ve anahtarı bir kez çözülmüş URL'e yazılır; sonraki
+        turlar redirect izlemez. Kanonik ürün zaten varsa takipler ona
+        bağlanır ve False döner (bu ürün artık kontrol edilmez).
+        """
+        async with self.sessionmaker() as session:
+            url = await canonicalize_url(product.url, session)
+            if url == product.url:
+                await session.commit()
+                return True
+            product_id = await ProductRepo(session).relink(product.id, product_key_from_url(url), url)
+            await session.commit()
+        log.info(
+            "Short link product relinked",
+            extra={"product_id": product.id, "target_id": product_id, "url": url},
+        )
+        product.url = url
+        return product_id == product.id
+
+    async def _check_product(self, product, items, writer: PriceWriteBuffer, stats: CycleStats) -> str:
+        """Bir ürün için tek fetch, ardından her takipçi için karşılaştırma ve bildirim
+
+        Sonucu döndürür: "fetch_error", "not_modified", "unchanged",
+        "no_price", "price_same", "price_changed" ya da "relinked".
+        """
+        if is_short_link(product.url) and not await self._relink_short_url(product):
+            return "relinked"
+
+        # Sabit bekleme yerine host bazlı hız limiti
+        await self.rate_limiter.wait(product.url)
+
+        # Ürün sayfasını koşullu çek (ETag / Last-Modified / içerik hash'i)
+        page = await product_service.fetch_product_page(
+            product.url,
+            etag=product.etag,
+            last_modified=product.last_modified,
+            previous_hash=product.content_hash,
+        )
+
+        if page.status == "error":
+            stats.fetch_errors += 1
+            return "fetch_error"
+
+        if page.status in ("not_modified", "unchanged"):
+            if page.status == "not_modified":
+                stats.not_modified += 1
+                PARSES_SKIPPED.labels(reason="not_modified").inc()
+            else:
+                stats.hash_hits += 1
+                PARSES_SKIPPED.labels(reason="hash_hit").inc()
+            # Sayfa değişmedi: fiyat son parse edilen fiyatla aynı. Sadece
+            # fiyatı geride kalmış takipçiler (ör. yeni devam ettirilen) için
+            # karşılaştırma ve yazma gerekir, geri kalanı atlanır.
+            current_price = product.last_price
+            items = [it for it in items if it.last_price != current_price]
+            if current_price is None or not items:
+                return page.status
+        else:
+            if not page.info or not page.info.price:
+                return "no_price"
+            current_price = page.info.price
+
+        # Bildirimler ve fiyat güncellemesi tek birim olarak yazılır: fiyat
+        # yazılamazsa bildirim de kuyruğa girmez (sonraki tur tekrar dener)
+        updates: list = []
+        for item in items:
+            old_price = item.last_price or item.baseline_price
+
+            # Fiyat düştü mü kontrol et
+            if current_price < old_price:
+                price_drop_pct = ((old_price - current_price) / old_price) * 100
+
+                # Eşik kontrolü
+                if price_drop_pct >= item.threshold_pct:
+                    # Bildirim outbox'a yazılır, gönderimi NotificationSender yapar
+                    updates.append(
+                        OutboxEntry(
+                            chat_id=item.chat_id,
+                            tracking_item_id=item.id,
+                            text=price_drop_text(item, old_price, current_price, price_drop_pct),
+                        )
+                    )
+                    stats.notified += 1
+
+        # Fiyatı ürün ve tüm takipçileri için güncelle (toplu yazılır)
+        changed = current_price != product.last_price
+        updates.append(
+            PriceUpdate(
+                product_id=product.id,
+                price=current_price,
+                etag=page.etag,
+                last_modified=page.last_modified,
+                content_hash=page.content_hash,
+                # Fiyat geçmişine sadece değişimler yazılır
+                price_changed=changed,
+            )
+        )
+        await writer.add_many(updates)
+        return "price_changed" if changed else "price_same"
+
+
+def build_price_checker(sessionmaker: async_sessionmaker[AsyncSession], settings) -> PriceCheckerService:
+    """Ayarlardan fiyat kontrol servisini oluştur (bot ve işçi süreçleri ortak)"""
+    return PriceCheckerService(
+        sessionmaker,
+        concurrency=settings.check_concurrency,
+        per_host_rps=settings.per_host_rps,
+        write_chunk_size=settings.db_write_chunk,
+        read_chunk_size=settings.check_read_chunk,
+        policy=CheckPolicy(
+            min_interval=timedelta(minutes=settings.check_min_interval_min),
+            max_interval=timedelta(minutes=settings.check_max_interval_min),
+        ),
+        rate_per_min=settings.check_rate_per_min,
+        tick_seconds=settings.check_tick_seconds,
+        worker_id=settings.checker_worker_id,
+        lease_seconds=settings.check_lease_seconds,
+        time_budget=settings.check_time_budget,
+    )
+
+
+def schedule_price_checks(scheduler, price_checker: PriceCheckerService, settings) -> None:
+    """Fiyat kontrol işini APScheduler'a ekle (bot ve işçi süreçleri ortak)
+
+    due (varsayılan): her turda vadesi gelen ürünler kirayla alınır.
+    sweep: her turda tüm katalog, kaydedilen ürün id'sinden devam ederek
+    zaman bütçesi kadar taranır (tek süreç için).
+
+    Turlar asla üst üste binmez (max_instances=1); gecikmiş tetiklemeler
+    tek tura birleştirilir (coalesce) ve bir tur aralığından eski olanlar
+    atlanır.
+    """
+    job = price_checker.check_due_prices
+    kwargs = {}
+    if settings.check_mode == "sweep":
+        job = price_checker.check_all_prices
+        kwargs = {"resume": True}
+    scheduler.add_job(
+        job,
+        'interval',
+        seconds=settings.check_tick_seconds,
+        kwargs=kwargs,
+        id='price_checker',
+        max_instances=1,
+        coalesce=True,
+        misfire_grace_time=settings.check_tick_seconds,
+        replace_existing=True
+    )
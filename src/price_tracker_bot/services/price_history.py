@@ -0,0 +1,144 @@
+"""Fiyat geçmişi: ham gözlemleri saatlik / günlük özetlere toplayan servis"""
+from __future__ import annotations
+
+import logging
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from ..db.models import PriceRollup
+from ..db.repo.app_state_repo import AppStateRepo
+from ..db.repo.price_history_repo import PriceHistoryRepo
+
+log = logging.getLogger(__name__)
+
+# Türkiye sabit UTC+3; günlük özetler yerel gün sınırına göre kesilir
+LOCAL_TZ = timezone(timedelta(hours=3))
+GRANULARITIES = ("hour", "day")
+
+_WATERMARK_KEY = "price_rollup.last_observation_id"
+# Her turda watermark'ın gerisinden tekrar taranan gözlem id'si sayısı.
+# Postgres'te id INSERT anında alınır ama satır commit'te görünür: eşzamanlı
+# işçilerin küçük id'li bir gözlemi, daha büyük id'ler özetlendikten sonra
+# commit olabilir. Özet birleştirme (min / max / zamana göre son) aynı
+# gözlemi tekrar işlemekten etkilenmez; geride kalan gözlemler sonraki
+# turda yakalanır. Bir yazım transaction'ı sürerken tüm işçilerin
+# ekleyebileceği gözlem sayısından büyük olmalıdır.
+RESCAN_IDS = 5000
+
+
+def as_utc(ts: datetime) -> datetime:
+    """SQLite saat dilimsiz döndürür; tüm zamanlar UTC kabul edilir"""
+    if ts.tzinfo is None:
+        return ts.replace(tzinfo=timezone.utc)
+    return ts.astimezone(timezone.utc)
+
+
+def bucket_start(ts: datetime, granularity: str) -> datetime:
+    """Gözlemin düştüğü saat / gün diliminin başlangıcı (UTC)"""
+    local = as_utc(ts).astimezone(LOCAL_TZ)
+    if granularity == "hour":
+        local = local.replace(minute=0, second=0, microsecond=0)
+    else:
+        local = local.replace(hour=0, minute=0, second=0, microsecond=0)
+    return local.astimezone(timezone.utc)
+
+
+class PriceHistoryService:
+    """Ham fiyat gözlemlerini özet tablolarına işleyen arka plan işi"""
+
+    def __init__(
+        self,
+        sessionmaker: async_sessionmaker[AsyncSession],
+        batch_size: int = 5000,
+        rescan_ids: int = RESCAN_IDS,
+    ):
+        self.sessionmaker = sessionmaker
+        self.batch_size = batch_size
+        self.rescan_ids = rescan_ids
+
+    async def run_rollups(self) -> int:
+        """Son çalışmadan bu yana gelen gözlemleri özetle, yeni gözlem sayısını döndür"""
+        total = 0
+        # İlk parti watermark'ın RESCAN_IDS gerisinden, sonrakiler kaldığı yerden
+        after_id = None
+        while True:
+            async with self.sessionmaker() as session:
+                try:
+                    processed, fresh, after_id = await self._rollup_batch(session, after_id)
+                    await session.commit()
+                except Exception:
+                    log.exception("Error in price rollup")
+                    await session.rollback()
+                    return total
+            total += fresh
+            if processed < self.batch_size:
+                break
+        if total:
+            log.info("Price rollup done", extra={"observations": total})
+        return total
+
+    async def _rollup_batch(self, session: AsyncSession, after_id: int | None) -> tuple[int, int, int]:
+        """Bir parti gözlemi özetle
+
+        (okunan, watermark'tan yeni olan, sonraki partinin başlangıç id'si) döner.
+        """
+        state = AppStateRepo(session)
+        history = PriceHistoryRepo(session)
+
+        watermark = int(await state.get(_WATERMARK_KEY) or 0)
+        if after_id is None:
+            after_id = max(0, watermark - self.rescan_ids)
+        observations = await history.observations_after(after_id, self.batch_size)
+        if not observations:
+            return 0, 0, after_id
+
+        product_ids = {obs.product_id for obs in observations}
+        for granularity in GRANULARITIES:
+            # Bu partideki gözlemleri dilimlere göre topla
+            buckets: dict[tuple[int, datetime], list] = {}
+            for obs in observations:
+                observed_at = as_utc(obs.observed_at)
+                key = (obs.product_id, bucket_start(observed_at, granularity))
+                agg = buckets.get(key)
+                if agg is None:
+                    buckets[key] = [obs.price, obs.price, obs.price, observed_at]
+                else:
+                    agg[0] = min(agg[0], obs.price)
+                    agg[1] = max(agg[1], obs.price)
+                    if observed_at >= agg[3]:
+                        agg[2] = obs.price
+                        agg[3] = observed_at
+
+            # Mevcut özet satırlarıyla birleştir
+            since = min(start for _, start in buckets)
+            existing = {
+                (row.product_id, as_utc(row.bucket_start)): row
+                for row in await history.rollups_for(product_ids, granularity, since)
+            }
+            for (product_id, start), (lo, hi, last, last_at) in buckets.items():
+                row = existing.get((product_id, start))
+                if row is None:
+                    session.add(
+                        PriceRollup(
+                            product_id=product_id,
+                            granularity=granularity,
+                            bucket_start=start,
+                            min_price=lo,
+                            max_price=hi,
+                            last_price=last,
+                            last_observed_at=last_at,
+                        )
+                    )
+                    continue
+                row.min_price = min(row.min_price, lo)
+                row.max_price = max(row.max_price, hi)
+                if last_at >= as_utc(row.last_observed_at):
+                    row.last_price = last
+                    row.last_observed_at = last_at
+
+        last_id = observations[-1].id
+        fresh = sum(1 for obs in observations if obs.id > watermark)
+        if last_id > watermark:
+            await state.set(_WATERMARK_KEY, str(last_id))
+        return len(observations), fresh, last_id
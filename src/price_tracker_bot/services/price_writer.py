@@ -0,0 +1,195 @@
+"""Kontrol döngüsünün fiyat / plan / bildirim yazımlarını toplayıp parça parça yazan buffer"""
+from __future__ import annotations
+
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from ..db.repo.outbox_repo import OutboxRepo
+from ..db.repo.product_repo import ProductRepo
+from ..db.repo.tracking_repo import TrackingRepo
+
+log = logging.getLogger(__name__)
+
+
+@dataclass
+class PriceUpdate:
+    """Tek bir ürünün kontrol sonucu"""
+    product_id: int
+    price: float
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    content_hash: Optional[str] = None
+    # Fiyat önceki değerden farklıysa geçmişe gözlem yazılır
+    price_changed: bool = False
+    observed_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+
+
+@dataclass
+class ScheduleUpdate:
+    """Planlı kontrolü biten ürünün yeni planı (yazılırken talep de bırakılır)"""
+    product_id: int
+    volatility: float
+    next_check_at: datetime
+
+
+@dataclass
+class OutboxEntry:
+    """Gönderilecek bildirim
+
+    Ürünün `PriceUpdate`'i ile aynı `add_many` çağrısında verilir; ikisi aynı
+    transaction'da (yedek yolda aynı savepoint'te) yazılır. Fiyat yazılamazsa
+    bildirim de yazılmaz, sonraki tur eski fiyatla tekrar karşılaştırır.
+    """
+    chat_id: int
+    text: str
+    tracking_item_id: Optional[int] = None
+
+
+Update = PriceUpdate | ScheduleUpdate | OutboxEntry
+
+
+class PriceWriteBuffer:
+    """Fiyat güncellemelerini biriktirir, `chunk_size`'lık parçalarla yazar
+
+    Her parça kendi kısa transaction'ında commit edilir; döngü boyunca açık
+    bir transaction tutulmaz. `add_many` ile verilen güncellemeler (bir
+    ürünün fiyatı ve bildirimleri) bir birimdir: parçalara bölünmez. Toplu
+    yazım hata verirse parça birim bazlı savepoint'lerle tekrar denenir,
+    böylece tek bir bozuk kayıt diğerlerinin yazımını geri almaz.
+    """
+
+    def __init__(self, sessionmaker: async_sessionmaker[AsyncSession], chunk_size: int = 200):
+        self.sessionmaker = sessionmaker
+        self.chunk_size = max(1, chunk_size)
+        self.written = 0
+        self.failed = 0
+        # Birimler ve içlerindeki toplam güncelleme sayısı
+        self._pending: list[list[Update]] = []
+        self._pending_count = 0
+        self._lock = asyncio.Lock()
+
+    async def add(self, update: Update) -> None:
+        await self.add_many([update])
+
+    async def add_many(self, updates: list[Update]) -> None:
+        """Güncellemeleri tek birim olarak ekle: hep aynı transaction'da yazılırlar"""
+        if not updates:
+            return
+        self._pending.append(updates)
+        self._pending_count += len(updates)
+        if self._pending_count >= self.chunk_size:
+            await self.flush()
+
+    def _take_batch(self) -> list[list[Update]]:
+        """`chunk_size`'ı aşmayan kadar birim al (birim büyükse tek başına)"""
+        size = 0
+        taken = 0
+        for unit in self._pending:
+            if taken and size + len(unit) > self.chunk_size:
+                break
+            size += len(unit)
+            taken += 1
+        batch = self._pending[:taken]
+        del self._pending[:taken]
+        self._pending_count -= size
+        return batch
+
+    async def flush(self) -> None:
+        """Bekleyen güncellemeleri yaz (aynı anda tek flush çalışır)"""
+        async with self._lock:
+            while self._pending:
+                await self._write_batch(self._take_batch())
+
+    async def _write_batch(self, batch: list[list[Update]]) -> None:
+        """Parçayı yaz; hatalar loglanır, çağırana (işçilere) yükseltilmez
+
+        Oturum açılamaz ya da commit edilemezse parçanın tamamı yazılamadı
+        sayılır (`failed`). Yazılamayan ürünlerin kirası süresi dolunca düşer,
+        sonraki tur eski fiyatla tekrar karşılaştırır.
+        """
+        count = sum(len(unit) for unit in batch)
+        try:
+            async with self.sessionmaker() as session:
+                failed = await self._write_session(session, batch)
+        except Exception as e:
+            self.failed += count
+            log.warning(
+                "Price write batch lost",
+                extra={"items": len(batch), "error": type(e).__name__, "detail": str(e)[:300]},
+            )
+            return
+        self.written += count - failed
+        self.failed += failed
+
+    async def _write_session(self, session: AsyncSession, batch: list[list[Update]]) -> int:
+        """Parçayı tek session'da yaz ve commit et; yazılamayan güncelleme sayısını döndür"""
+        try:
+            await self._write(session, [u for unit in batch for u in unit])
+            await session.commit()
+            return 0
+        except Exception as e:
+            log.warning(
+                "Bulk price write failed, retrying one by one",
+                extra={"items": len(batch), "error": type(e).__name__, "detail": str(e)[:300]},
+            )
+            await session.rollback()
+
+        # Yedek yol: her birim (ürünün fiyatı + bildirimleri) kendi savepoint'inde
+        failed = 0
+        for unit in batch:
+            try:
+                async with session.begin_nested():
+                    await self._write(session, unit)
+            except Exception as e:
+                failed += len(unit)
+                # Birimin son elemanı ürünün fiyat güncellemesidir
+                last = unit[-1]
+                target = (
+                    {"product_id": last.product_id} if hasattr(last, "product_id") else {"chat_id": last.chat_id}
+                )
+                log.warning(
+                    "Error writing update",
+                    extra={**target, "error": type(e).__name__, "detail": str(e)[:300]},
+                )
+        await session.commit()
+        return failed
+
+    @staticmethod
+    async def _write(session: AsyncSession, batch: list[Update]) -> None:
+        product_repo = ProductRepo(session)
+        prices = [u for u in batch if isinstance(u, PriceUpdate)]
+        schedules = [u for u in batch if isinstance(u, ScheduleUpdate)]
+        notifications = [u for u in batch if isinstance(u, OutboxEntry)]
+
+        await product_repo.bulk_update_prices([
+            {
+                "id": u.product_id,
+                "last_price": u.price,
+                "etag": u.etag,
+                "last_modified": u.last_modified,
+                "content_hash": u.content_hash,
+            }
+            for u in prices
+        ])
+        await product_repo.bulk_record_prices([
+            {"product_id": u.product_id, "price": u.price, "observed_at": u.observed_at}
+            for u in prices
+            if u.price_changed
+        ])
+        await TrackingRepo(session).bulk_update_price_for_products([
+            {"b_product_id": u.product_id, "b_price": u.price}
+            for u in prices
+        ])
+        await OutboxRepo(session).enqueue_many([
+            {"chat_id": n.chat_id, "tracking_item_id": n.tracking_item_id, "text": n.text}
+            for n in notifications
+        ])
+        await product_repo.bulk_reschedule([
+            {"id": u.product_id, "volatility": u.volatility, "next_check_at": u.next_check_at}
+            for u in schedules
+        ])
@@ -1,209 +1,187 @@
 """Product enrichment service - Trendyol'dan ürün bilgilerini çeker"""
 from __future__ import annotations
 
-import re
-from typing import Optional
+import logging
 from dataclasses import dataclass
+from typing import Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
 
-import httpx
-from bs4 import BeautifulSoup
+from ..db.repo.short_link_repo import ShortLinkRepo
+from .cache import LruTtlCache
+from .extractors import ProductInfo, check_backend
+from .http_client import get_http_client
+from .metrics import FETCH_ERRORS, FETCH_SECONDS, FETCHES_IN_FLIGHT, PARSE_SECONDS
+from .parse_pool import get_parse_pool
+from .urls import canonical_url, needs_resolution
+
+log = logging.getLogger(__name__)
 
 
 @dataclass
-class ProductInfo:
-    """Ürün bilgileri"""
-    url: str
-    title: Optional[str] = None
-    price: Optional[float] = None
-    image_url: Optional[str] = None
-    currency: str = "TL"
+class PageFetch:
+    """Koşullu sayfa çekme sonucu
+
+    status: "changed" (parse edildi), "not_modified" (HTTP 304),
+    "unchanged" (fiyat bölgesinin hash'i öncekiyle aynı, parse edilmedi)
+    veya "error" (istek başarısız)
+    """
+    status: str
+    info: Optional[ProductInfo] = None
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    content_hash: Optional[str] = None
 
 
 class ProductEnrichmentService:
     """Trendyol'dan ürün bilgilerini çeken servis"""
     
-    def __init__(self):
+    def __init__(self, parser_backend: str = "lxml", embedded_state: bool = True):
         self.timeout = 10.0
+        self.set_parser_backend(parser_backend, embedded_state=embedded_state)
         self.headers = {
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
             "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
             "Accept-Language": "tr-TR,tr;q=0.9,en-US;q=0.8,en;q=0.7",
         }
+        # Kısa link -> kanonik URL (her döngüde yeniden redirect çözülmesin)
+        self.resolved_urls: LruTtlCache[str, str] = LruTtlCache(maxsize=4096, ttl=24 * 3600)
     
+    async def resolve_url(self, url: str) -> str:
+        """Kısa linkleri (ty.gl gibi) gerçek ürün URL'sine çevir ve normalize et"""
+        url = url.strip()
+        if not needs_resolution(url):
+            return canonical_url(url)
+
+        cached = self.resolved_urls.get(url)
+        if cached:
+            return cached
+
+        try:
+            client = get_http_client()
+            response = await client.head(url, headers=self.headers, timeout=self.timeout, follow_redirects=True)
+        except Exception as e:
+            # Çözülemezse linki olduğu gibi kullan (cache'e yazma, sonra tekrar denenir)
+            log.warning("URL redirect failed", extra={"url": url, "error": type(e).__name__, "detail": str(e)})
+            return url
+
+        resolved = canonical_url(str(response.url))
+        self.resolved_urls.put(url, resolved)
+        return resolved
+
+    def set_parser_backend(self, name: str, embedded_state: bool = True) -> None:
+        """HTML parser backend'ini değiştir (bs4 | lxml, isteğe bağlı JSON hızlı yolu)
+
+        Parse işi havuzda çalıştığı için sadece backend adı saklanır; adın
+        geçerliliği burada, açılışta doğrulanır. Parser paketi (lxml / bs4)
+        ilk parse'ta import edilir.
+        """
+        check_backend(name)
+        self.parser_backend = name
+        self.embedded_state = embedded_state
+
+    def remember_resolved(self, short_url: str, resolved_url: str) -> None:
+        """Veritabanından gelen çözümlenmiş linki bellek cache'ine ekle"""
+        self.resolved_urls.put(short_url.strip(), resolved_url)
+
     async def fetch_product_info(self, url: str) -> ProductInfo:
         """URL'den ürün bilgilerini çek"""
         
-        # Kısa linkler için gerçek URL'yi al (ty.gl gibi)
-        if "ty.gl" in url or "trendyol.com" not in url:
-            try:
-                async with httpx.AsyncClient(timeout=self.timeout, follow_redirects=True) as client:
-                    response = await client.head(url, headers=self.headers)
-                    url = str(response.url)
-            except Exception as e:
-                print(f"URL redirect error: {e}")
+        # Kısa linkler için gerçek URL'yi al (ty.gl gibi), cache'ten gelebilir
+        url = await self.resolve_url(url)
         
         # Trendyol kontrolü
         if "trendyol.com" in url:
-            return await self._fetch_trendyol(url)
+            page = await self.fetch_product_page(url)
+            return page.info or ProductInfo(url=url)
         else:
             return ProductInfo(url=url)
-    
-    async def _fetch_trendyol(self, url: str) -> ProductInfo:
-        """Trendyol'dan ürün bilgilerini çek"""
+
+    async def fetch_product_page(
+        self,
+        url: str,
+        etag: str | None = None,
+        last_modified: str | None = None,
+        previous_hash: str | None = None,
+    ) -> PageFetch:
+        """Ürün sayfasını koşullu GET ile çek, değişmediyse parse etme
+
+        Önceki yanıtın ETag / Last-Modified değerleri gönderilir; sunucu 304
+        dönerse ya da fiyat bölgesinin hash'i `previous_hash` ile aynıysa
+        sayfa parse edilmeden "değişmedi" sonucu döner.
+        """
+        headers = self.headers
+        if etag or last_modified:
+            headers = dict(self.headers)
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
+
         try:
-            async with httpx.AsyncClient(timeout=self.timeout, follow_redirects=True) as client:
-                response = await client.get(url, headers=self.headers)
-                response.raise_for_status()
-                soup = BeautifulSoup(response.text, "lxml")
-                
-                # Başlık - Yeni selector (iki farklı format)
-                title = None
-                # Format 1: data-testid="product-title"
-                title_elem = soup.find("h1", attrs={"data-testid": "product-title"})
-                if not title_elem:
-                    # Format 2: class="product-title variant-pdp"
-                    title_elem = soup.find("h1", class_="product-title variant-pdp")
-                if not title_elem:
-                    # Format 3: Sadece "product-title" class'ı
-                    title_elem = soup.find("h1", class_="product-title")
-                if not title_elem:
-                    # Fallback: pr-new-br
-                    title_elem = soup.find("h1", class_="pr-new-br")
-                if not title_elem:
-                    # Son fallback: herhangi bir h1
-                    title_elem = soup.find("h1")
-                if title_elem:
-                    # Sadece metin al, <a> ve <strong> içindeki metinler dahil
-                    title = title_elem.get_text(strip=True)
-                
-                # Fiyat - Yeni selector (en ucuz fiyatı bul)
-                price = None
-                prices = []
-                
-                # 1. ty-plus-price yapısındaki fiyatlar (sepette/kampanya fiyatları)
-                plus_price_elem = soup.find("div", class_="ty-plus-price-content")
-                if plus_price_elem:
-                    # Sepette indirimli fiyat
-                    discounted_elem = plus_price_elem.find("span", class_="ty-plus-price-discounted-price")
-                    if discounted_elem:
-                        price_val = self._extract_price(discounted_elem.get_text(strip=True))
-                        if price_val:
-                            prices.append(price_val)
-                    
-                    # Normal fiyat
-                    original_elem = plus_price_elem.find("div", class_="ty-plus-price-original-price")
-                    if original_elem:
-                        price_val = self._extract_price(original_elem.get_text(strip=True))
-                        if price_val:
-                            prices.append(price_val)
-                
-                # 2. campaign-price-content yapısı
-                campaign_price_elem = soup.find("div", class_="campaign-price-content")
-                if campaign_price_elem:
-                    # Sepette indirimli fiyat
-                    new_price = campaign_price_elem.find("p", class_="new-price")
-                    if new_price:
-                        price_val = self._extract_price(new_price.get_text(strip=True))
-                        if price_val:
-                            prices.append(price_val)
-                    
-                    # Eski fiyat
-                    old_price = campaign_price_elem.find("p", class_="old-price")
-                    if old_price:
-                        price_val = self._extract_price(old_price.get_text(strip=True))
-                        if price_val:
-                            prices.append(price_val)
-                
-                # 3. data-testid="lowest-price" yapısı (14 günün en düşük fiyatı)
-                lowest_price_btn = soup.find("button", attrs={"data-testid": "lowest-price"})
-                if lowest_price_btn:
-                    price_view = lowest_price_btn.find("div", class_="price-view")
-                    if price_view:
-                        # Sadece indirimli fiyatı al (en ucuz olan)
-                        discounted = price_view.find("span", class_="discounted")
-                        if discounted:
-                            price_val = self._extract_price(discounted.get_text(strip=True))
-                            if price_val:
-                                prices.append(price_val)
-                
-                # 4. data-testid="normal-price" yapısı (iki farklı format)
-                price_wrapper = soup.find("div", attrs={"data-testid": "normal-price"})
-                if price_wrapper:
-                    # Format 1: price-container içinde discounted span
-                    price_container = price_wrapper.find("div", class_="price-container")
-                    if price_container:
-                        price_elem = price_container.find("span", class_="discounted")
-                        if price_elem:
-                            price_val = self._extract_price(price_elem.get_text(strip=True))
-                            if price_val:
-                                prices.append(price_val)
-                    else:
-                        # Format 2: Doğrudan discounted span
-                        price_elem = price_wrapper.find("span", class_="discounted")
-                        if price_elem:
-                            price_val = self._extract_price(price_elem.get_text(strip=True))
-                            if price_val:
-                                prices.append(price_val)
-                
-                # 5. Fallback fiyat selector'ları
-                if not prices:
-                    price_elem = soup.find("span", class_="prc-dsc")
-                    if not price_elem:
-                        price_elem = soup.find("span", class_="prc-slg")
-                    if price_elem:
-                        price_val = self._extract_price(price_elem.get_text(strip=True))
-                        if price_val:
-                            prices.append(price_val)
-                
-                # En ucuz fiyatı al
-                if prices:
-                    price = min(prices)
-                
-                # Resim - Yeni selector
-                image_url = None
-                # Önce data-testid="image" içinde ara
-                img_elem = soup.find("img", attrs={"data-testid": "image"})
-                if not img_elem:
-                    img_elem = soup.find("img", class_="ph-gallery-img")
-                if not img_elem:
-                    img_elem = soup.find("img", attrs={"data-src": True})
-                if img_elem:
-                    image_url = img_elem.get("src") or img_elem.get("data-src")
-                    if image_url and not image_url.startswith("http"):
-                        image_url = "https:" + image_url
-                
-                return ProductInfo(
-                    url=url,
-                    title=title,
-                    price=price,
-                    image_url=image_url,
-                    currency="TL"
+            client = get_http_client()
+            with FETCHES_IN_FLIGHT.track_inprogress(), FETCH_SECONDS.time():
+                response = await client.get(url, headers=headers, timeout=self.timeout, follow_redirects=True)
+            if response.status_code == 304:
+                return PageFetch(status="not_modified", etag=etag, last_modified=last_modified, content_hash=previous_hash)
+            response.raise_for_status()
+
+            new_etag = response.headers.get("ETag")
+            new_last_modified = response.headers.get("Last-Modified")
+            # Hash ve parse event loop dışında (parse havuzunda) çalışır
+            with PARSE_SECONDS.time():
+                digest, info = await get_parse_pool().analyze(
+                    response.text, url, self.parser_backend, self.embedded_state, previous_hash
                 )
+            if info is None:
+                return PageFetch(status="unchanged", etag=new_etag, last_modified=new_last_modified, content_hash=digest)
+
+            return PageFetch(
+                status="changed",
+                info=info,
+                etag=new_etag,
+                last_modified=new_last_modified,
+                content_hash=digest,
+            )
         except Exception as e:
-            print(f"Trendyol fetch error: {e}")
-            return ProductInfo(url=url)
-    
-    def _extract_price(self, price_text: str) -> Optional[float]:
-        """Metin içinden fiyat çıkar"""
-        if not price_text:
-            return None
-        
-        # Sadece sayıları ve nokta/virgül al
-        cleaned = re.sub(r"[^\d,.]", "", price_text)
-        
-        # Virgülü noktaya çevir
-        cleaned = cleaned.replace(",", ".")
-        
-        # Birden fazla nokta varsa son noktadan sonrasını al (kuruş)
-        if cleaned.count(".") > 1:
-            parts = cleaned.split(".")
-            cleaned = "".join(parts[:-1]) + "." + parts[-1]
-        
-        try:
-            return float(cleaned)
-        except (ValueError, AttributeError):
-            return None
+            # httpx client kurulurken zaten yüklendi; modül açılışta import etmesin
+            import httpx
+
+            if isinstance(e, httpx.HTTPStatusError):
+                status = str(e.response.status_code)
+            elif isinstance(e, httpx.TransportError):
+                status = "network"
+            else:
+                status = "other"
+            FETCH_ERRORS.labels(status=status).inc()
+            # Aynı türden hatalar (ör. 429 yağmuru) log katmanında örneklenir
+            log.warning(
+                "Trendyol fetch failed",
+                extra={"url": url, "status": status, "error": type(e).__name__, "detail": str(e)[:300]},
+            )
+            return PageFetch(status="error")
 
 
 # Global instance
 product_service = ProductEnrichmentService()
+
+
+async def canonicalize_url(url: str, session: AsyncSession) -> str:
+    """Kısa linki bir kez çöz, sonucu veritabanında ve bellekte sakla"""
+    if not needs_resolution(url):
+        return await product_service.resolve_url(url)
+
+    cached = product_service.resolved_urls.get(url.strip())
+    if cached:
+        return cached
+
+    short_links = ShortLinkRepo(session)
+    resolved = await short_links.get_resolved(url)
+    if resolved:
+        product_service.remember_resolved(url, resolved)
+        return resolved
+
+    resolved = await product_service.resolve_url(url)
+    if resolved != url and len(url) <= 512:
+        await short_links.save(url, resolved)
+    return resolved
@@ -0,0 +1,238 @@
+"""Çalışan süreç için isteğe bağlı CPU ve bellek profili
+
+- CPU: sonraki N kontrol turu ya da verilen süre boyunca cProfile (.pstats)
+  ve tüm thread'lerden örnekleyen bir profiler (.collapsed, flamegraph.pl /
+  speedscope ile açılır) birlikte çalışır. Örnekleyici parse havuzunun
+  thread'lerini de görür; event loop'un `select` içinde geçen süresi ağ /
+  Telegram beklemesidir.
+- Bellek: tracemalloc anlık görüntüleri (.tracemalloc) ve bir önceki ile
+  ilk görüntüye göre en çok büyüyen satırlar (.txt).
+
+Profil ayarlarla (PROFILE_CYCLES, PROFILE_MEMORY_INTERVAL_MIN) ya da
+PROFILE_TOKEN ile korunan /debug/profile ve /debug/memory endpoint'leriyle
+açılır. Sonuçlar PROFILE_DIR altına yazılır.
+"""
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import cProfile
+import hmac
+import logging
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from datetime import datetime
+
+from aiohttp import web
+
+log = logging.getLogger(__name__)
+
+
+class StackSampler:
+    """Arka plan thread'inde tüm thread'lerin yığınını `interval` sn'de bir örnekler"""
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.samples: Counter[str] = Counter()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                self.samples[";".join(reversed(stack))] += 1
+
+    def write_collapsed(self, path: str) -> None:
+        """Brendan Gregg'in collapsed stack formatı: `kök;...;yaprak sayı`"""
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+class Profiler:
+    """Kontrol turlarını, zaman pencerelerini ve bellek büyümesini profiller"""
+
+    def __init__(self, output_dir: str = "profiles", sample_interval: float = 0.01):
+        self.output_dir = output_dir
+        self.sample_interval = sample_interval
+        self._armed_cycles = 0
+        self._active = False
+        self._baseline: tracemalloc.Snapshot | None = None
+        self._previous: tracemalloc.Snapshot | None = None
+
+    def arm_cycles(self, count: int) -> None:
+        """Sonraki `count` kontrol turunu profille"""
+        self._armed_cycles = max(0, count)
+
+    @contextlib.contextmanager
+    def cycle(self, label: str):
+        """Kontrol turunu sarar; tur profil için işaretlendiyse profili alır"""
+        if self._armed_cycles <= 0 or self._active:
+            yield
+            return
+        self._armed_cycles -= 1
+        with self._capture(f"cycle-{label}"):
+            yield
+
+    async def profile_window(self, seconds: float) -> str:
+        """`seconds` boyunca tüm süreci profille, dosya ön ekini döndür"""
+        if self._active:
+            raise RuntimeError("another profile is already running")
+        with self._capture("window") as prefix:
+            await asyncio.sleep(seconds)
+        return prefix
+
+    @contextlib.contextmanager
+    def _capture(self, name: str):
+        os.makedirs(self.output_dir, exist_ok=True)
+        prefix = os.path.join(self.output_dir, f"{name}-{datetime.now():%Y%m%d-%H%M%S}")
+        self._active = True
+        profile = cProfile.Profile()
+        sampler = StackSampler(self.sample_interval)
+        started = time.perf_counter()
+        sampler.start()
+        profile.enable()
+        try:
+            yield prefix
+        finally:
+            profile.disable()
+            sampler.stop()
+            self._active = False
+            profile.dump_stats(f"{prefix}.pstats")
+            sampler.write_collapsed(f"{prefix}.collapsed")
+            log.info(
+                "Profile written",
+                extra={
+                    "path": f"{prefix}.pstats",
+                    "duration_s": round(time.perf_counter() - started, 1),
+                    "samples": sum(sampler.samples.values()),
+                },
+            )
+
+    def start_memory_tracking(self, frames: int = 10) -> None:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+            log.info("tracemalloc started", extra={"frames": frames})
+
+    def memory_snapshot(self, top: int = 30) -> str | None:
+        """tracemalloc görüntüsü al, önceki ve ilk görüntüye göre farkı yaz
+
+        tracemalloc çalışmıyorsa başlatır ve None döner (ilk görüntü bir
+        sonraki çağrıda alınır).
+        """
+        if not tracemalloc.is_tracing():
+            self.start_memory_tracking()
+            return None
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        prefix = os.path.join(self.output_dir, f"mem-{datetime.now():%Y%m%d-%H%M%S}")
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ))
+        snapshot.dump(f"{prefix}.tracemalloc")
+
+        current, peak = tracemalloc.get_traced_memory()
+        lines = [f"traced: {current / 1e6:.1f} MB (peak {peak / 1e6:.1f} MB)", ""]
+        for title, base in (("since previous snapshot", self._previous), ("since first snapshot", self._baseline)):
+            if base is None:
+                continue
+            lines.append(f"== Top {top} growth {title} ==")
+            lines.extend(str(stat) for stat in snapshot.compare_to(base, "lineno")[:top])
+            lines.append("")
+        lines.append(f"== Top {top} allocations ==")
+        lines.extend(str(stat) for stat in snapshot.statistics("lineno")[:top])
+        with open(f"{prefix}.txt", "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+
+        if self._baseline is None:
+            self._baseline = snapshot
+        self._previous = snapshot
+        log.info(
+            "Memory snapshot written",
+            extra={"path": f"{prefix}.tracemalloc", "traced_mb": round(current / 1e6, 1)},
+        )
+        return prefix
+
+
+_profiler = Profiler()
+_token: str | None = None
+
+
+def start_profiler(settings) -> Profiler:
+    """Açılışta profil ayarlarını uygula"""
+    global _profiler, _token
+    _profiler = Profiler(settings.profile_dir, sample_interval=settings.profile_sample_ms / 1000)
+    _token = settings.profile_token
+    if settings.profile_cycles:
+        _profiler.arm_cycles(settings.profile_cycles)
+        log.info("Check cycles will be profiled", extra={"cycles": settings.profile_cycles, "dir": settings.profile_dir})
+    if settings.profile_memory_interval_min:
+        _profiler.start_memory_tracking(settings.profile_memory_frames)
+    return _profiler
+
+
+def get_profiler() -> Profiler:
+    return _profiler
+
+
+def _authorized(request: web.Request) -> bool:
+    given = request.headers.get("X-Profile-Token") or request.query.get("token") or ""
+    return bool(_token) and hmac.compare_digest(given, _token)
+
+
+async def profile_handler(request: web.Request) -> web.Response:
+    """POST /debug/profile?cycles=N  veya  ?seconds=S (pencere bitince yanıt döner)"""
+    if not _authorized(request):
+        return web.Response(status=403, text="forbidden")
+    try:
+        if "seconds" in request.query:
+            seconds = min(600.0, float(request.query["seconds"]))
+            prefix = await _profiler.profile_window(seconds)
+            return web.Response(text=f"written {prefix}.pstats / {prefix}.collapsed\n")
+        cycles = int(request.query.get("cycles", "1"))
+    except (ValueError, RuntimeError) as e:
+        return web.Response(status=400, text=f"{e}\n")
+    _profiler.arm_cycles(cycles)
+    return web.Response(text=f"next {cycles} check cycles will be profiled into {_profiler.output_dir}/\n")
+
+
+async def memory_handler(request: web.Request) -> web.Response:
+    """POST /debug/memory: tracemalloc görüntüsü ve fark raporu"""
+    if not _authorized(request):
+        return web.Response(status=403, text="forbidden")
+    # Görüntü almak büyük heap'te saniyeler sürebilir; event loop bloklanmasın
+    prefix = await asyncio.to_thread(_profiler.memory_snapshot)
+    if prefix is None:
+        return web.Response(text="tracemalloc started; call again to take the first snapshot\n")
+    return web.Response(text=f"written {prefix}.tracemalloc / {prefix}.txt\n")
+
+
+def register_profiling_routes(app: web.Application) -> None:
+    """PROFILE_TOKEN ayarlıysa /debug endpoint'lerini ekle (yoksa hiç açılmaz)"""
+    if _token:
+        app.router.add_post("/debug/profile", profile_handler)
+        app.router.add_post("/debug/memory", memory_handler)
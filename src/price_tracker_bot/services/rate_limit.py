@@ -0,0 +1,98 @@
+"""Host / anahtar bazlı istek hız sınırlayıcılar"""
+from __future__ import annotations
+
+import asyncio
+from urllib.parse import urlsplit
+
+
+class KeyedRateLimiter:
+    """Her anahtar için saniyede en fazla `rps` çağrı geçirir.
+
+    Her çağrı anahtarın bir sonraki boş zaman dilimini rezerve eder, böylece
+    aynı anahtara giden eşzamanlı çağrılar eşit aralıklarla dağılır. Dilimi
+    geçmişte kalan anahtarlar kayıtsız anahtarla aynı davrandığı için,
+    sözlük büyüdükçe (ör. her sohbet bir anahtar) silinir.
+    """
+
+    # Temizlik en az bu kadar anahtar birikince yapılır
+    PRUNE_MIN_KEYS = 1024
+
+    def __init__(self, rps: float):
+        self.interval = 1.0 / rps if rps > 0 else 0.0
+        self._next_slot: dict[object, float] = {}
+        self._prune_at = self.PRUNE_MIN_KEYS
+
+    def _prune(self, now: float) -> None:
+        """Dilimi geçmiş anahtarları at; sonraki temizlik kalan sayının iki katında"""
+        self._next_slot = {key: slot for key, slot in self._next_slot.items() if slot > now}
+        self._prune_at = max(self.PRUNE_MIN_KEYS, 2 * len(self._next_slot))
+
+    async def wait_key(self, key) -> None:
+        """Çağrıdan önce anahtarın sırasını bekle"""
+        if not self.interval:
+            return
+
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        if len(self._next_slot) >= self._prune_at:
+            self._prune(now)
+        slot = max(now, self._next_slot.get(key, now))
+        self._next_slot[key] = slot + self.interval
+
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+    def delay_key(self, key, seconds: float) -> None:
+        """Anahtarın bir sonraki dilimini en az `seconds` sonrasına it"""
+        now = asyncio.get_running_loop().time()
+        if len(self._next_slot) >= self._prune_at:
+            self._prune(now)
+        self._next_slot[key] = max(self._next_slot.get(key, now), now + seconds)
+
+
+class HostRateLimiter(KeyedRateLimiter):
+    """Her host için saniyede en fazla `rps` istek geçirir."""
+
+    async def wait(self, url: str) -> None:
+        """İstek atılmadan önce host'un sırasını bekle"""
+        if not self.interval:
+            return
+        await self.wait_key(urlsplit(url).hostname or "")
+
+
+class TokenBucket:
+    """Global hız sınırı: saniyede `rate` jeton, en fazla `burst` birikir.
+
+    `pause` ile (ör. Telegram'ın retry_after yanıtında) tüm çağrılar
+    verilen süre boyunca durdurulabilir.
+    """
+
+    def __init__(self, rate: float, burst: float | None = None):
+        self.rate = rate
+        self.capacity = burst if burst is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated: float | None = None
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            while True:
+                now = loop.time()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+                if self._updated is not None:
+                    self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    def pause(self, seconds: float) -> None:
+        now = asyncio.get_running_loop().time()
+        self._paused_until = max(self._paused_until, now + seconds)
@@ -0,0 +1,47 @@
+"""Açılış süresinin aşamalara dağılımı
+
+Süreç girişinde (ağır importlardan önce) alınan zamanla başlatılır; her
+`mark(aşama)` bir önceki işaretten bu yana geçen süreyi o aşamaya yazar.
+`report()` dağılımı tek log satırı olarak yazar (`role`, `phases_ms`, `total_ms`)
+ve /metrics'te price_tracker_startup_seconds{phase} olarak gösterir.
+"""
+from __future__ import annotations
+
+import logging
+import time
+
+from .metrics import STARTUP_SECONDS
+
+log = logging.getLogger(__name__)
+
+
+class StartupTimer:
+    """Aşama aşama açılış süresi"""
+
+    def __init__(self, started: float | None = None):
+        self.started = time.perf_counter() if started is None else started
+        self._last = self.started
+        self.phases: dict[str, float] = {}
+
+    def mark(self, phase: str) -> None:
+        """Son işaretten bu yana geçen süreyi `phase` aşamasına ekle"""
+        now = time.perf_counter()
+        self.phases[phase] = self.phases.get(phase, 0.0) + now - self._last
+        self._last = now
+
+    @property
+    def total(self) -> float:
+        return self._last - self.started
+
+    def report(self, role: str) -> None:
+        for phase, seconds in self.phases.items():
+            STARTUP_SECONDS.labels(phase=phase).set(seconds)
+        STARTUP_SECONDS.labels(phase="total").set(self.total)
+        log.info(
+            "Startup done",
+            extra={
+                "role": role,
+                "phases_ms": {phase: round(s * 1000, 1) for phase, s in self.phases.items()},
+                "total_ms": round(self.total * 1000, 1),
+            },
+        )
@@ -0,0 +1,52 @@
+"""Ürün URL'leri için yardımcı fonksiyonlar"""
+from __future__ import annotations
+
+import re
+from urllib.parse import urlsplit
+
+# Trendyol ürün URL'lerindeki ürün numarası: .../marka/urun-adi-p-123456
+_TRENDYOL_PRODUCT_ID_RE = re.compile(r"-p-(\d+)")
+
+
+def product_key_from_url(url: str) -> str:
+    """URL'den kanonik ürün anahtarı üret
+
+    Trendyol linklerinde "-p-<id>" kısmı kullanılır, böylece farklı
+    query parametreli aynı ürün linkleri tek ürüne düşer.
+    """
+    parts = urlsplit(url.strip())
+    host = (parts.hostname or "").lower()
+
+    if "trendyol.com" in host:
+        match = _TRENDYOL_PRODUCT_ID_RE.search(parts.path)
+        if match:
+            return f"trendyol:{match.group(1)}"
+
+    # Diğer linkler: query ve fragment olmadan host + path
+    if host.startswith("www."):
+        host = host[4:]
+    return f"{host}{parts.path.rstrip('/')}"
+
+
+def needs_resolution(url: str) -> bool:
+    """Kısa link mi (ty.gl gibi), yoksa doğrudan Trendyol linki mi"""
+    return "ty.gl" in url or "trendyol.com" not in url
+
+
+def is_short_link(url: str) -> bool:
+    """Trendyol kısa linki mi (ty.gl)"""
+    return (urlsplit(url.strip()).hostname or "").lower() == "ty.gl"
+
+
+def canonical_url(url: str) -> str:
+    """Trendyol ürün linklerinden query ve fragment kısmını at
+
+    Takip ve sepet parametreleri (boutiqueId, utm_* vs.) aynı ürün için
+    farklı URL'ler üretir; saklanan link hep aynı biçimde olsun.
+    """
+    url = url.strip()
+    parts = urlsplit(url)
+    host = (parts.hostname or "").lower()
+    if "trendyol.com" not in host or not _TRENDYOL_PRODUCT_ID_RE.search(parts.path):
+        return url
+    return f"https://{host}{parts.path}"
@@ -0,0 +1,81 @@
+"""Sadece fiyat kontrolü yapan işçi süreci (bot / webhook olmadan)
+
+Aynı veritabanına bağlı birden çok işçi çalıştırılabilir; vadesi gelen
+ürünler kirayla paylaşılır, aynı ürün iki işçide birden kontrol edilmez.
+Bildirimler outbox'a yazılır ve bot süreci tarafından gönderilir.
+
+    python -m src.price_tracker_bot.worker
+"""
+import time
+
+# Açılış süresi ağır importlar dahil ölçülsün
+_STARTED = time.perf_counter()
+
+import asyncio
+
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+
+from .config import load_settings
+from .db.engine import build_engine, build_sessionmaker
+from .services.http_client import configure_http_client, close_http_client
+from .services.log import setup_logging, stop_logging
+from .services.metrics import start_metrics_server
+from .services.parse_pool import start_parse_pool, close_parse_pool
+from .services.profiling import start_profiler
+from .services.price_checker import build_price_checker, schedule_price_checks
+from .services.product_enrichment import product_service
+from .services.startup import StartupTimer
+
+async def main() -> None:
+    startup = StartupTimer(_STARTED)
+    startup.mark("imports")
+    settings = load_settings()
+    # Servis logları kuyruk üzerinden, arka plan thread'inde yazılır (LOG_*)
+    setup_logging(settings)
+    startup.mark("config")
+
+    engine = build_engine(settings.database_url)
+    sessionmaker = build_sessionmaker(engine)
+    startup.mark("database")
+
+    # httpx ve client ilk turda kurulur
+    configure_http_client(settings)
+    # Hash / parse işleri event loop dışında (PARSE_POOL)
+    start_parse_pool(settings)
+    product_service.set_parser_backend(settings.parser_backend, embedded_state=settings.parser_embedded_state)
+    # İsteğe bağlı CPU / bellek profili (PROFILE_*)
+    profiler = start_profiler(settings)
+    startup.mark("services")
+
+    price_checker = build_price_checker(sessionmaker, settings)
+    scheduler = AsyncIOScheduler()
+    schedule_price_checks(scheduler, price_checker, settings)
+    if settings.profile_memory_interval_min:
+        # Uzun çalışmada bellek büyümesini izlemek için periyodik tracemalloc görüntüsü
+        scheduler.add_job(
+            profiler.memory_snapshot,
+            'interval',
+            minutes=settings.profile_memory_interval_min,
+            id='memory_snapshot',
+            replace_existing=True
+        )
+    scheduler.start()
+    # İşçinin metrikleri (her işçiye ayrı METRICS_PORT verilmeli)
+    metrics_runner = await start_metrics_server(settings.metrics_port) if settings.metrics_port else None
+    print(f"✅ Checker worker {price_checker.worker_id} başlatıldı - {settings.check_tick_seconds} sn'de bir tur")
+    startup.mark("scheduler")
+    startup.report("worker")
+
+    try:
+        await asyncio.Event().wait()
+    finally:
+        scheduler.shutdown(wait=False)
+        if metrics_runner is not None:
+            await metrics_runner.cleanup()
+        await close_http_client()
+        close_parse_pool()
+        await engine.dispose()
+        stop_logging()
+
+if __name__ == "__main__":
+    asyncio.run(main())
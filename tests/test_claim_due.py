@@ -0,0 +1,56 @@
+import asyncio
+import sqlite3
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from benchmarks.bench_active_iteration import create_schema
+from src.price_tracker_bot.db.engine import build_engine, build_sessionmaker
+from src.price_tracker_bot.db.repo.outbox_repo import OutboxRepo
+from src.price_tracker_bot.db.repo.product_repo import ProductRepo
+
+
+def seed(path: str) -> None:
+    conn = sqlite3.connect(path)
+    # Vade sırası id sırasının tersi
+    conn.executemany(
+        "INSERT INTO products (id, product_key, url, next_check_at) VALUES (?, ?, ?, ?)",
+        [(i, f"trendyol:{i}", f"https://www.trendyol.com/marka/urun-p-{i}", f"2000-01-01 00:00:{10 - i:02d}")
+         for i in range(1, 6)],
+    )
+    conn.executemany(
+        "INSERT INTO tracking_items (chat_id, product_id, url, baseline_price, last_price, threshold_pct, is_active) "
+        "VALUES (1, ?, 'u', 100, 100, 5, 1)",
+        [(i,) for i in range(1, 6)],
+    )
+    conn.executemany(
+        "INSERT INTO outbox_messages (chat_id, text, status, attempts, next_attempt_at) "
+        "VALUES (1, 'mesaj', 'pending', 0, '2000-01-01 00:00:00')",
+        [() for _ in range(5)],
+    )
+    conn.commit()
+    conn.close()
+
+
+@pytest.mark.parametrize("returning", [True, False])
+def test_claim_due_returns_only_this_claim(tmp_path, returning):
+    path = str(tmp_path / "claim.db")
+
+    async def run():
+        await create_schema(path)
+        seed(path)
+        engine = build_engine(f"sqlite+aiosqlite:///{path}")
+        engine.dialect.update_returning = returning
+        sessionmaker = build_sessionmaker(engine)
+        now = datetime.now(timezone.utc)
+        claims = []
+        for owner in ("a", "b"):
+            async with sessionmaker() as session:
+                products = await ProductRepo(session).claim_due(now, 3, owner, now + timedelta(minutes=5))
+                messages = await OutboxRepo(session).claim_due(now, 3, owner, now + timedelta(minutes=5))
+                await session.commit()
+            claims.append(([p.id for p in products], [m.id for m in messages]))
+        await engine.dispose()
+        return claims
+
+    assert asyncio.run(run()) == [([5, 4, 3], [1, 2, 3]), ([2, 1], [4, 5])]
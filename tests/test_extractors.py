@@ -0,0 +1,16 @@
+import pytest
+
+from benchmarks.bench_parser_corpus import URL, load_corpus
+from src.price_tracker_bot.services.parse_pool import analyze_page
+
+PAGES = load_corpus()
+
+
+@pytest.mark.parametrize("page_name", sorted(PAGES))
+def test_backends_return_same_title(page_name):
+    html = PAGES[page_name]
+    titles = {}
+    for spec, backend, embedded_state in (("bs4", "bs4", False), ("lxml", "lxml", False), ("json+lxml", "lxml", True)):
+        _, info = analyze_page(html, URL, backend, embedded_state)
+        titles[spec] = info.title if info else None
+    assert len(set(titles.values())) == 1, titles
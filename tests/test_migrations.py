@@ -0,0 +1,130 @@
+import asyncio
+import sqlite3
+
+import pytest
+
+from src.price_tracker_bot.db.engine import build_engine, build_sessionmaker
+from src.price_tracker_bot.db.schema import ensure_schema
+from src.price_tracker_bot.services.price_checker import PriceCheckerService, claim_due_work
+from src.price_tracker_bot.services.product_enrichment import product_service
+
+
+def test_migrates_table_without_timestamp_columns(tmp_path):
+    """created_at / updated_at'i olmayan eski tabloya ikisi de eklenir"""
+    path = str(tmp_path / "legacy.db")
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE tracking_items (id INTEGER PRIMARY KEY AUTOINCREMENT, chat_id BIGINT NOT NULL, "
+        "url VARCHAR(2048) NOT NULL, baseline_price FLOAT NOT NULL, last_price FLOAT NOT NULL, "
+        "threshold_pct FLOAT NOT NULL, is_active BOOLEAN NOT NULL)"
+    )
+    conn.execute(
+        "INSERT INTO tracking_items (chat_id, url, baseline_price, last_price, threshold_pct, is_active) "
+        "VALUES (1, 'https://www.trendyol.com/marka/urun-p-111', 100, 100, 5, 1)"
+    )
+    conn.commit()
+    conn.close()
+
+    async def run():
+        engine = build_engine(f"sqlite+aiosqlite:///{path}")
+        await ensure_schema(engine)
+        await engine.dispose()
+
+    asyncio.run(run())
+    conn = sqlite3.connect(path)
+    row = conn.execute("SELECT created_at, updated_at, product_id FROM tracking_items").fetchone()
+    conn.close()
+    assert row[0] is not None and row[1] is not None and row[2] is not None
+
+
+KNOWN = "https://ty.gl/known"
+UNKNOWN = "https://ty.gl/unknown"
+CANONICAL = "https://www.trendyol.com/marka/urun-p-111"
+
+
+def seed_legacy(path: str) -> None:
+    """`product_id` sütunundan önceki şemada kısa linkli takipler"""
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE tracking_items (id INTEGER PRIMARY KEY AUTOINCREMENT, chat_id BIGINT NOT NULL, "
+        "url VARCHAR(2048) NOT NULL, title VARCHAR(512), image_url VARCHAR(2048), "
+        "baseline_price FLOAT NOT NULL, last_price FLOAT NOT NULL, threshold_pct FLOAT NOT NULL, "
+        "is_active BOOLEAN NOT NULL)"
+    )
+    conn.execute(
+        "CREATE TABLE short_links (id INTEGER PRIMARY KEY AUTOINCREMENT, short_url VARCHAR(512) NOT NULL UNIQUE, "
+        "resolved_url VARCHAR(2048) NOT NULL, created_at DATETIME DEFAULT CURRENT_TIMESTAMP)"
+    )
+    conn.execute("INSERT INTO short_links (short_url, resolved_url) VALUES (?, ?)", (KNOWN, CANONICAL + "?boutiqueId=1"))
+    conn.executemany(
+        "INSERT INTO tracking_items (chat_id, url, baseline_price, last_price, threshold_pct, is_active) "
+        "VALUES (?, ?, 100, 100, 5, 1)",
+        [(1, KNOWN), (2, CANONICAL), (3, UNKNOWN)],
+    )
+    conn.commit()
+    conn.close()
+
+
+def products(path: str) -> list[tuple]:
+    conn = sqlite3.connect(path)
+    rows = conn.execute("SELECT id, product_key, url FROM products ORDER BY id").fetchall()
+    conn.close()
+    return rows
+
+
+def item_products(path: str) -> list[int]:
+    conn = sqlite3.connect(path)
+    rows = [r[0] for r in conn.execute("SELECT product_id FROM tracking_items ORDER BY id")]
+    conn.close()
+    return rows
+
+
+def test_backfill_resolves_known_short_links(tmp_path):
+    path = str(tmp_path / "legacy.db")
+    seed_legacy(path)
+
+    async def run():
+        engine = build_engine(f"sqlite+aiosqlite:///{path}")
+        await ensure_schema(engine)
+        await engine.dispose()
+
+    asyncio.run(run())
+    rows = products(path)
+    assert [(key, url) for _, key, url in rows] == [("trendyol:111", CANONICAL), ("ty.gl/unknown", UNKNOWN)]
+    # Çözülmüş kısa link ve kanonik link aynı ürüne bağlanır
+    assert item_products(path) == [rows[0][0], rows[0][0], rows[1][0]]
+
+
+@pytest.mark.parametrize(
+    "resolved, relinked, key",
+    [
+        # Yeni ürün: kısa linkli ürünün anahtarı ve URL'i kanonik olur
+        ("https://www.trendyol.com/marka/diger-p-222", True, "trendyol:222"),
+        # Kanonik ürün zaten var: takipler ona bağlanır, eski ürün kontrole girmez
+        (CANONICAL + "?boutiqueId=2", False, "ty.gl/unknown"),
+    ],
+)
+def test_first_check_moves_short_link_product_to_canonical(tmp_path, resolved, relinked, key):
+    path = str(tmp_path / "legacy.db")
+    seed_legacy(path)
+    product_service.remember_resolved(UNKNOWN, resolved)
+
+    async def run():
+        engine = build_engine(f"sqlite+aiosqlite:///{path}")
+        await ensure_schema(engine)
+        sessionmaker = build_sessionmaker(engine)
+        service = PriceCheckerService(sessionmaker, per_host_rps=0)
+        work = await claim_due_work(sessionmaker, "test", limit=10)
+        relinked = [await service._relink_short_url(product) for product, _ in work]
+        await engine.dispose()
+        return relinked
+
+    try:
+        assert asyncio.run(run()) == [True, relinked]
+    finally:
+        product_service.resolved_urls.pop(UNKNOWN)
+    rows = products(path)
+    assert rows[1][1] == key
+    # Kısa linkli takip kanonik URL'li ürüne bağlı
+    target = rows[1][0] if relinked else rows[0][0]
+    assert item_products(path) == [rows[0][0], rows[0][0], target]
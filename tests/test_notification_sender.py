@@ -0,0 +1,79 @@
+import asyncio
+import sqlite3
+
+from benchmarks.bench_active_iteration import create_schema
+from src.price_tracker_bot.db.engine import build_engine, build_sessionmaker
+from src.price_tracker_bot.services.notification_sender import NotificationSender
+
+
+def seed(path: str, chats: list[int]) -> None:
+    conn = sqlite3.connect(path)
+    conn.executemany(
+        "INSERT INTO outbox_messages (chat_id, text, status, attempts, next_attempt_at) "
+        "VALUES (?, ?, 'pending', 0, '2000-01-01 00:00:00')",
+        [(chat_id, f"mesaj {n}") for n, chat_id in enumerate(chats)],
+    )
+    conn.commit()
+    conn.close()
+
+
+def outbox(path: str) -> list[tuple]:
+    conn = sqlite3.connect(path)
+    rows = conn.execute("SELECT chat_id, status, lease_owner FROM outbox_messages ORDER BY id").fetchall()
+    conn.close()
+    return rows
+
+
+class RecordingBot:
+    def __init__(self, before_send=None):
+        self.sent: list[int] = []
+        self.before_send = before_send
+
+    async def send_message(self, chat_id: int, text: str, **kwargs):
+        if self.before_send:
+            await self.before_send(chat_id)
+        self.sent.append(chat_id)
+
+
+def run_drain(path: str, chats: list[int], bot, **kwargs) -> int:
+    async def run():
+        await create_schema(path)
+        seed(path, chats)
+        engine = build_engine(f"sqlite+aiosqlite:///{path}")
+        sender = NotificationSender(bot, build_sessionmaker(engine), rate_per_sec=1000, **kwargs)
+        claimed = await sender.drain_once()
+        await engine.dispose()
+        return claimed
+
+    return asyncio.run(run())
+
+
+def test_chat_share_of_a_batch_is_capped(tmp_path):
+    path = str(tmp_path / "outbox.db")
+    bot = RecordingBot()
+    # Kiranın dörtte biri (0.02 sn) sohbet aralığıyla (0.01 sn) en fazla 2 mesaj
+    claimed = run_drain(path, [1, 1, 1, 1, 1, 2], bot, per_chat_interval=0.01, lease_seconds=0.08)
+    assert claimed == 6
+    assert sorted(bot.sent) == [1, 1, 2]
+    # Pay dışındaki mesajlar kirası bırakılmış olarak bekler
+    assert [status for _, status, _ in outbox(path)] == ["sent", "sent", "pending", "pending", "pending", "sent"]
+    assert all(owner is None for _, _, owner in outbox(path))
+
+
+def test_results_are_written_while_the_batch_is_sending(tmp_path):
+    path = str(tmp_path / "outbox.db")
+    seen_sent = []
+
+    async def before_send(chat_id):
+        if chat_id != 2:
+            return
+        # Sohbet 2, sohbet 1'in sonucu veritabanına yazılana kadar bekler
+        for _ in range(100):
+            if any(chat == 1 and status == "sent" for chat, status, _ in outbox(path)):
+                seen_sent.append(True)
+                return
+            await asyncio.sleep(0.02)
+
+    run_drain(path, [1, 2], RecordingBot(before_send), per_chat_interval=0, finish_interval=0.01)
+    assert seen_sent == [True]
+    assert [status for _, status, _ in outbox(path)] == ["sent", "sent"]
@@ -0,0 +1,25 @@
+import pytest
+
+from src.price_tracker_bot.services.extractors import parse_price
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("1.149,90 TL", 1149.90),
+        ("149,90 TL", 149.90),
+        ("149.90", 149.90),
+        ("1,049.50", 1049.50),
+        ("1.049 TL", 1049.0),
+        ("12.345.678 TL", 12345678.0),
+        ("1.234.567,89", 1234567.89),
+        ("899 TL", 899.0),
+    ],
+)
+def test_parse_price_formats(text, expected):
+    assert parse_price(text) == pytest.approx(expected)
+
+
+@pytest.mark.parametrize("text", ["", "Tükendi", None])
+def test_parse_price_without_number(text):
+    assert parse_price(text) is None
@@ -0,0 +1,76 @@
+import asyncio
+import sqlite3
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from benchmarks.bench_active_iteration import create_schema
+from src.price_tracker_bot.db.engine import build_engine, build_sessionmaker
+from src.price_tracker_bot.services.price_checker import PriceCheckerService
+from src.price_tracker_bot.services.price_writer import PriceUpdate
+
+PRODUCTS = 20
+
+
+def seed(path: str) -> None:
+    conn = sqlite3.connect(path)
+    conn.executemany(
+        "INSERT INTO products (id, product_key, url, last_price) VALUES (?, ?, ?, 100)",
+        ((i, f"trendyol:{i}", f"https://www.trendyol.com/marka/urun-p-{i}") for i in range(1, PRODUCTS + 1)),
+    )
+    conn.commit()
+    conn.close()
+
+
+class FailingSessionmaker:
+    """`fail_on`'uncu session açılışında bağlantı hatası veren sessionmaker"""
+
+    def __init__(self, sessionmaker, fail_on: int):
+        self.sessionmaker = sessionmaker
+        self.fail_on = fail_on
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.calls == self.fail_on:
+            raise ConnectionError("database unavailable")
+        return self.sessionmaker()
+
+
+def test_cycle_finishes_when_a_write_batch_fails(tmp_path):
+    path = str(tmp_path / "test.db")
+
+    async def run():
+        await create_schema(path)
+        seed(path)
+        engine = build_engine(f"sqlite+aiosqlite:///{path}")
+        sessionmaker = FailingSessionmaker(build_sessionmaker(engine), fail_on=2)
+        service = PriceCheckerService(sessionmaker, concurrency=4, per_host_rps=0, write_chunk_size=4)
+
+        async def check_product(product, items, writer, stats):
+            await writer.add_many([PriceUpdate(product_id=product.id, price=90.0, price_changed=True)])
+            return "price_changed"
+
+        service._check_product = check_product
+        products = [
+            SimpleNamespace(id=i, volatility=0.0, next_check_at=datetime.now(timezone.utc))
+            for i in range(1, PRODUCTS + 1)
+        ]
+
+        async def source():
+            yield [(product, []) for product in products]
+
+        stats = await service._run_cycle(source(), scheduled=True)
+        await engine.dispose()
+        return stats, sessionmaker.calls
+
+    stats, calls = asyncio.run(run())
+    assert calls > 2
+    assert stats.checked == PRODUCTS
+    assert stats.failed == 0
+    assert 0 < stats.write_failures < PRODUCTS * 2
+
+    conn = sqlite3.connect(path)
+    written = conn.execute("SELECT COUNT(*) FROM products WHERE last_price = 90").fetchone()[0]
+    conn.close()
+    # Kaybolan parça dışındaki fiyatlar yazılmış olmalı
+    assert 0 < written < PRODUCTS